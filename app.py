@@ -1,13 +1,17 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import json
 import os
 import hashlib
-from jinja2 import Template
+import logging
+import time
+import weakref
+from datetime import datetime
+from functools import partial
 import base64
-import zipfile
 from io import BytesIO
+from toolkit.startup_profile import PROFILE
+
+# Inizio dell'esecuzione dello script, per il costo fisso di ogni rerun nel profilo di avvio
+script_started = time.perf_counter()
 
 # Impostare il layout wide
 st.set_page_config(layout="wide")
@@ -37,19 +41,55 @@ if "authenticated" not in st.session_state:
 
 if not st.session_state.authenticated:
     login()
+    PROFILE.preamble_finished(script_started)
     st.stop()
 
+# I moduli del toolkit (NumPy, pyarrow, watchdog, Pillow, Jinja2) vengono importati solo dopo il login:
+# la pagina di login viene disegnata senza attenderli. Ai rerun successivi sono già in sys.modules
+with PROFILE.step("import toolkit"):
+    from toolkit.store import SQLiteSupplierStore
+    from toolkit.token_index import TokenIndex
+    from toolkit.trigram_index import TrigramIndex
+    from toolkit.columns import ColumnIndex
+    from toolkit.range_index import SortedRangeIndex
+    from toolkit.search import advanced_filter_ids, fuzzy_filter_ids, ranked_ids
+    from toolkit.ranking import DEFAULT_TOP_K
+    from toolkit.query_cache import DEFAULT_MAX_ENTRIES, QueryCache
+    from toolkit.units import supplier_delivery_days, supplier_price_base
+    from toolkit.download_server import ensure_download_server
+    from toolkit.zip_cache import DEFAULT_MAX_BYTES, ZipCache
+    from toolkit.thumbnails import THUMBNAIL_MIME, ThumbnailPipeline, is_thumbnailable
+    from toolkit.reports import ReportRenderer, install_template
+    from toolkit.batch_export import export_reports
+    from toolkit.blobs import BlobStore, migrate_snapshots, original_names
+    from toolkit.journal import get_journal
+    from toolkit.snapshot_loader import load_snapshot
+    from toolkit.shared_store import SharedStores
+    from toolkit.snapshot_catalog import SnapshotCatalog
+    from toolkit.snapshot_diff import diff_snapshots, merge_snapshots
+    from toolkit.results import PAGE_SIZES, page_count, results_page, table_page, with_scores
+    from toolkit.parquet_snapshots import (PARQUET_SUFFIX, convert_json_to_parquet, query_parquet, read_parquet,
+                                           read_parquet_row, write_parquet)
+    from toolkit.metrics import METRICS, finish_trace, span, start_trace
+
 # Assicurarsi che la cartella 'data' e le sottocartelle 'media' e 'documents' esistano
 data_dir = 'data'
 media_dir = os.path.join(data_dir, 'media')
 documents_dir = os.path.join(data_dir, 'documents')
 template_dir = os.path.join(data_dir, 'reports/templates')
 report_dir = os.path.join(data_dir, 'reports')
+thumbnails_dir = os.path.join(data_dir, 'thumbnails')
+export_dir = os.path.join(report_dir, 'exports')
+blobs_dir = os.path.join(data_dir, 'blobs')
 
-os.makedirs(media_dir, exist_ok=True)
-os.makedirs(documents_dir, exist_ok=True)
-os.makedirs(template_dir, exist_ok=True)
-os.makedirs(report_dir, exist_ok=True)
+# Le cartelle vengono create una sola volta per processo, non ad ogni rerun
+@st.cache_resource
+def ensure_data_dirs():
+    for directory in (media_dir, documents_dir, template_dir, report_dir):
+        os.makedirs(directory, exist_ok=True)
+
+with PROFILE.step("cartelle dati"):
+    ensure_data_dirs()
 
 # Creare la directory per il template HTML
 template_html = """
@@ -176,33 +216,172 @@ template_html = """
 </html>
 """
 
-# Salvare il template HTML in un file
+# Salvare il template HTML in un file e compilarlo una sola volta per processo
 template_path = os.path.join(template_dir, 'supplier_visualization.html')
-with open(template_path, 'w', encoding='utf-8') as f:
-    f.write(template_html)
+
+@st.cache_resource
+def get_report_renderer():
+    install_template(template_path, template_html)
+    return ReportRenderer(template_dir, 'supplier_visualization.html', os.path.join(report_dir, 'cache'))
+
+# Percorso del database fornitori: ":memory:" mantiene l'archivio separato per ogni sessione,
+# un file è invece un archivio unico condiviso da tutte le sessioni del processo
+supplier_db_path = st.secrets.get("suppliers_db", ":memory:")
+
+def new_supplier_store(path=":memory:"):
+    store = SQLiteSupplierStore(path)
+    store.attach_index("tokens", TokenIndex())
+    store.attach_index("trigrams", TrigramIndex())
+    store.attach_index("columns", ColumnIndex())
+    store.attach_index("price_base", SortedRangeIndex(supplier_price_base))
+    store.attach_index("delivery_days", SortedRangeIndex(supplier_delivery_days))
+    return store
+
+# Archivi non legati a un file fornitori (privati delle sessioni e database) ancora in uso nel processo:
+# la migrazione non elimina i file originali a cui puntano
+@st.cache_resource
+def get_private_stores():
+    return weakref.WeakSet()
+
+def new_private_store(path=":memory:"):
+    store = new_supplier_store(path)
+    get_private_stores().add(store)
+    return store
+
+# Archivio sul file del database configurato: un solo oggetto per processo, così gli indici in memoria
+# seguono le scritture di tutte le sessioni (un archivio per sessione sullo stesso file resterebbe indietro)
+@st.cache_resource
+def get_database_store(path):
+    return new_private_store(path)
+
+# Risultati delle ricerche avanzate, condivisi dalle sessioni del processo
+@st.cache_resource
+def get_query_cache():
+    return QueryCache(st.secrets.get("query_cache_entries", DEFAULT_MAX_ENTRIES))
+
+# Archivi condivisi dalle sessioni del processo, uno per file fornitori caricato
+@st.cache_resource
+def get_shared_stores():
+    return SharedStores(new_supplier_store)
+
+# Quando un file fornitori cambia sul disco (altra replica, job esterno) vengono scartati
+# solo l'archivio condiviso e lo stato del journal di quel file; le scritture del processo sono già in memoria.
+# I riferimenti ai blob del file vengono ricontati dal nuovo contenuto
+def invalidate_snapshot(shared_stores, blob_store, file_path):
+    journal = get_journal(file_path)
+    if journal.is_own_write():
+        return
+    journal.reset()
+    shared_stores.discard(file_path)
+    blob_store.resync_snapshot(file_path)
+
+# Un file riscritto da questo processo non viene invalidato dal watcher (is_own_write): chi lo riscrive
+# senza aggiornare l'archivio condiviso (unione, migrazione) lo scarta qui, e il file viene riletto alla prossima richiesta
+def snapshot_rewritten(file_path):
+    get_shared_stores().discard(file_path)
+    get_snapshot_catalog().refresh(file_path)
+
+# Catalogo dei file fornitori in data/, aggiornato da un watcher invece che rileggendo la cartella ad ogni rerun
+@st.cache_resource
+def get_snapshot_catalog():
+    catalog = SnapshotCatalog(data_dir)
+    # Il watcher gira fuori dai rerun: l'archivio condiviso viene legato qui e non cercato nella cache
+    catalog.subscribe(partial(invalidate_snapshot, get_shared_stores(), get_blob_store()))
+    catalog.start()
+    return catalog
+
+# Funzione per ottenere l'archivio fornitori della sessione: quello condiviso del file caricato
+# oppure, per le sessioni non associate a un file, un archivio privato (o il database configurato,
+# finché la sessione non sostituisce l'elenco con update_suppliers)
+def get_store():
+    file_path = st.session_state.get("journal_file")
+    if file_path:
+        return get_shared_stores().get(file_path, load_suppliers)
+    if "supplier_store" not in st.session_state:
+        if supplier_db_path != ":memory:":
+            return get_database_store(supplier_db_path)
+        st.session_state.supplier_store = new_private_store()
+    return st.session_state.supplier_store
 
 # Funzioni per gestire i fornitori
-def load_suppliers(file_path=None):
-    if file_path and os.path.exists(file_path):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            suppliers = json.load(f)
+def load_suppliers(file_path=None, progress=None):
+    if file_path:
+        # Snapshot (letto in streaming) più le operazioni del journal non ancora compattate;
+        # un file rimosso dal disco dà solo le operazioni del journal (nessuna ricaduta sull'archivio della sessione)
+        with span("load_suppliers", os.path.getsize(file_path) if os.path.exists(file_path) else 0):
+            suppliers = get_journal(file_path).load(progress)
     else:
-        suppliers = st.session_state.get("suppliers", [])
+        # Copie superficiali: l'elenco può essere modificato senza toccare l'archivio condiviso
+        with span("load_suppliers"):
+            suppliers = [dict(supplier) for supplier in get_store().all()]
     return suppliers
 
-def save_suppliers_to_file(file_path):
-    suppliers = load_suppliers()
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(suppliers, f, ensure_ascii=False, indent=4)
+# Associa la sessione a un file fornitori: legge dall'archivio condiviso del file
+# e le aggiunte successive vengono accodate al suo journal
+def bind_journal(file_path):
+    st.session_state.journal_file = file_path
+    st.session_state.pop("supplier_store", None)
+
+# Carica un file nella sessione; il file viene letto solo se nessun'altra sessione lo ha già caricato
+def open_suppliers_file(file_path, progress=None):
+    store = get_shared_stores().get(file_path, lambda path: load_suppliers(path, progress))
+    bind_journal(file_path)
+    return store
+
+# overwrite_shared permette di sostituire un file che altre sessioni del processo hanno aperto
+def save_suppliers_to_file(file_path, overwrite_shared=False):
+    journal = get_journal(file_path)
+    if st.session_state.get("journal_file") == file_path:
+        # Il file contiene già tutte le modifiche tramite il journal: basta compattarlo;
+        # senza journal da compattare (es. file rimosso dal disco) viene riscritto dall'archivio condiviso
+        if journal.compact(background=True) is None:
+            journal.write_snapshot(get_store().all())
+    elif get_shared_stores().loaded(file_path) and not overwrite_shared:
+        st.error(f"{file_path} è aperto in altre sessioni: caricalo per aggiungervi i fornitori "
+                 f"oppure conferma la sovrascrittura")
+        return False
+    else:
+        suppliers = get_store().all()
+        journal.write_snapshot(suppliers)
+        get_shared_stores().replace(file_path, suppliers)
+        bind_journal(file_path)
+        # I blob non più usati dal contenuto precedente del file diventano eliminabili
+        get_blob_store().sync_snapshot(file_path, suppliers)
+        get_blob_store().collect()
+        # Il file compare subito nel catalogo, senza attendere l'evento del watcher
+        get_snapshot_catalog().refresh(file_path)
+    st.success(f"Fornitori salvati con successo in {file_path}")
+    return True
+
+# Snapshot colonnare (Parquet) dei fornitori della sessione, interrogabile senza caricarlo
+def save_suppliers_to_parquet(file_path):
+    suppliers = get_store().all()
+    write_parquet(suppliers, file_path)
+    get_blob_store().sync_snapshot(file_path, suppliers)
+    get_blob_store().collect()
+    get_snapshot_catalog().refresh(file_path)
     st.success(f"Fornitori salvati con successo in {file_path}")
 
 def save_supplier(supplier):
-    suppliers = load_suppliers()
-    suppliers.append(supplier)
-    st.session_state["suppliers"] = suppliers
-
-def update_suppliers(suppliers):
-    st.session_state["suppliers"] = suppliers
+    store = get_store()
+    supplier_id = store.add(supplier)
+    file_path = st.session_state.get("journal_file")
+    if file_path:
+        get_journal(file_path).append_add(supplier)
+        get_blob_store().retain(file_path, supplier)
+    return supplier_id
+
+# source indica il file da cui provengono i fornitori (il contenuto condiviso di quel file viene sostituito);
+# senza source la sessione passa a un archivio privato e le altre sessioni non vengono toccate
+def update_suppliers(suppliers, source=None):
+    if source:
+        get_shared_stores().replace(source, suppliers)
+        bind_journal(source)
+    else:
+        st.session_state.pop("journal_file", None)
+        if "supplier_store" not in st.session_state:
+            st.session_state.supplier_store = new_private_store()
+        st.session_state.supplier_store.replace_all(suppliers)
 
 def reset_form():
     st.session_state.update({
@@ -235,27 +414,80 @@ def add_custom_field(fields):
     fields.append({"title": "", "type": "text"})
     return fields
 
-# Funzione per salvare i file caricati
-def save_uploaded_file(uploaded_file, folder):
-    folder_path = os.path.join(data_dir, folder)
-    os.makedirs(folder_path, exist_ok=True)
-    file_path = os.path.join(folder_path, uploaded_file.name)
-    with open(file_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
-    return file_path
-
-# Funzione per creare uno zip da un elenco di file
+# Archivio di media e documenti indicizzato per contenuto, condiviso dal processo;
+# i riferimenti dei file fornitori già presenti vengono contati in background
+@st.cache_resource
+def get_blob_store():
+    blob_store = BlobStore(blobs_dir)
+    blob_store.track_snapshots([os.path.join(data_dir, f) for f in os.listdir(data_dir)
+                                if f.endswith(".json") or f.endswith(PARQUET_SUFFIX)])
+    return blob_store
+
+# Pipeline delle miniature condivisa dal processo; al primo avvio genera quelle dei media già presenti
+@st.cache_resource
+def get_thumbnail_pipeline():
+    pipeline = ThumbnailPipeline(thumbnails_dir)
+    pipeline.backfill(media_dir)
+    pipeline.backfill(blobs_dir)
+    return pipeline
+
+# Funzione per salvare in parallelo i file di un invio nell'archivio a blob (i contenuti identici sono salvati
+# una volta sola); restituisce i percorsi per cartella e i nomi originali
+def save_uploaded_files(files_by_folder):
+    uploaded_files = [uploaded_file for files in files_by_folder.values() for uploaded_file in files]
+    with span("save_uploaded_file", sum(uploaded_file.size for uploaded_file in uploaded_files)):
+        blob_paths = iter(get_blob_store().put_uploads(uploaded_files))
+    # I nomi sono per cartella e nello stesso ordine dei percorsi: contenuti identici possono avere nomi diversi
+    paths, file_names = {}, {}
+    for folder, files in files_by_folder.items():
+        paths[folder] = [next(blob_paths) for _ in files]
+        file_names[folder] = [uploaded_file.name for uploaded_file in files]
+    if paths.get("media"):
+        get_thumbnail_pipeline().submit(paths["media"])
+    return paths, file_names
+
+# Cache degli archivi zip condivisa da tutte le sessioni del processo
+@st.cache_resource
+def get_zip_cache():
+    return ZipCache(os.path.join(data_dir, 'zip_cache'), st.secrets.get("zip_cache_max_bytes", DEFAULT_MAX_BYTES))
+
+# Funzione per creare uno zip da un elenco di file (riutilizzando l'archivio in cache se già generato)
 def create_zip(file_paths):
-    zip_buffer = BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        for file_path in file_paths:
-            zip_file.write(file_path, os.path.basename(file_path))
-    zip_buffer.seek(0)
-    return zip_buffer
+    return BytesIO(get_zip_cache().read(file_paths))
+
+# Server affiancato per download zip, media, documenti, report e metriche (None se non avviabile)
+def start_download_server():
+    return ensure_download_server(st.secrets.get("download_server_host", "127.0.0.1"),
+                                  st.secrets.get("download_server_port", 8502),
+                                  st.secrets.get("download_base_url"),
+                                  get_zip_cache(),
+                                  {"media": media_dir, "documents": documents_dir, "thumbnails": thumbnails_dir,
+                                   "exports": export_dir, "blobs": blobs_dir},
+                                  METRICS,
+                                  st.secrets.get("download_server_token"))
+
+# Server da usare per gli URL mostrati nel browser: solo con download_base_url configurato, perché l'indirizzo
+# locale del server (127.0.0.1) non è raggiungibile da un browser remoto e un URL http viene bloccato sotto HTTPS;
+# senza, media, report e download restano serviti da Streamlit
+def get_download_server():
+    server = start_download_server()
+    return server if st.secrets.get("download_base_url") else None
+
+# Funzione per offrire il download di uno zip generato in streaming solo quando viene richiesto
+def zip_download(label, file_paths, file_name):
+    server = get_download_server()
+    if server is not None:
+        st.link_button(label, server.zip_url(file_paths, file_name), use_container_width=True)
+    else:
+        st.download_button(
+            label=label,
+            data=create_zip(file_paths),
+            file_name=file_name,
+            mime="application/zip",
+            use_container_width=True
+        )
 
 # Inizializzazione dello stato della sessione
-if "suppliers" not in st.session_state:
-    st.session_state.suppliers = []
 if "name" not in st.session_state:
     reset_form()
 
@@ -270,6 +502,103 @@ pages = {
 st.sidebar.title("Gestione Fornitori")
 page = st.sidebar.radio("Seleziona la pagina", list(pages.keys()))
 
+# Profilo di avvio (import e inizializzazioni a freddo, costo fisso dei rerun), attivabile dai secrets
+def show_startup_profile():
+    profile = PROFILE.report()
+    with st.sidebar.expander("Profilo di avvio"):
+        if profile["first_paint"] is not None:
+            st.caption(f"Primo disegno della pagina: {profile['first_paint'] * 1000:.0f} ms dall'avvio")
+        if profile["reruns"]:
+            st.caption(f"Preambolo dei rerun: mediana {profile['rerun_median'] * 1000:.1f} ms, "
+                       f"massimo {profile['rerun_max'] * 1000:.1f} ms su {profile['reruns']} esecuzioni")
+        st.dataframe([{"Passo": name, "ms": round(seconds * 1000, 1)} for name, seconds in profile["steps"]],
+                     use_container_width=True, hide_index=True)
+
+PROFILE.preamble_finished(script_started)
+if st.secrets.get("startup_profile", False):
+    show_startup_profile()
+
+# Pannello di debug: tratti misurati dell'ultimo rerun concluso della sessione, con i byte elaborati
+def show_debug_panel():
+    trace = st.session_state.get("last_trace")
+    with st.sidebar.expander("Debug: ultimo rerun"):
+        if trace is None:
+            st.caption("Nessun rerun misurato")
+        else:
+            st.caption(f"{trace.page}: {trace.seconds * 1000:.1f} ms")
+            st.dataframe([{"Tratto": measured.name, "ms": round(measured.seconds * 1000, 2), "Byte": measured.bytes}
+                          for measured in trace.spans], use_container_width=True, hide_index=True)
+        server = start_download_server()
+        if server is not None:
+            st.caption(f"Metriche Prometheus: {server.metrics_url()}")
+
+# Misure del rerun: la durata (dall'inizio dello script) va nell'istogramma della pagina selezionata
+start_trace(page, script_started)
+if st.secrets.get("debug_panel", False):
+    show_debug_panel()
+
+# I risultati di una ricerca restano nella sessione per poterli sfogliare a pagine: gli id per l'archivio
+# della sessione, la tabella di riepilogo per gli snapshot Parquet interrogati direttamente
+def keep_results(result_key, results):
+    st.session_state[result_key] = results
+    st.session_state[f"{result_key}_page"] = 1
+    st.session_state.pop(f"{result_key}_detail", None)
+
+# Funzione per mostrare i risultati a pagine: tabella Arrow con le sole colonne di riepilogo,
+# il fornitore completo viene letto solo quando si chiede il dettaglio
+def show_results(result_key, empty_message):
+    results = st.session_state.get(result_key)
+    if results is None:
+        return
+    if "archive" in results:
+        total = results["table"].num_rows
+
+        def load_page(page, page_size):
+            return table_page(results["table"], page, page_size)
+
+        def load_detail(row):
+            return read_parquet_row(results["archive"], row)
+    else:
+        store = get_store()
+        if results["store"] != store.uid:
+            # La sessione è passata a un altro archivio: gli id non sono più validi
+            return
+        total = len(results["ids"])
+
+        def load_page(page, page_size):
+            table = results_page(store, results["ids"], page, page_size)
+            if "scores" not in results:
+                return table
+            return with_scores(table, results["scores"], results.get("score_column", "similarity"))
+
+        load_detail = store.get
+    if not total:
+        st.write(empty_message)
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        page_size = st.selectbox("Risultati per pagina", PAGE_SIZES, key=f"{result_key}_page_size")
+    pages_total = page_count(total, page_size)
+    page_key = f"{result_key}_page"
+    if st.session_state.get(page_key, 1) > pages_total:
+        st.session_state[page_key] = pages_total
+    with col2:
+        page = st.number_input(f"Pagina (di {pages_total})", min_value=1, max_value=pages_total, step=1, key=page_key)
+
+    with span("dataframe") as measured:
+        table = load_page(page, page_size)
+        measured.bytes = table.nbytes
+    st.caption(f"{total} fornitori trovati")
+    st.dataframe(table, use_container_width=True, hide_index=True)
+
+    names = dict(zip(table.column("id").to_pylist(), table.column("name").to_pylist()))
+    detail_id = st.selectbox("Dettaglio fornitore", list(names), index=None,
+                             format_func=lambda supplier_id: names[supplier_id] or str(supplier_id),
+                             placeholder="Seleziona un fornitore della pagina", key=f"{result_key}_detail")
+    if detail_id is not None:
+        st.json(load_detail(detail_id))
+
 # Funzione per la pagina di ricerca fornitori
 def search_suppliers():
     st.header("Ricerca Fornitori")
@@ -279,19 +608,23 @@ def search_suppliers():
                                     ["Fotovoltaico", "Solare Termico", "Plug and Play", "Smart Solutions",
                                      "Riscaldamento", "Climatizzazione", "Illuminazione", "E-Mobility",
                                      "Power Station"], key="category_input")
+    fuzzy = st.checkbox("Ricerca fuzzy (tollera errori di battitura su nome, indirizzo, email e sito web)",
+                        key="search_fuzzy")
 
     if st.button("Cerca", use_container_width=True):
-        filtered_suppliers = [s for s in load_suppliers() if
-                              search_input.lower() in s["name"].lower() or search_input.lower() in s[
-                                  "email"].lower() or any(c.lower() in s["category"] for c in category_input)]
-        if category_input:
-            filtered_suppliers = [s for s in filtered_suppliers if any(cat in s["category"] for cat in category_input)]
-
-        if filtered_suppliers:
-            df = pd.DataFrame(filtered_suppliers)
-            st.dataframe(df)
-        else:
-            st.write("Nessun fornitore trovato.")
+        store = get_store()
+        with store.lock:
+            if fuzzy and search_input.strip():
+                # Primi risultati per somiglianza dei trigrammi, limitati alle categorie scelte
+                candidate_ids = store.index("tokens").category_ids(category_input) if category_input else None
+                ranked = store.index("trigrams").search(search_input, candidate_ids=candidate_ids)
+                keep_results("search_results", {"store": store.uid, "ids": [supplier_id for supplier_id, _ in ranked],
+                                                "scores": dict(ranked)})
+            else:
+                matching_ids = store.index("tokens").search(search_input, category_input)
+                keep_results("search_results", {"store": store.uid, "ids": matching_ids})
+
+    show_results("search_results", "Nessun fornitore trovato.")
 
 # Funzione per la pagina di ricerca avanzata
 def advanced_search():
@@ -335,47 +668,82 @@ def advanced_search():
                                           "Riscaldamento", "Climatizzazione", "Illuminazione", "E-Mobility",
                                           "Power Station"])
 
+    # Oltre ai fornitori caricati si possono interrogare gli snapshot Parquet senza caricarli
+    archives = [f for f in get_snapshot_catalog().names() if f.endswith(PARQUET_SUFFIX)]
+    source = st.selectbox("Fornitori da interrogare", ["Fornitori caricati"] + archives, key="advanced_source")
+    fuzzy = st.checkbox("Ricerca fuzzy su nome, indirizzo, email e sito web (solo fornitori caricati)",
+                        key="advanced_fuzzy", disabled=source in archives)
+
     if st.button("Cerca", use_container_width=True):
-        suppliers = load_suppliers()
-        filtered_suppliers = suppliers
-
-        if filters["name"]:
-            filtered_suppliers = [s for s in filtered_suppliers if filters["name"].lower() in s["name"].lower()]
-        if filters["address"]:
-            filtered_suppliers = [s for s in filtered_suppliers if filters["address"].lower() in s["address"].lower()]
-        if filters["phone"]:
-            filtered_suppliers = [s for s in filtered_suppliers if filters["phone"].lower() in s["phone"].lower()]
-        if filters["email"]:
-            filtered_suppliers = [s for s in filtered_suppliers if filters["email"].lower() in s["email"].lower()]
-        if filters["website"]:
-            filtered_suppliers = [s for s in filtered_suppliers if filters["website"].lower() in s["website"].lower()]
-        if filters["quality_min"]:
-            filtered_suppliers = [s for s in filtered_suppliers if s["quality"] >= filters["quality_min"]]
-        if filters["quality_max"]:
-            filtered_suppliers = [s for s in filtered_suppliers if s["quality"] <= filters["quality_max"]]
-        if filters["price_min"]:
-            filtered_suppliers = [s for s in filtered_suppliers if s["price_money"] >= filters["price_min"]]
-        if filters["price_max"]:
-            filtered_suppliers = [s for s in filtered_suppliers if s["price_money"] <= filters["price_max"]]
-        if filters["reliability_min"]:
-            filtered_suppliers = [s for s in filtered_suppliers if s["reliability"] >= filters["reliability_min"]]
-        if filters["reliability_max"]:
-            filtered_suppliers = [s for s in filtered_suppliers if s["reliability"] <= filters["reliability_max"]]
-        if filters["delivery_times_min"]:
-            filtered_suppliers = [s for s in filtered_suppliers if
-                                  int(s["delivery_times"].split()[0]) >= filters["delivery_times_min"]]
-        if filters["delivery_times_max"]:
-            filtered_suppliers = [s for s in filtered_suppliers if
-                                  int(s["delivery_times"].split()[0]) <= filters["delivery_times_max"]]
-        if filters["category"]:
-            filtered_suppliers = [s for s in filtered_suppliers if
-                                  any(cat in s["category"] for cat in filters["category"])]
-
-        if filtered_suppliers:
-            df = pd.DataFrame(filtered_suppliers)
-            st.dataframe(df)
+        if source in archives:
+            # Filtri applicati durante la lettura: solo le colonne di riepilogo e i row group compatibili
+            archive_path = os.path.join('data', source)
+            with span("advanced_search.parquet", os.path.getsize(archive_path)):
+                table = query_parquet(archive_path, filters)
+            keep_results("advanced_results", {"archive": archive_path, "table": table})
         else:
-            st.write("Nessun fornitore trovato con i criteri di ricerca avanzata.")
+            # Prezzo e consegna restringono i candidati tramite gli indici ordinati,
+            # gli altri filtri vengono applicati come maschere sulle colonne NumPy
+            # Le stesse ricerche sulla stessa versione del catalogo vengono servite dalla cache
+            store = get_store()
+            query_cache = get_query_cache()
+            if fuzzy:
+                matching_ids, scores = query_cache.get_or_compute(query_cache.key(store, filters, "fuzzy"),
+                                                                  lambda: fuzzy_filter_ids(store, filters))
+                keep_results("advanced_results", {"store": store.uid, "ids": matching_ids, "scores": scores})
+            else:
+                matching_ids = query_cache.get_or_compute(query_cache.key(store, filters),
+                                                          lambda: advanced_filter_ids(store, filters))
+                keep_results("advanced_results", {"store": store.uid, "ids": matching_ids})
+
+    cache_stats = get_query_cache().stats()
+    if cache_stats["hits"] + cache_stats["misses"]:
+        st.caption(f"Cache ricerche: {cache_stats['hits']} risultati riutilizzati su "
+                   f"{cache_stats['hits'] + cache_stats['misses']} ricerche ({cache_stats['hit_ratio']:.0%}) · "
+                   f"{cache_stats['entries']} in memoria")
+
+    show_results("advanced_results", "Nessun fornitore trovato con i criteri di ricerca avanzata.")
+
+    # Classifica ponderata: ricalcolata ad ogni modifica dei pesi, con selezione parziale dei primi k
+    # invece dell'ordinamento completo del catalogo
+    st.subheader("Classifica Fornitori")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        quality_weight = st.slider("Peso qualità", 0, 10, 5, key="rank_quality")
+    with col2:
+        price_weight = st.slider("Peso prezzo (stelle)", 0, 10, 3, key="rank_price_stars")
+    with col3:
+        reliability_weight = st.slider("Peso affidabilità", 0, 10, 5, key="rank_reliability")
+    with col4:
+        delivery_weight = st.slider("Peso tempi di consegna", 0, 10, 3, key="rank_delivery_days")
+    weights = {"quality": quality_weight, "price_stars": price_weight, "reliability": reliability_weight,
+               "delivery_days": delivery_weight}
+    col5, col6 = st.columns(2)
+    with col5:
+        top = st.number_input("Fornitori in classifica", min_value=1, max_value=1000, value=DEFAULT_TOP_K, step=10,
+                              key="rank_top_k")
+    with col6:
+        only_filtered = st.checkbox("Solo fornitori che soddisfano i filtri di ricerca", key="rank_filtered")
+
+    if source in archives:
+        st.caption("La classifica è disponibile solo per i fornitori caricati.")
+        return
+    store = get_store()
+    query_cache = get_query_cache()
+    # I filtri restringono i candidati tramite la cache delle ricerche, la classifica viene ricalcolata
+    # solo se pesi, filtri o catalogo sono cambiati (la paginazione non la ricalcola)
+    params = (query_cache.key(store, filters) if only_filtered else (store.uid, store.version),
+              tuple(sorted(weights.items())), top)
+    if st.session_state.get("ranking_results", {}).get("params") != params:
+        candidate_ids = None
+        if only_filtered:
+            # Le statistiche della cache riguardano le sole ricerche avanzate: questo riutilizzo non viene contato
+            candidate_ids = query_cache.get_or_compute(query_cache.key(store, filters),
+                                                       lambda: advanced_filter_ids(store, filters), count=False)
+        ranking_ids, scores = ranked_ids(store, weights, top, candidate_ids)
+        keep_results("ranking_results", {"store": store.uid, "ids": ranking_ids, "scores": scores,
+                                         "score_column": "score", "params": params})
+    show_results("ranking_results", "Nessun fornitore da mettere in classifica.")
 
 # Funzione per la pagina di aggiunta fornitori
 def add_supplier():
@@ -471,8 +839,10 @@ def add_supplier():
     if submitted:
         additional_data = {field["title"]: field["value"] for field in additional_fields}
 
-        media_paths = [save_uploaded_file(file, "media") for file in uploaded_media]
-        documents_paths = [save_uploaded_file(file, "documents") for file in uploaded_documents]
+        saved_paths, file_names = save_uploaded_files({"media": uploaded_media or [],
+                                                       "documents": uploaded_documents or []})
+        media_paths = saved_paths["media"]
+        documents_paths = saved_paths["documents"]
 
         new_supplier = {
             "name": name if name else "Campo non fornito",
@@ -496,7 +866,8 @@ def add_supplier():
             "general_notes": general_notes if general_notes else "Nessuna nota generale",
             "additional_fields": additional_data,
             "media": media_paths,
-            "documents": documents_paths
+            "documents": documents_paths,
+            "file_names": file_names
         }
 
         save_supplier(new_supplier)
@@ -507,26 +878,41 @@ def add_supplier():
 def supplier_reports():
     st.header("Visualizza Fornitori")
 
-    suppliers = load_suppliers()
-    supplier_ids = [i for i in range(len(suppliers))]
+    store = get_store()
+    supplier_ids = store.ids()
 
     selected_supplier_id = st.selectbox("Seleziona l'ID del fornitore", supplier_ids)
 
     if st.button("Visualizza Fornitore", use_container_width=True) or "last_selected_supplier" in st.session_state and st.session_state.last_selected_supplier == selected_supplier_id:
-        selected_supplier = suppliers[selected_supplier_id]
+        selected_supplier = store.get(selected_supplier_id)
         st.session_state.last_selected_supplier = selected_supplier_id
 
-        with open(template_path, encoding='utf-8') as f:
-            template = Template(f.read())
-        html_content = template.render(selected_supplier)
+        with span("render_template") as measured:
+            html_content = get_report_renderer().render(selected_supplier, selected_supplier_id)
+            measured.bytes = len(html_content)
 
-        # Convertire il contenuto HTML in base64
-        b64 = base64.b64encode(html_content.encode('utf-8')).decode('utf-8')
+        # Nomi originali dei file (i percorsi puntano ai blob indicizzati per contenuto): i file vengono
+        # scelti per posizione, perché lo stesso blob può comparire più volte con nomi diversi
+        media_names = original_names(selected_supplier, "media")
+        document_names = original_names(selected_supplier, "documents")
+
+        def zip_items(paths, names, positions):
+            return [(paths[position], names[position]) for position in positions]
+
+        # Il report viene servito per URL dal server affiancato; senza server si ricade sul data URI in base64
+        server = get_download_server()
+        if server is not None:
+            report_src = server.html_url(html_content)
+        else:
+            with span("base64_encode") as measured:
+                b64 = base64.b64encode(html_content.encode('utf-8')).decode('utf-8')
+                measured.bytes = len(b64)
+            report_src = f"data:text/html;base64,{b64}"
 
         # Visualizzare il file HTML tramite un iframe
         st.markdown(f"""
         <div style="text-align: center;">
-            <iframe src="data:text/html;base64,{b64}" width="100%" height="600" id="preview-iframe" style="border: none;"></iframe>
+            <iframe src="{report_src}" width="100%" height="600" id="preview-iframe" style="border: none;"></iframe>
         </div>
         """, unsafe_allow_html=True)
 
@@ -562,102 +948,296 @@ def supplier_reports():
             )
 
             media_gallery = ""
-            for media_path in selected_supplier["media"]:
+            streamlit_videos = []
+            for media_path, media_name in zip(selected_supplier["media"], media_names):
                 media_ext = media_path.split(".")[-1]
                 if media_ext in ["jpg", "jpeg", "png", "svg", "gif", "JPG", "JPEG", "PNG", "SVG", "GIF"]:
-                    with open(media_path, "rb") as file:
-                        img_bytes = file.read()
-                    b64_img = base64.b64encode(img_bytes).decode("utf-8")
-                    media_gallery += f'<div class="media-item"><img src="data:image/{media_ext};base64,{b64_img}" alt="{media_path}"></div>'
+                    # Per le foto viene mostrata la miniatura invece del file a piena risoluzione
+                    thumb_path = get_thumbnail_pipeline().get(media_path) if is_thumbnailable(media_path) else None
+                    img_src = server.file_url(thumb_path or media_path) if server is not None else None
+                    if img_src is None:
+                        with open(thumb_path or media_path, "rb") as file:
+                            img_bytes = file.read()
+                        with span("base64_encode", len(img_bytes)):
+                            b64_img = base64.b64encode(img_bytes).decode("utf-8")
+                        img_mime = THUMBNAIL_MIME if thumb_path else f"image/{media_ext}"
+                        img_src = f"data:{img_mime};base64,{b64_img}"
+                    media_gallery += f'<div class="media-item"><img src="{img_src}" alt="{media_name}"></div>'
                 elif media_ext in ["mp4", "mov"]:
-                    media_gallery += f'<div class="media-item"><video controls><source src="{media_path}" type="video/{media_ext}"></video></div>'
+                    # I video vengono serviti con supporto Range, così il browser può avviarli e scorrerli senza scaricarli;
+                    # senza server li serve Streamlit sotto la galleria
+                    video_src = server.file_url(media_path) if server is not None else None
+                    if video_src is None:
+                        streamlit_videos.append(media_path)
+                        continue
+                    video_type = "video/quicktime" if media_ext.lower() == "mov" else f"video/{media_ext}"
+                    media_gallery += f'<div class="media-item"><video controls preload="metadata"><source src="{video_src}" type="{video_type}"></video></div>'
             st.markdown(f'<div class="media-gallery">{media_gallery}</div>', unsafe_allow_html=True)
+            for media_path in streamlit_videos:
+                st.video(media_path)
 
         # Selezionare e scaricare media
         if selected_supplier.get("media"):
             st.subheader("Scarica Media")
-            selected_media = st.multiselect("Seleziona i media da scaricare", selected_supplier["media"], key="media_multiselect")
+            media = selected_supplier["media"]
+            selected_media = st.multiselect("Seleziona i media da scaricare", range(len(media)),
+                                            format_func=media_names.__getitem__, key="media_multiselect")
             st.write("Media selezionati per il download:")
-            st.write(selected_media)
+            st.write([media_names[position] for position in selected_media])
 
-            zip_buffer = create_zip(selected_media) if selected_media else None
-            if zip_buffer:
-                st.download_button(
-                    label="Scarica Media Selezionati",
-                    data=zip_buffer,
-                    file_name="media_files.zip",
-                    mime="application/zip",
-                    use_container_width=True
-                )
+            if selected_media:
+                zip_download("Scarica Media Selezionati", zip_items(media, media_names, selected_media),
+                             "media_files.zip")
 
             # Pulsante per scaricare tutti i media
-            all_media_zip_buffer = create_zip(selected_supplier["media"])
-            st.download_button(
-                label="Scarica Tutti i Media",
-                data=all_media_zip_buffer,
-                file_name="all_media_files.zip",
-                mime="application/zip",
-                use_container_width=True
-            )
+            zip_download("Scarica Tutti i Media", zip_items(media, media_names, range(len(media))),
+                         "all_media_files.zip")
 
         # Selezionare e scaricare documenti
         if selected_supplier.get("documents"):
             st.subheader("Scarica Documenti")
-            selected_documents = st.multiselect("Seleziona i documenti da scaricare", selected_supplier["documents"], key="documents_multiselect")
+            documents = selected_supplier["documents"]
+            selected_documents = st.multiselect("Seleziona i documenti da scaricare", range(len(documents)),
+                                                format_func=document_names.__getitem__, key="documents_multiselect")
             st.write("Documenti selezionati per il download:")
-            st.write(selected_documents)
+            st.write([document_names[position] for position in selected_documents])
+
+            if selected_documents:
+                zip_download("Scarica Documenti Selezionati",
+                             zip_items(documents, document_names, selected_documents), "document_files.zip")
 
-            zip_buffer = create_zip(selected_documents) if selected_documents else None
-            if zip_buffer:
+            # Pulsante per scaricare tutti i documenti
+            zip_download("Scarica Tutti i Documenti", zip_items(documents, document_names, range(len(documents))),
+                         "all_document_files.zip")
+
+    # Esportazione dei report di tutto il catalogo (o di un sottoinsieme) in un unico archivio
+    st.markdown("---")
+    st.subheader("Esporta Report")
+    export_query = st.text_input("Filtra per nome o email (opzionale)", key="export_query")
+    export_categories = st.multiselect("Filtra per categoria (opzionale)",
+                                       ["Fotovoltaico", "Solare Termico", "Plug and Play", "Smart Solutions",
+                                        "Riscaldamento", "Climatizzazione", "Illuminazione", "E-Mobility",
+                                        "Power Station"], key="export_categories")
+    if st.button("Esporta Report", use_container_width=True):
+        with store.lock:
+            export_ids = store.index("tokens").search(export_query, export_categories)
+        if export_ids:
+            get_report_renderer()
+            progress_bar = st.progress(0.0, text="Esportazione dei report in corso...")
+            step = max(len(export_ids) // 100, 1)
+
+            def update_progress(done, total):
+                if done % step == 0 or done == total:
+                    progress_bar.progress(done / total, text=f"Report esportati: {done} / {total}")
+
+            export_path = os.path.join(export_dir, f"report_fornitori_{time.strftime('%Y%m%d_%H%M%S')}.zip")
+            export_reports(zip(export_ids, store.get_many(export_ids)), export_path, template_dir,
+                           'supplier_visualization.html', progress=update_progress)
+            st.session_state.last_export = export_path
+            st.success(f"Esportati {len(export_ids)} report in {export_path}")
+        else:
+            st.write("Nessun fornitore da esportare.")
+
+    last_export = st.session_state.get("last_export")
+    if last_export and os.path.exists(last_export):
+        server = get_download_server()
+        export_url = server.file_url(last_export) if server is not None else None
+        if export_url:
+            st.link_button("Scarica Report Esportati", export_url, use_container_width=True)
+        else:
+            with open(last_export, "rb") as f:
                 st.download_button(
-                    label="Scarica Documenti Selezionati",
-                    data=zip_buffer,
-                    file_name="document_files.zip",
+                    label="Scarica Report Esportati",
+                    data=f.read(),
+                    file_name=os.path.basename(last_export),
                     mime="application/zip",
                     use_container_width=True
                 )
 
-            # Pulsante per scaricare tutti i documenti
-            all_documents_zip_buffer = create_zip(selected_supplier["documents"])
-            st.download_button(
-                label="Scarica Tutti i Documenti",
-                data=all_documents_zip_buffer,
-                file_name="all_document_files.zip",
-                mime="application/zip",
-                use_container_width=True
-            )
+# Funzione per aggiornare una barra di avanzamento durante la lettura di un file (al massimo ogni 1%)
+def progress_callback(progress_bar):
+    last = {"percent": -1}
+
+    def update(bytes_read, total_bytes, records):
+        percent = int(bytes_read * 100 / total_bytes) if total_bytes else 100
+        if percent != last["percent"]:
+            last["percent"] = percent
+            progress_bar.progress(min(percent, 100) / 100, text=f"Fornitori letti: {records}")
+
+    return update
 
 # Funzione per la gestione dei file
 def historical_suppliers():
+    # pandas serve solo alle tabelle di questa pagina: viene importato alla prima visita
+    pd = PROFILE.import_module("pandas")
     st.header("Storico Fornitori")
 
     # Caricamento fornitori
-    existing_files = [f for f in os.listdir('data') if f.endswith('.json')]
+    catalog = get_snapshot_catalog()
+    existing_files = catalog.names()
+    json_files = [f for f in existing_files if f.endswith('.json')]
     file_to_load = st.selectbox("Seleziona un file fornitori", existing_files, key="load_file_path")
+    with st.expander("Catalogo file fornitori"):
+        catalog_entries = catalog.entries()
+        if catalog_entries:
+            st.dataframe(pd.DataFrame([{
+                "File": entry["name"],
+                "Dimensione (KB)": round(entry["size"] / 1024, 1),
+                "Modificato": datetime.fromtimestamp(entry["mtime"]).strftime("%Y-%m-%d %H:%M:%S"),
+                "Fornitori": entry["records"],
+            } for entry in catalog_entries]), use_container_width=True, hide_index=True)
+        else:
+            st.info("Nessun file fornitori salvato.")
     if st.button("Carica Fornitori", use_container_width=True):
-        suppliers = load_suppliers(os.path.join('data', file_to_load))
-        update_suppliers(suppliers)
+        file_path = os.path.join('data', file_to_load)
+        progress_bar = st.progress(0.0, text="Caricamento fornitori in corso...")
+        if file_path.endswith(PARQUET_SUFFIX):
+            # Gli snapshot Parquet sono archivi senza journal: i fornitori vanno nell'archivio della sessione
+            with span("load_suppliers", os.path.getsize(file_path)):
+                suppliers = read_parquet(file_path, progress=progress_callback(progress_bar))
+            update_suppliers(suppliers)
+        else:
+            open_suppliers_file(file_path, progress_callback(progress_bar))
+        progress_bar.empty()
         st.success(f"Fornitori caricati da {file_to_load}")
 
+    # Anteprima del file senza caricarlo: solo i primi record e i campi scelti
+    with st.expander("Anteprima file fornitori"):
+        preview_limit = st.number_input("Numero di fornitori da mostrare", min_value=1, value=50, step=10,
+                                        key="preview_limit")
+        preview_fields = st.multiselect("Campi da mostrare (vuoto = tutti)",
+                                        ["name", "address", "phone", "email", "website", "quality", "price_money",
+                                         "currency", "price_stars", "reliability", "delivery_times", "category"],
+                                        key="preview_fields")
+        if st.button("Mostra Anteprima", use_container_width=True) and file_to_load:
+            preview_path = os.path.join('data', file_to_load)
+            read_preview = read_parquet if preview_path.endswith(PARQUET_SUFFIX) else load_snapshot
+            preview = read_preview(preview_path, preview_fields or None, preview_limit)
+            with span("dataframe") as measured:
+                preview_frame = pd.DataFrame(preview)
+                measured.bytes = int(preview_frame.memory_usage(deep=True).sum())
+            st.dataframe(preview_frame)
+
     # Salvataggio fornitori
-    file_name = st.text_input("Nome file fornitori", key="save_file_name")
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        file_name = st.text_input("Nome file fornitori", key="save_file_name")
+    with col2:
+        file_format = st.selectbox("Formato", ["JSON", "Parquet"], key="save_file_format")
+    overwrite_shared = st.checkbox("Sovrascrivi anche se il file è aperto in altre sessioni", key="overwrite_shared")
     if st.button("Salva Fornitori", use_container_width=True):
         if file_name:
-            if not file_name.endswith('.json'):
-                file_name += '.json'
+            suffix = PARQUET_SUFFIX if file_format == "Parquet" else '.json'
+            if not file_name.endswith(suffix):
+                file_name += suffix
             file_path = os.path.join('data', file_name)
-            save_suppliers_to_file(file_path)
+            if file_format == "Parquet":
+                save_suppliers_to_parquet(file_path)
+            else:
+                save_suppliers_to_file(file_path, overwrite_shared)
         else:
             st.error("Per favore, inserisci un nome di file valido.")
 
+    # Conversione dei file JSON esistenti nel formato colonnare
+    with st.expander("Conversione in Parquet"):
+        files_to_convert = st.multiselect("File JSON da convertire", json_files, key="files_to_convert")
+        if st.button("Converti in Parquet", use_container_width=True) and files_to_convert:
+            for json_file in files_to_convert:
+                parquet_path, count = convert_json_to_parquet(os.path.join('data', json_file))
+                get_blob_store().resync_snapshot(parquet_path)
+                catalog.refresh(parquet_path)
+                st.success(f"{json_file} convertito in {os.path.basename(parquet_path)} ({count} fornitori)")
+
+    # Migrazione di media e documenti nell'archivio indicizzato per contenuto
+    st.subheader("Archivio Media e Documenti")
+    remove_originals = st.checkbox("Elimina i file originali dopo la migrazione", key="remove_originals")
+    if st.button("Migra Media e Documenti", use_container_width=True):
+        suppliers = load_suppliers()
+        # Gli archivi condivisi dei file vengono riletti dopo la migrazione; quelli privati delle altre sessioni
+        # (e il database) non vengono riscritti, quindi i file a cui puntano restano
+        current_store = get_store()
+        other_suppliers = [supplier for store in list(get_private_stores()) if store is not current_store
+                           for supplier in store.all()]
+        report = migrate_snapshots([os.path.join('data', f) for f in existing_files], get_blob_store(),
+                                   remove_originals, suppliers, other_suppliers)
+        update_suppliers(suppliers, st.session_state.get("journal_file"))
+        # Gli altri file sono stati riscritti da questo processo: il watcher non li invalida
+        for migrated_file in existing_files:
+            if os.path.join('data', migrated_file) != st.session_state.get("journal_file"):
+                snapshot_rewritten(os.path.join('data', migrated_file))
+        get_blob_store().collect()
+        st.success(f"Migrati {report['files']} riferimenti a file da {report['snapshots']} file fornitori")
+        st.json(report)
+    blob_stats = get_blob_store().stats()
+    st.caption(f"Blob: {blob_stats['blobs']} · Riferimenti: {blob_stats['references']} · "
+               f"Spazio risparmiato: {blob_stats['saved_bytes'] / 1024 ** 2:.1f} MB")
+
+    # Confronto tra due file fornitori e unione delle differenze nel primo
+    st.subheader("Confronto e Unione File")
+    col1, col2 = st.columns(2)
+    with col1:
+        base_file = st.selectbox("File di riferimento", json_files, key="diff_base_file")
+    with col2:
+        other_file = st.selectbox("File da confrontare", json_files, key="diff_other_file")
+    if st.button("Confronta File", use_container_width=True) and base_file and other_file:
+        st.session_state.snapshot_diff = (base_file, other_file,
+                                          diff_snapshots(os.path.join('data', base_file), os.path.join('data', other_file)))
+    snapshot_diff = st.session_state.get("snapshot_diff")
+    if snapshot_diff and snapshot_diff[:2] == (base_file, other_file):
+        diff = snapshot_diff[2]
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Aggiunti", len(diff["added"]))
+        col2.metric("Rimossi", len(diff["removed"]))
+        col3.metric("Modificati", len(diff["changed"]))
+        col4.metric("Invariati", diff["unchanged"])
+        if diff["added"]:
+            st.write("Fornitori aggiunti")
+            st.dataframe(pd.DataFrame(diff["added"]))
+        if diff["removed"]:
+            st.write("Fornitori rimossi")
+            st.dataframe(pd.DataFrame(diff["removed"]))
+        if diff["changed"]:
+            st.write("Fornitori modificati")
+            st.dataframe(pd.DataFrame([
+                {"Fornitore": change["name"], "Campo": field, "Prima": str(before), "Dopo": str(after)}
+                for change in diff["changed"] for field, (before, after) in change["fields"].items()
+            ]), use_container_width=True, hide_index=True)
+        merge_labels = {"added": "Aggiunti", "changed": "Modificati", "removed": "Rimossi"}
+        merge_apply = st.multiselect("Modifiche da applicare", list(merge_labels), default=["added", "changed"],
+                                     format_func=merge_labels.get, key="merge_apply")
+        if st.button(f"Unisci in {base_file}", use_container_width=True):
+            base_path = os.path.join('data', base_file)
+            result = merge_snapshots(base_path, os.path.join('data', other_file), merge_apply)
+            # Riscrittura fatta da questo processo: l'archivio condiviso del file viene ricostruito esplicitamente
+            snapshot_rewritten(base_path)
+            # I fornitori rimossi o modificati possono lasciare blob senza riferimenti
+            get_blob_store().resync_snapshot(base_path)
+            get_blob_store().collect()
+            st.session_state.pop("snapshot_diff", None)
+            st.success(f"Unione completata: {result['added']} aggiunti, {result['changed']} modificati, "
+                       f"{result['removed']} rimossi in {base_file}")
+
 # Visualizzazione della pagina selezionata
-if page == "Ricerca Fornitori":
-    search_suppliers()
-elif page == "Ricerca Avanzata":
-    advanced_search()
-elif page == "Aggiungi Fornitore":
-    add_supplier()
-elif page == "Visualizza Fornitori":
-    supplier_reports()
-elif page == "Storico Fornitori":
-    historical_suppliers()
+try:
+    if page == "Ricerca Fornitori":
+        search_suppliers()
+    elif page == "Ricerca Avanzata":
+        advanced_search()
+    elif page == "Aggiungi Fornitore":
+        add_supplier()
+    elif page == "Visualizza Fornitori":
+        supplier_reports()
+    elif page == "Storico Fornitori":
+        historical_suppliers()
+finally:
+    # Registrato anche quando il rerun viene interrotto (st.rerun, nuovo input); il file per il
+    # textfile collector di Prometheus, se configurato, viene aggiornato al massimo ogni pochi secondi
+    last_trace = finish_trace()
+    metrics_textfile = st.secrets.get("metrics_textfile")
+    if metrics_textfile:
+        # Un errore di scrittura (cartella mancante, disco pieno) non deve nascondere quello della pagina
+        try:
+            METRICS.write_textfile(metrics_textfile)
+        except OSError:
+            logging.getLogger(__name__).exception("Scrittura delle metriche in %s non riuscita", metrics_textfile)
+    st.session_state.last_trace = last_trace
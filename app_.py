@@ -9,6 +9,8 @@ import base64
 import zipfile
 from io import BytesIO
 
+from toolkit.live_search import MIN_QUERY_LENGTH, LiveSearch, effective_query
+
 # Impostare il layout wide
 st.set_page_config(layout="wide")
 
@@ -200,9 +202,19 @@ def save_supplier(supplier):
     suppliers = load_suppliers()
     suppliers.append(supplier)
     st.session_state["suppliers"] = suppliers
+    get_live_search().add(len(suppliers) - 1, supplier)
 
 def update_suppliers(suppliers):
     st.session_state["suppliers"] = suppliers
+    get_live_search().reset(suppliers)
+
+# Ricerca istantanea della sessione, con l'indice dei fornitori caricati
+def get_live_search():
+    if "live_search" not in st.session_state:
+        live_search = LiveSearch()
+        live_search.reset(st.session_state.get("suppliers", []))
+        st.session_state.live_search = live_search
+    return st.session_state.live_search
 
 def reset_form():
     st.session_state.update({
@@ -280,11 +292,20 @@ def search_suppliers():
                                      "Riscaldamento", "Climatizzazione", "Illuminazione", "E-Mobility",
                                      "Power Station"], key="category_input")
 
-    filtered_suppliers = [s for s in load_suppliers() if
-                          search_input.lower() in s["name"].lower() or search_input.lower() in s[
-                              "email"].lower() or any(c.lower() in s["category"] for c in category_input)]
-    if category_input:
-        filtered_suppliers = [s for s in filtered_suppliers if any(cat in s["category"] for cat in category_input)]
+    live = st.checkbox("Ricerca istantanea", value=True, key="search_live",
+                       help="Affina i risultati precedenti mentre si scrive invece di rileggere tutti i fornitori")
+
+    if live:
+        if search_input.strip() and not effective_query(search_input):
+            st.caption(f"Digita almeno {MIN_QUERY_LENGTH} caratteri per cercare nel testo")
+        suppliers = load_suppliers()
+        filtered_suppliers = [suppliers[i] for i in get_live_search().search(suppliers, search_input, category_input)]
+    else:
+        filtered_suppliers = [s for s in load_suppliers() if
+                              search_input.lower() in s["name"].lower() or search_input.lower() in s[
+                                  "email"].lower() or any(c.lower() in s["category"] for c in category_input)]
+        if category_input:
+            filtered_suppliers = [s for s in filtered_suppliers if any(cat in s["category"] for cat in category_input)]
 
     if filtered_suppliers:
         df = pd.DataFrame(filtered_suppliers)
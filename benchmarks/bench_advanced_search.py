@@ -0,0 +1,110 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from toolkit.columns import ColumnIndex
+from toolkit.search import normalize_filters
+
+CATEGORIES = ["Fotovoltaico", "Solare Termico", "Plug and Play", "Smart Solutions", "Riscaldamento",
+              "Climatizzazione", "Illuminazione", "E-Mobility", "Power Station"]
+
+FILTERS = {
+    "name": "", "address": "", "phone": "", "email": "", "website": "",
+    "quality_min": 3, "quality_max": 5, "price_min": 100.0, "price_max": 5000.0, "price_currency": "EUR",
+    "reliability_min": 2, "reliability_max": 5, "delivery_times_min": 1, "delivery_times_max": 20,
+    "delivery_unit": "giorni", "category": ["Fotovoltaico", "E-Mobility"],
+}
+
+
+# Generazione di un catalogo sintetico con la stessa forma dei record dell'applicazione
+def make_suppliers(count, seed=42):
+    rng = random.Random(seed)
+    suppliers = []
+    for i in range(count):
+        suppliers.append({
+            "name": f"Fornitore {i}",
+            "address": f"Via Roma {rng.randint(1, 200)}, Milano",
+            "phone": f"+39 02 {rng.randint(1000000, 9999999)}",
+            "email": f"info{i}@fornitore{i % 1000}.it",
+            "website": f"https://fornitore{i}.it",
+            "quality": rng.randint(1, 5),
+            "price_stars": rng.randint(1, 5),
+            "price_money": round(rng.uniform(0, 10000), 2),
+            "currency": "EUR",
+            "reliability": rng.randint(1, 5),
+            # Solo giorni ed euro: il filtro originale ignora unità e valuta, così i risultati restano confrontabili
+            "delivery_times": f"{rng.randint(0, 30)} giorni",
+            "category": rng.sample(CATEGORIES, rng.randint(0, 3)),
+        })
+    return suppliers
+
+
+# Filtro a liste concatenate della ricerca avanzata originale, usato come riferimento
+def legacy_filter(suppliers, filters):
+    filtered_suppliers = suppliers
+    for field in ["name", "address", "phone", "email", "website"]:
+        if filters[field]:
+            filtered_suppliers = [s for s in filtered_suppliers if filters[field].lower() in s[field].lower()]
+    if filters["quality_min"]:
+        filtered_suppliers = [s for s in filtered_suppliers if s["quality"] >= filters["quality_min"]]
+    if filters["quality_max"]:
+        filtered_suppliers = [s for s in filtered_suppliers if s["quality"] <= filters["quality_max"]]
+    if filters["price_min"]:
+        filtered_suppliers = [s for s in filtered_suppliers if s["price_money"] >= filters["price_min"]]
+    if filters["price_max"]:
+        filtered_suppliers = [s for s in filtered_suppliers if s["price_money"] <= filters["price_max"]]
+    if filters["reliability_min"]:
+        filtered_suppliers = [s for s in filtered_suppliers if s["reliability"] >= filters["reliability_min"]]
+    if filters["reliability_max"]:
+        filtered_suppliers = [s for s in filtered_suppliers if s["reliability"] <= filters["reliability_max"]]
+    if filters["delivery_times_min"]:
+        filtered_suppliers = [s for s in filtered_suppliers if
+                              int(s["delivery_times"].split()[0]) >= filters["delivery_times_min"]]
+    if filters["delivery_times_max"]:
+        filtered_suppliers = [s for s in filtered_suppliers if
+                              int(s["delivery_times"].split()[0]) <= filters["delivery_times_max"]]
+    if filters["category"]:
+        filtered_suppliers = [s for s in filtered_suppliers if
+                              any(cat in s["category"] for cat in filters["category"])]
+    return filtered_suppliers
+
+
+def best_of(function, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def run(count):
+    suppliers = make_suppliers(count)
+    index = ColumnIndex()
+    for supplier_id, supplier in enumerate(suppliers):
+        index.add(supplier_id, supplier)
+
+    legacy_time, legacy_result = best_of(lambda: legacy_filter(suppliers, FILTERS))
+    vector_time, vector_ids = best_of(lambda: index.filter_ids(normalize_filters(FILTERS)))
+    assert [suppliers[i] for i in vector_ids] == legacy_result, "I risultati non coincidono"
+
+    with_name = dict(FILTERS, name="fornitore 1")
+    legacy_name_time, legacy_name_result = best_of(lambda: legacy_filter(suppliers, with_name))
+    vector_name_time, vector_name_ids = best_of(lambda: index.filter_ids(normalize_filters(with_name)))
+    assert [suppliers[i] for i in vector_name_ids] == legacy_name_result, "I risultati non coincidono"
+
+    print(f"{count:>9} record | {len(legacy_result):>7} risultati | "
+          f"liste {legacy_time * 1000:8.1f} ms | NumPy {vector_time * 1000:7.1f} ms | "
+          f"x{legacy_time / vector_time:5.1f}")
+    print(f"{'':>9} + nome    | {len(legacy_name_result):>7} risultati | "
+          f"liste {legacy_name_time * 1000:8.1f} ms | NumPy {vector_name_time * 1000:7.1f} ms | "
+          f"x{legacy_name_time / vector_name_time:5.1f}")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    for size in sizes:
+        run(size)
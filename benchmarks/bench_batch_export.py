@@ -0,0 +1,35 @@
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_advanced_search import make_suppliers
+from toolkit.batch_export import export_reports
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "reports", "templates")
+TEMPLATE_NAME = "supplier_visualization.html"
+
+
+def run(count, workers):
+    suppliers = make_suppliers(count)
+    for supplier in suppliers:
+        supplier.setdefault("additional_fields", {"Certificazioni": "ISO 9001"})
+    items = list(enumerate(suppliers, start=1))
+    with tempfile.TemporaryDirectory() as directory:
+        target = os.path.join(directory, "reports.zip")
+        start = time.perf_counter()
+        size = export_reports(items, target, TEMPLATE_DIR, TEMPLATE_NAME, max_workers=workers)
+        elapsed = time.perf_counter() - start
+        with zipfile.ZipFile(target) as zip_file:
+            assert len(zip_file.namelist()) == count + 1, "Numero di file nell'archivio errato"
+    print(f"{count:>7} report | {workers:>2} processi | {elapsed:6.2f} s | {count / elapsed:8.0f} report/s | "
+          f"{size / 1024 ** 2:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    for workers in sorted({1, 2, os.cpu_count() or 1}):
+        run(count, workers)
@@ -0,0 +1,31 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_advanced_search import make_suppliers
+from toolkit.trigram_index import TrigramIndex
+
+# Query con errori di battitura tipici (lettere mancanti, scambiate o sbagliate)
+QUERIES = ["Fornitre 12345", "Via Rma 4, Milno", "info123@fornitore123", "fornitore4567.it", "Fornitore"]
+
+
+def run(count, repeat=20):
+    suppliers = make_suppliers(count)
+    index = TrigramIndex()
+    start = time.perf_counter()
+    for supplier_id, supplier in enumerate(suppliers):
+        index.add(supplier_id, supplier)
+    print(f"{count:>8} fornitori | indice costruito in {time.perf_counter() - start:6.2f} s")
+    for query in QUERIES:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            results = index.search(query, limit=20)
+        elapsed = (time.perf_counter() - start) / repeat
+        best = results[0] if results else None
+        print(f"{query!r:>26} | {elapsed * 1000:8.2f} ms | migliore: {best}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
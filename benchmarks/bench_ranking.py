@@ -0,0 +1,38 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_advanced_search import make_suppliers
+from toolkit.columns import ColumnIndex
+
+# Combinazioni di pesi come quelle di un utente che sposta i cursori della classifica
+WEIGHTS = [
+    {"quality": 5, "price_stars": 3, "reliability": 5, "delivery_days": 3},
+    {"quality": 10, "price_stars": 0, "reliability": 2, "delivery_days": 0},
+    {"quality": 1, "price_stars": 8, "reliability": 1, "delivery_days": 6},
+]
+
+
+def run(count, top=50, repeat=10):
+    suppliers = make_suppliers(count)
+    index = ColumnIndex()
+    for supplier_id, supplier in enumerate(suppliers):
+        index.add(supplier_id, supplier)
+    candidate_ids = list(range(0, count, 10))
+    for weights in WEIGHTS:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            ids, scores = index.rank(weights, top)
+        whole = (time.perf_counter() - start) / repeat
+        start = time.perf_counter()
+        for _ in range(repeat):
+            index.rank(weights, top, candidate_ids)
+        filtered = (time.perf_counter() - start) / repeat
+        print(f"{count:>8} fornitori | catalogo {whole * 1000:7.2f} ms | 10% filtrato {filtered * 1000:7.2f} ms "
+              f"| primo: {ids[0]} ({scores[ids[0]]})")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
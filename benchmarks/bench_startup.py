@@ -0,0 +1,57 @@
+import ast
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Moduli importati a freddo da un processo nuovo (Streamlit è già caricato dal server)
+PRELOADED = "streamlit"
+
+# Moduli pesanti che non dovrebbero essere caricati dal solo avvio dello script
+HEAVY_MODULES = ["pandas", "matplotlib.pyplot", "pyarrow.dataset"]
+
+
+# Moduli importati a livello di modulo da uno script, divisi tra quelli eseguiti prima
+# della pagina di login e quelli dentro i blocchi (es. dopo il login)
+def script_imports(script_path):
+    with open(script_path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    before_login, after_login = [], []
+    for node in tree.body:
+        target = before_login
+        nodes = [node]
+        if isinstance(node, ast.With):
+            target, nodes = after_login, node.body
+        for child in nodes:
+            if isinstance(child, ast.Import):
+                target.extend(alias.name for alias in child.names)
+            elif isinstance(child, ast.ImportFrom) and child.module:
+                target.append(child.module)
+    return before_login, after_login
+
+
+# Tempo di import (ms) dei moduli indicati in un interprete nuovo, dopo Streamlit,
+# e moduli pesanti caricati (anche indirettamente)
+def cold_import(modules):
+    code = (f"import json, sys, time, {PRELOADED}\n"
+            "start = time.perf_counter()\n"
+            + "".join(f"import {module}\n" for module in modules)
+            + "elapsed = (time.perf_counter() - start) * 1000\n"
+            + f"print(json.dumps([elapsed, [m for m in {HEAVY_MODULES!r} if m in sys.modules]]))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(script_path, repeat=3):
+    before_login, after_login = script_imports(script_path)
+    for label, modules in (("prima del login", before_login), ("dopo il login", before_login + after_login)):
+        runs = [cold_import(modules) for _ in range(repeat)]
+        elapsed = min(elapsed for elapsed, _ in runs)
+        heavy = ", ".join(runs[0][1]) or "nessuno"
+        print(f"{label:>16} | {len(modules):3} moduli | {elapsed:8.1f} ms | moduli pesanti: {heavy}")
+
+
+if __name__ == "__main__":
+    run(sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "app.py"))
@@ -0,0 +1,46 @@
+import random
+
+CATEGORIES = ["Fotovoltaico", "Solare Termico", "Plug and Play", "Smart Solutions", "Riscaldamento",
+              "Climatizzazione", "Illuminazione", "E-Mobility", "Power Station"]
+
+WORDS = ["sole", "solare", "energia", "verde", "luce", "lucerna", "termo", "clima", "rossi", "russo", "bianchi"]
+
+
+# Fornitore sintetico con la stessa forma dei record dell'applicazione
+def make_supplier(rng):
+    name = " ".join(rng.sample(WORDS, rng.randint(1, 3))).title()
+    return {
+        "name": name,
+        "address": f"Via {rng.choice(WORDS).title()} {rng.randint(1, 200)}, Milano",
+        "phone": f"+39 02 {rng.randint(1000000, 9999999)}",
+        "email": f"{rng.choice(WORDS)}.{rng.choice(WORDS)}@example.it",
+        "website": f"www.{rng.choice(WORDS)}.it",
+        "quality": rng.randint(0, 5),
+        "price_money": rng.choice([None, round(rng.uniform(10, 5000), 2)]),
+        "currency": rng.choice(["EUR", "USD", "GBP"]),
+        "price_stars": rng.randint(0, 5),
+        "reliability": rng.randint(0, 5),
+        "delivery_times": rng.choice([f"{rng.randint(0, 30)} giorni", f"{rng.randint(1, 8)} settimane",
+                                      f"{rng.randint(1, 6)} mesi", "da concordare"]),
+        "category": rng.sample(CATEGORIES, rng.randint(0, 3)),
+    }
+
+
+# Sequenza casuale di aggiunte, modifiche e rimozioni applicata a un indice e a un dizionario di riferimento;
+# check(riferimento) viene chiamata dopo ogni operazione
+def run_operations(index, check, steps=400, seed=7):
+    rng = random.Random(seed)
+    suppliers = {}
+    for _ in range(steps):
+        supplier_id = rng.randrange(60)
+        previous = suppliers.get(supplier_id)
+        if previous is not None and rng.random() < 0.4:
+            index.remove(supplier_id, previous)
+            del suppliers[supplier_id]
+        else:
+            if previous is not None:
+                index.remove(supplier_id, previous)
+            supplier = suppliers[supplier_id] = make_supplier(rng)
+            index.add(supplier_id, supplier)
+        check(suppliers, rng)
+    return suppliers
@@ -0,0 +1,37 @@
+import zipfile
+
+import pytest
+
+from toolkit.batch_export import export_reports, report_file_name
+
+
+@pytest.fixture
+def template_dir(tmp_path):
+    directory = tmp_path / "templates"
+    directory.mkdir()
+    (directory / "report.html").write_text("<h1>{{ name }}</h1>", encoding="utf-8")
+    return str(directory)
+
+
+def test_report_file_name_is_safe():
+    assert report_file_name(7, {"name": "Rossi & Figli / Solare"}) == "reports/000007_Rossi_Figli_Solare.html"
+    assert report_file_name(8, {}) == "reports/000008_fornitore.html"
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_export_writes_reports_in_order_with_index(tmp_path, template_dir, max_workers):
+    items = [(supplier_id, {"name": f"Fornitore {supplier_id}", "category": ["Solare"]}) for supplier_id in range(7)]
+    progress = []
+    target_path = str(tmp_path / "exports" / "report.zip")
+    written = export_reports(items, target_path, template_dir, "report.html", max_workers=max_workers,
+                             chunk_size=3, progress=lambda done, total: progress.append((done, total)))
+
+    assert written > 0
+    assert progress[-1] == (7, 7)
+    with zipfile.ZipFile(target_path) as archive:
+        names = archive.namelist()
+        assert names[:-1] == [report_file_name(supplier_id, supplier) for supplier_id, supplier in items]
+        assert names[-1] == "index.html"
+        assert archive.read(names[3]).decode("utf-8") == "<h1>Fornitore 3</h1>"
+        assert b"Fornitore 6" in archive.read("index.html")
+    assert not (tmp_path / "exports" / "report.zip.part").exists()
@@ -0,0 +1,106 @@
+import json
+import os
+import time
+
+from toolkit.blobs import BlobStore, migrate_snapshots, original_names
+from toolkit.journal import SupplierJournal
+from toolkit.parquet_snapshots import read_parquet, write_parquet
+
+
+def make_file(directory, name, content):
+    path = directory / name
+    path.write_bytes(content)
+    return str(path)
+
+
+def age(path, seconds):
+    old = time.time() - seconds
+    os.utime(path, (old, old))
+
+
+def test_same_content_is_stored_once(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    first = store.put_file(make_file(tmp_path, "a.jpg", b"stesso contenuto"))
+    second = store.put_file(make_file(tmp_path, "b.JPG", b"stesso contenuto"))
+    other = store.put_file(make_file(tmp_path, "c.pdf", b"altro contenuto"))
+    assert first == second
+    assert first.endswith(".jpg") and other.endswith(".pdf")
+    assert store.is_blob(first) and not store.is_blob(str(tmp_path / "a.jpg"))
+    assert store.stats()["blobs"] == 2
+    # L'indice viene riletto da una nuova istanza
+    assert BlobStore(str(tmp_path / "blobs")).stats()["blobs"] == 2
+
+
+def test_collect_removes_only_unreferenced_blobs(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    kept = store.put_file(make_file(tmp_path, "a.jpg", b"usato"))
+    released = store.put_file(make_file(tmp_path, "b.jpg", b"rilasciato"))
+    snapshot = str(tmp_path / "fornitori.json")
+    store.sync_snapshot(snapshot, [{"media": [kept, released]}, {"media": [kept]}])
+    assert store.stats()["references"] == 3
+
+    # Il secondo blob non è più usato dal file: viene eliminato solo dopo il periodo di grazia
+    assert store.sync_snapshot(snapshot, [{"media": [kept]}]) == 1
+    assert store.collect() == 0
+    age(released, 3600)
+    assert store.collect(grace_seconds=60) == len(b"rilasciato")
+    assert not os.path.exists(released)
+    assert os.path.exists(kept)
+
+
+def test_retain_counts_journal_appends(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    blob = store.put_file(make_file(tmp_path, "a.jpg", b"contenuto"))
+    snapshot = str(tmp_path / "fornitori.json")
+    store.retain(snapshot, {"documents": [blob]})
+    age(blob, 3600)
+    assert store.collect(grace_seconds=60) == 0
+    assert store.sync_snapshot(snapshot, []) == 1
+
+
+def test_original_names_keeps_order_and_old_format():
+    supplier = {"media": ["blobs/aa/1.jpg", "blobs/aa/1.jpg"], "file_names": {"media": ["uno.jpg", "due.jpg"]}}
+    assert original_names(supplier, "media") == ["uno.jpg", "due.jpg"]
+    old = {"documents": ["docs/a.pdf", "docs/b.pdf"], "file_names": {"docs/a.pdf": "Listino.pdf"}}
+    assert original_names(old, "documents") == ["Listino.pdf", "b.pdf"]
+    assert original_names({}, "media") == []
+
+
+def test_migration_rewrites_json_and_parquet_snapshots(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    photo = make_file(tmp_path, "foto.jpg", b"foto")
+    listino = make_file(tmp_path, "listino.pdf", b"listino")
+    json_path = str(tmp_path / "fornitori.json")
+    SupplierJournal(json_path).write_snapshot([{"name": "A", "media": [photo]}])
+    parquet_path = str(tmp_path / "archivio.parquet")
+    write_parquet([{"name": "B", "media": [photo], "documents": [listino]}], parquet_path)
+
+    report = migrate_snapshots([json_path, parquet_path], store, remove_originals=True)
+    assert report["snapshots"] == 2
+    assert report["files"] == 3
+    assert report["removed_originals"] == 2
+    assert report["blobs"] == 2
+
+    with open(json_path, encoding="utf-8") as f:
+        migrated_json = json.load(f)[0]
+    migrated_parquet = read_parquet(parquet_path)[0]
+    for supplier in (migrated_json, migrated_parquet):
+        assert all(store.is_blob(path) and os.path.exists(path) for path in supplier["media"])
+    assert migrated_parquet["media"] == migrated_json["media"]
+    assert original_names(migrated_parquet, "documents") == ["listino.pdf"]
+    assert not os.path.exists(photo) and not os.path.exists(listino)
+
+
+def test_migration_keeps_originals_still_referenced(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    shared = make_file(tmp_path, "condivisa.jpg", b"condivisa")
+    own = make_file(tmp_path, "propria.jpg", b"propria")
+    json_path = str(tmp_path / "fornitori.json")
+    SupplierJournal(json_path).write_snapshot([{"name": "A", "media": [shared, own]}])
+
+    # Un archivio non migrato (es. la sessione di un altro utente) usa ancora il primo file
+    report = migrate_snapshots([json_path], store, remove_originals=True,
+                               other_suppliers=[{"name": "Altro", "media": [shared]}])
+    assert report["removed_originals"] == 1
+    assert os.path.exists(shared)
+    assert not os.path.exists(own)
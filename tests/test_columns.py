@@ -0,0 +1,75 @@
+from synthetic import CATEGORIES, WORDS, run_operations
+from toolkit.columns import ColumnIndex, TEXT_COLUMNS, numeric_row
+
+
+# Filtri normalizzati casuali come quelli prodotti da normalize_filters
+def random_filters(rng):
+    filters = {}
+    for column in ("quality", "reliability"):
+        filters[f"{column}_min"] = rng.choice([None, rng.randint(1, 5)])
+        filters[f"{column}_max"] = rng.choice([None, rng.randint(1, 5)])
+    filters["price_base_min"] = rng.choice([None, rng.uniform(10, 2000)])
+    filters["price_base_max"] = rng.choice([None, rng.uniform(500, 5000)])
+    filters["delivery_days_min"] = rng.choice([None, rng.randint(1, 30)])
+    filters["delivery_days_max"] = rng.choice([None, rng.randint(10, 200)])
+    filters["category"] = rng.sample(CATEGORIES, rng.randint(0, 2))
+    filters[rng.choice(TEXT_COLUMNS)] = rng.choice(["", rng.choice(WORDS)[:3], "milano", ".it"])
+    return filters
+
+
+# Valutazione lineare degli stessi filtri (un limite vuoto o a 0 è disattivato, NaN non soddisfa nessun limite)
+def linear_column_filter(suppliers, filters):
+    result = []
+    for supplier_id, supplier in suppliers.items():
+        row = numeric_row(supplier)
+        keep = True
+        for column in ("quality", "reliability", "price_base", "delivery_days"):
+            low, high = filters.get(f"{column}_min"), filters.get(f"{column}_max")
+            if low and not row[column] >= low or high and not row[column] <= high:
+                keep = False
+        if filters.get("category") and not set(filters["category"]) & set(supplier.get("category") or []):
+            keep = False
+        for column in TEXT_COLUMNS:
+            query = filters.get(column)
+            if query and query.lower() not in str(supplier.get(column, "")).lower():
+                keep = False
+        if keep:
+            result.append(supplier_id)
+    return sorted(result)
+
+
+def test_column_index_matches_linear_scan():
+    # Capacità minima per esercitare crescita e compattazione degli array
+    index = ColumnIndex(capacity=4)
+
+    def check(suppliers, rng):
+        filters = random_filters(rng)
+        assert index.filter_ids(filters) == linear_column_filter(suppliers, filters)
+        candidate_ids = set(rng.sample(sorted(suppliers), min(len(suppliers), 10)))
+        expected = [supplier_id for supplier_id in linear_column_filter(suppliers, filters)
+                    if supplier_id in candidate_ids]
+        assert index.filter_ids(filters, candidate_ids) == expected
+        assert len(index) == len(suppliers)
+
+    run_operations(index, check)
+
+
+def test_column_index_rank_returns_top_k_by_score():
+    index = ColumnIndex()
+    for supplier_id, quality in enumerate([1, 5, 3, 5, 2]):
+        index.add(supplier_id, {"quality": quality})
+    ids, scores = index.rank({"quality": 1}, 3)
+    assert ids == [1, 3, 2]
+    assert scores == {1: 1.0, 3: 1.0, 2: 0.5}
+
+
+# Con righe rimosse (e capacità maggiore del numero di righe) la normalizzazione usa solo le righe valide
+def test_column_index_rank_after_remove():
+    index = ColumnIndex(capacity=8)
+    for supplier_id, quality in enumerate([1, 5, 3, 4, 2]):
+        index.add(supplier_id, {"quality": quality})
+    index.remove(1, {"quality": 5})
+    ids, scores = index.rank({"quality": 1}, 3)
+    assert ids == [3, 2, 4]
+    assert scores == {3: 1.0, 2: 0.667, 4: 0.333}
+    assert index.rank({"quality": 1}, 3, candidate_ids=[0, 1, 2]) == ([2, 0], {2: 0.667, 0: 0.0})
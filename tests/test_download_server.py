@@ -0,0 +1,125 @@
+import os
+import zipfile
+from http.client import HTTPConnection
+from io import BytesIO
+from urllib.parse import urlsplit
+
+import pytest
+
+from toolkit.download_server import DownloadServer, parse_range
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=-500", 100) == (0, 99)
+    # Intervalli multipli e unità diverse vengono ignorati (risposta completa)
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("items=0-1", 100) is None
+    assert parse_range("bytes=a-b", 100) is None
+    assert parse_range("bytes=100-", 100) is False
+    assert parse_range("bytes=10-5", 100) is False
+    assert parse_range("bytes=-0", 100) is False
+
+
+@pytest.fixture
+def server(tmp_path):
+    media_dir = tmp_path / "media"
+    media_dir.mkdir()
+    server = DownloadServer(port=0, roots={"media": str(media_dir)}, token="segreto")
+    yield server
+    server.shutdown()
+
+
+def request(url, headers=None, method="GET"):
+    parts = urlsplit(url)
+    connection = HTTPConnection(parts.hostname, parts.port, timeout=10)
+    connection.request(method, parts.path + (f"?{parts.query}" if parts.query else ""), headers=headers or {})
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response, body
+
+
+def test_file_range_and_conditional_requests(server, tmp_path):
+    content = os.urandom(5000)
+    file_path = tmp_path / "media" / "clip.mp4"
+    file_path.write_bytes(content)
+    url = server.file_url(str(file_path))
+
+    response, body = request(url)
+    assert response.status == 200 and body == content
+    assert response.getheader("Content-Type") == "video/mp4"
+    etag = response.getheader("ETag")
+    last_modified = response.getheader("Last-Modified")
+
+    response, body = request(url, {"Range": "bytes=100-199"})
+    assert response.status == 206 and body == content[100:200]
+    assert response.getheader("Content-Range") == "bytes 100-199/5000"
+
+    response, _ = request(url, {"Range": "bytes=9000-"})
+    assert response.status == 416
+    assert response.getheader("Content-Range") == "bytes */5000"
+
+    # If-Range con un ETag diverso: il file è cambiato, viene restituito per intero
+    response, body = request(url, {"Range": "bytes=0-9", "If-Range": '"vecchio"'})
+    assert response.status == 200 and body == content
+
+    response, body = request(url, {"If-None-Match": etag})
+    assert response.status == 304 and body == b""
+    response, _ = request(url, {"If-Modified-Since": last_modified})
+    assert response.status == 304
+
+    response, body = request(url, method="HEAD")
+    assert response.status == 200 and body == b""
+    assert response.getheader("Content-Length") == "5000"
+
+
+def test_unsigned_or_outside_paths_are_not_served(server, tmp_path):
+    (tmp_path / "media" / "foto.jpg").write_bytes(b"foto")
+    (tmp_path / "segreto.txt").write_bytes(b"segreto")
+    assert server.file_url(str(tmp_path / "segreto.txt")) is None
+    url = server.file_url(str(tmp_path / "media" / "foto.jpg"))
+    response, _ = request(url.replace("/files/", "/files/0"))
+    assert response.status == 404
+    response, _ = request(f"{server.base_url}/files/{'0' * 32}/media/../segreto.txt")
+    assert response.status == 404
+
+
+def test_zip_download_and_protected_endpoints(server, tmp_path):
+    paths = []
+    for name in ("a.pdf", "b.pdf"):
+        (tmp_path / "media" / name).write_bytes(name.encode() * 100)
+        paths.append(str(tmp_path / "media" / name))
+    url = server.zip_url(paths, "documenti.zip")
+    assert server.zip_url(paths, "documenti.zip") == url
+
+    response, body = request(url)
+    assert response.status == 200
+    assert "documenti.zip" in response.getheader("Content-Disposition")
+    with zipfile.ZipFile(BytesIO(body)) as archive:
+        assert sorted(archive.namelist()) == ["a.pdf", "b.pdf"]
+
+    response, _ = request(f"{server.base_url}/zip/scaduto")
+    assert response.status == 404
+    response, _ = request(f"{server.base_url}/metrics")
+    assert response.status == 401
+
+
+def test_html_pages_need_the_signed_url(server):
+    url = server.html_url("<p>Report</p>")
+    response, body = request(url)
+    assert response.status == 200 and body == b"<p>Report</p>"
+    response, _ = request(url, {"If-None-Match": response.getheader("ETag")})
+    assert response.status == 304
+    key = url.rsplit("/", 1)[1]
+    response, _ = request(f"{server.base_url}/html/{'0' * 32}/{key}")
+    assert response.status == 404
+
+
+def test_public_host_requires_base_url():
+    with pytest.raises(ValueError):
+        DownloadServer(host="0.0.0.0", port=0)
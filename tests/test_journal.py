@@ -0,0 +1,169 @@
+import json
+import os
+
+from toolkit.journal import SupplierJournal
+
+
+def read_snapshot(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_load_replays_journal_over_snapshot(tmp_path):
+    path = str(tmp_path / "fornitori.json")
+    journal = SupplierJournal(path)
+    journal.write_snapshot([{"name": "A"}, {"name": "B"}])
+    assert journal.append_add({"name": "C"}) == 2
+    journal.append_update(0, {"name": "A2"})
+    journal.append_update(2, {"name": "C2"})
+
+    # Un nuovo journal (es. un altro processo) ricostruisce lo stesso elenco dal disco
+    assert SupplierJournal(path).load() == [{"name": "A2"}, {"name": "B"}, {"name": "C2"}]
+    assert read_snapshot(path) == [{"name": "A"}, {"name": "B"}]
+
+
+def test_append_without_snapshot(tmp_path):
+    path = str(tmp_path / "nuovo.json")
+    journal = SupplierJournal(path)
+    assert journal.append_add({"name": "A"}) == 0
+    assert journal.append_add({"name": "B"}) == 1
+    assert SupplierJournal(path).load() == [{"name": "A"}, {"name": "B"}]
+
+
+def test_compact_folds_journal_into_snapshot(tmp_path):
+    path = str(tmp_path / "fornitori.json")
+    journal = SupplierJournal(path)
+    journal.write_snapshot([{"name": "A"}])
+    journal.append_add({"name": "B"})
+    journal.append_update(0, {"name": "A2"})
+
+    journal.compact()
+    assert read_snapshot(path) == [{"name": "A2"}, {"name": "B"}]
+    assert not os.path.exists(journal.journal_path)
+    assert not os.path.exists(journal.compacting_path)
+    # Le chiavi proseguono dopo la compattazione
+    assert journal.append_add({"name": "C"}) == 2
+    assert SupplierJournal(path).load() == [{"name": "A2"}, {"name": "B"}, {"name": "C"}]
+
+
+def test_background_compaction_keeps_concurrent_appends(tmp_path):
+    path = str(tmp_path / "fornitori.json")
+    journal = SupplierJournal(path)
+    journal.write_snapshot([{"name": "A"}])
+    journal.append_add({"name": "B"})
+
+    journal.compact(background=True)
+    journal.append_add({"name": "C"})
+    journal.wait()
+    assert SupplierJournal(path).load() == [{"name": "A"}, {"name": "B"}, {"name": "C"}]
+    journal.compact()
+    assert read_snapshot(path) == [{"name": "A"}, {"name": "B"}, {"name": "C"}]
+
+
+def test_compact_without_journal_returns_none(tmp_path):
+    path = str(tmp_path / "fornitori.json")
+    journal = SupplierJournal(path)
+    journal.write_snapshot([{"name": "A"}])
+    assert journal.compact(background=True) is None
+    assert read_snapshot(path) == [{"name": "A"}]
+
+
+def test_interrupted_compaction_is_replayed(tmp_path):
+    path = str(tmp_path / "fornitori.json")
+    journal = SupplierJournal(path)
+    journal.write_snapshot([{"name": "A"}])
+    journal.append_add({"name": "B"})
+    # Compattazione interrotta dopo aver messo da parte il journal, con nuove aggiunte nel frattempo
+    os.replace(journal.journal_path, journal.compacting_path)
+    restarted = SupplierJournal(path)
+    restarted.load()
+    restarted.append_add({"name": "C"})
+
+    assert SupplierJournal(path).load() == [{"name": "A"}, {"name": "B"}, {"name": "C"}]
+    # Prima viene completata la compattazione interrotta; le aggiunte successive restano nel journal
+    restarted.compact()
+    assert read_snapshot(path) == [{"name": "A"}, {"name": "B"}]
+    assert not os.path.exists(restarted.compacting_path)
+    assert SupplierJournal(path).load() == [{"name": "A"}, {"name": "B"}, {"name": "C"}]
+    restarted.compact()
+    assert read_snapshot(path) == [{"name": "A"}, {"name": "B"}, {"name": "C"}]
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    path = str(tmp_path / "fornitori.json")
+    journal = SupplierJournal(path)
+    journal.write_snapshot([{"name": "A"}])
+    journal.append_add({"name": "B"})
+    with open(journal.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"op": "add", "key": 2, "supp')
+    assert SupplierJournal(path).load() == [{"name": "A"}, {"name": "B"}]
+
+
+def test_rewrite_applies_transform_after_compaction(tmp_path):
+    path = str(tmp_path / "fornitori.json")
+    journal = SupplierJournal(path)
+    journal.write_snapshot([{"name": "A"}, {"name": "B"}])
+    journal.append_add({"name": "C"})
+    journal.rewrite(lambda records: (record for record in records if record["name"] != "B"))
+    assert read_snapshot(path) == [{"name": "A"}, {"name": "C"}]
+    assert SupplierJournal(path).load() == [{"name": "A"}, {"name": "C"}]
+
+
+def test_own_write_detection(tmp_path):
+    path = str(tmp_path / "fornitori.json")
+    journal = SupplierJournal(path)
+    journal.write_snapshot([{"name": "A"}])
+    assert journal.is_own_write()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([{"name": "Esterno"}, {"name": "B"}], f)
+    assert not journal.is_own_write()
+    journal.reset()
+    assert journal.append_add({"name": "C"}) == 2
+
+
+def test_journal_of_rewritten_snapshot_is_discarded(tmp_path):
+    path = str(tmp_path / "fornitori.json")
+    journal = SupplierJournal(path)
+    journal.write_snapshot([{"name": "A"}, {"name": "B"}])
+    journal.append_update(1, {"name": "B2"})
+    journal.append_add({"name": "C"})
+    # Lo snapshot viene sostituito dall'esterno: le operazioni per posizione non valgono più
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([{"name": "Esterno"}, {"name": "Altro"}, {"name": "Terzo"}], f)
+    assert list(SupplierJournal(path).iter_records()) == [(0, {"name": "Esterno"}), (1, {"name": "Altro"}),
+                                                           (2, {"name": "Terzo"})]
+    journal.reset()
+    assert journal.load() == [{"name": "Esterno"}, {"name": "Altro"}, {"name": "Terzo"}]
+    assert not os.path.exists(journal.journal_path)
+    assert journal.append_add({"name": "D"}) == 3
+    assert SupplierJournal(path).load()[-1] == {"name": "D"}
+
+
+def test_appends_during_compaction_survive_interrupted_fold(tmp_path):
+    path = str(tmp_path / "fornitori.json")
+    journal = SupplierJournal(path)
+    journal.write_snapshot([{"name": "A"}])
+    journal.append_add({"name": "B"})
+    os.replace(journal.journal_path, journal.compacting_path)
+    journal.append_add({"name": "C"})
+    # Interruzione dopo la sostituzione dello snapshot, prima della rimozione del journal compattato
+    journal._write_snapshot_file([{"name": "A"}, {"name": "B"}], before_replace=journal._extend_header)
+    assert SupplierJournal(path).load() == [{"name": "A"}, {"name": "B"}, {"name": "C"}]
+
+
+def test_resumed_compaction_counts_pending_operations(tmp_path):
+    path = str(tmp_path / "fornitori.json")
+    journal = SupplierJournal(path, compact_threshold=4)
+    journal.write_snapshot([{"name": "A"}])
+    journal.append_add({"name": "B"})
+    os.replace(journal.journal_path, journal.compacting_path)
+    journal.append_add({"name": "C"})
+    journal.append_add({"name": "D"})
+    journal.compact()
+    assert os.path.exists(journal.journal_path)
+    # Il journal corrente ha ancora due operazioni: la quarta fa partire la compattazione
+    journal.append_add({"name": "E"})
+    journal.append_add({"name": "F"})
+    journal.wait()
+    assert not os.path.exists(journal.journal_path)
+    assert read_snapshot(path) == [{"name": name} for name in "ABCDEF"]
@@ -0,0 +1,66 @@
+import random
+
+from synthetic import CATEGORIES, WORDS, make_supplier
+from toolkit.live_search import LiveSearch, matches, refines
+
+
+def linear_search(suppliers, query, categories):
+    query = query if len(query.strip()) >= 2 else ""
+    return [supplier_id for supplier_id, supplier in enumerate(suppliers) if matches(supplier, query, categories)]
+
+
+def test_refines():
+    assert refines("ros", (), "ross", ())
+    assert refines("ros", ("A",), "rossi", ("A",))
+    assert not refines("ros", ("A",), "rossi", ("A", "B"))
+    assert not refines("ros", ("A",), "rossi", ())
+    assert not refines("rossi", (), "ros", ())
+    # Senza testo precedente si riparte dall'indice invece di filtrare l'intero catalogo
+    assert not refines("", (), "ro", ())
+    assert not refines("  ", ("A",), "ro", ("A",))
+
+
+def test_typing_matches_linear_search():
+    rng = random.Random(5)
+    suppliers = [make_supplier(rng) for _ in range(200)]
+    live_search = LiveSearch()
+    live_search.reset(suppliers)
+    for _ in range(30):
+        word = rng.choice(WORDS)
+        categories = rng.sample(CATEGORIES, rng.randint(0, 2))
+        # Un carattere alla volta, poi qualche cancellazione
+        steps = [word[:length] for length in range(len(word) + 1)] + [word[:2], word[:1], ""]
+        for query in steps:
+            assert live_search.search(suppliers, query, categories) == linear_search(suppliers, query, categories)
+        supplier = make_supplier(rng)
+        suppliers.append(supplier)
+        live_search.add(len(suppliers) - 1, supplier)
+
+
+def test_refinement_filters_previous_results_only(monkeypatch):
+    rng = random.Random(9)
+    suppliers = [make_supplier(rng) for _ in range(100)]
+    live_search = LiveSearch()
+    live_search.reset(suppliers)
+    calls = []
+    search = live_search.index.search
+
+    def counted_search(*args, **kwargs):
+        calls.append(args)
+        return search(*args, **kwargs)
+
+    monkeypatch.setattr(live_search.index, "search", counted_search)
+
+    # Un solo carattere non avvia la ricerca nel testo
+    assert live_search.search(suppliers, "r", []) == list(range(len(suppliers)))
+    assert live_search.search(suppliers, "ro", []) == linear_search(suppliers, "ro", [])
+    assert len(calls) == 2
+    for query in ("ros", "rossi s", "rossi solare"):
+        assert live_search.search(suppliers, query, []) == linear_search(suppliers, query, [])
+    assert len(calls) == 2
+    # Un fornitore aggiunto invalida i risultati precedenti
+    suppliers.append({"name": "Rossi Solare 2", "email": ""})
+    live_search.add(len(suppliers) - 1, suppliers[-1])
+    assert live_search.search(suppliers, "rossi solare", []) == linear_search(suppliers, "rossi solare", [])
+    assert len(suppliers) - 1 in live_search.search(suppliers, "rossi solare", [])
+    assert len(calls) == 3
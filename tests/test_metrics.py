@@ -0,0 +1,75 @@
+import threading
+import zipfile
+from io import BytesIO
+
+from toolkit import metrics
+from toolkit.metrics import Histogram, MetricsRegistry, finish_trace, span, start_trace
+from toolkit.query_cache import QueryCache
+from toolkit.zip_cache import ZipCache
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram([0.1, 1.0])
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+    assert list(histogram.cumulative()) == [(0.1, 2), (1.0, 3), (float("inf"), 4)]
+    assert histogram.sum == 3.65 and histogram.count == 4
+
+
+def test_prometheus_text():
+    registry = MetricsRegistry(buckets=[0.5])
+    registry.observe_page('Pagina "uno"', 0.2)
+    registry.observe_span("load_suppliers", 0.7, 1024)
+    registry.observe_span("load_suppliers", 0.1, 1024)
+    text = registry.prometheus_text()
+    assert 'suppliers_page_duration_seconds_bucket{page="Pagina \\"uno\\"",le="0.5"} 1' in text
+    assert 'suppliers_span_duration_seconds_bucket{span="load_suppliers",le="+Inf"} 2' in text
+    assert 'suppliers_span_duration_seconds_count{span="load_suppliers"} 2' in text
+    assert 'suppliers_span_bytes_total{span="load_suppliers"} 2048' in text
+    assert "# TYPE suppliers_span_bytes_total counter" in text
+
+
+def test_write_textfile_respects_interval(tmp_path):
+    registry = MetricsRegistry()
+    path = str(tmp_path / "metrics.prom")
+    assert registry.write_textfile(path, interval=60)
+    assert not registry.write_textfile(path, interval=60)
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == registry.prometheus_text()
+
+
+def test_spans_are_collected_in_the_rerun_trace(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS", MetricsRegistry())
+    trace = start_trace("Ricerca")
+    with span("dataframe") as measured:
+        measured.bytes = 10
+    assert finish_trace() is trace
+    assert [(measured.name, measured.bytes) for measured in trace.spans] == [("dataframe", 10)]
+    assert trace.seconds >= trace.spans[0].seconds
+    assert finish_trace() is None
+    assert 'suppliers_page_duration_seconds_count{page="Ricerca"} 1' in metrics.METRICS.prometheus_text()
+
+
+def test_zip_streams_outside_reruns_are_measured(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS", MetricsRegistry())
+    (tmp_path / "a.pdf").write_bytes(b"documento" * 100)
+    cache = ZipCache(str(tmp_path / "cache"))
+    # Come il server di download: stream consumato da un altro thread, senza traccia del rerun
+    chunks = []
+    thread = threading.Thread(target=lambda: chunks.extend(cache.stream([str(tmp_path / "a.pdf")])))
+    thread.start()
+    thread.join()
+    with zipfile.ZipFile(BytesIO(b"".join(chunks))) as archive:
+        assert archive.namelist() == ["a.pdf"]
+    text = metrics.METRICS.prometheus_text()
+    assert 'suppliers_span_duration_seconds_count{span="create_zip"} 1' in text
+    assert f'suppliers_span_bytes_total{{span="create_zip"}} {len(b"".join(chunks))}' in text
+
+
+def test_uncounted_cache_lookups_do_not_change_the_hit_ratio():
+    cache = QueryCache()
+    cache.get_or_compute("filtri", lambda: [1, 2])
+    assert cache.get_or_compute("filtri", lambda: [], count=False) == [1, 2]
+    cache.get_or_compute("altri", lambda: [3], count=False)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (0, 1, 2)
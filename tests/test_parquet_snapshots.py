@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from synthetic import make_supplier
+from toolkit.columns import ColumnIndex
+from toolkit.journal import SupplierJournal
+from toolkit.parquet_snapshots import (convert_json_to_parquet, query_parquet, read_parquet, read_parquet_row,
+                                       record_count, write_parquet)
+from toolkit.range_index import SortedRangeIndex
+from toolkit.search import advanced_filter_ids
+from toolkit.store import SQLiteSupplierStore
+from toolkit.units import supplier_delivery_days, supplier_price_base
+
+# Filtri del modulo di ricerca avanzata, prima della normalizzazione
+FILTERS = [
+    {},
+    {"quality_min": 3},
+    {"price_min": 100, "price_max": 2000, "price_currency": "EUR"},
+    {"price_max": 1000, "price_currency": "USD", "reliability_min": 2},
+    {"delivery_times_max": 3, "delivery_unit": "settimane"},
+    {"category": ["Fotovoltaico", "Clima"], "quality_max": 4},
+    {"name": "sol", "email": ".it"},
+]
+
+
+@pytest.fixture
+def suppliers():
+    rng = random.Random(11)
+    return [make_supplier(rng) for _ in range(300)]
+
+
+def test_roundtrip_in_row_groups(tmp_path, suppliers):
+    path = str(tmp_path / "fornitori.parquet")
+    assert write_parquet(suppliers, path, row_group_size=64) == 300
+    assert record_count(path) == 300
+    progress = []
+    assert read_parquet(path, progress=lambda done, total, count: progress.append((done, total))) == suppliers
+    assert progress[-1] == (5, 5)
+    assert read_parquet(path, fields=["name"], limit=2) == [{"name": supplier["name"]} for supplier in suppliers[:2]]
+    assert read_parquet_row(path, 42) == suppliers[42]
+    assert read_parquet_row(path, 300) is None
+
+
+def test_empty_snapshot(tmp_path):
+    path = str(tmp_path / "vuoto.parquet")
+    assert write_parquet([], path) == 0
+    assert read_parquet(path) == []
+    assert len(query_parquet(path, {"quality_min": 1})) == 0
+
+
+def test_convert_includes_journal(tmp_path, suppliers):
+    json_path = str(tmp_path / "fornitori.json")
+    journal = SupplierJournal(json_path)
+    journal.write_snapshot(suppliers[:10])
+    journal.append_add(suppliers[10])
+    parquet_path, count = convert_json_to_parquet(json_path)
+    assert parquet_path == str(tmp_path / "fornitori.parquet")
+    assert count == 11
+    assert read_parquet(parquet_path) == suppliers[:11]
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_query_matches_the_in_memory_search(tmp_path, suppliers, filters):
+    path = str(tmp_path / "fornitori.parquet")
+    write_parquet(suppliers, path, row_group_size=50)
+    store = SQLiteSupplierStore()
+    store.attach_index("columns", ColumnIndex())
+    store.attach_index("price_base", SortedRangeIndex(supplier_price_base))
+    store.attach_index("delivery_days", SortedRangeIndex(supplier_delivery_days))
+    ids = store.replace_all(suppliers)
+    positions = {supplier_id: position for position, supplier_id in enumerate(ids)}
+
+    expected = sorted(positions[supplier_id] for supplier_id in advanced_filter_ids(store, filters))
+    table = query_parquet(path, filters)
+    assert table.column("id").to_pylist() == expected
+    assert table.column("name").to_pylist() == [suppliers[position]["name"] for position in expected]
@@ -0,0 +1,48 @@
+from toolkit.query_cache import QueryCache, filters_key
+from toolkit.store import SQLiteSupplierStore
+
+
+def test_equivalent_filters_share_a_key():
+    assert filters_key({"name": "Rossi", "category": ["B", "A"], "quality_min": 0}) == \
+        filters_key({"name": "rossi", "category": ["A", "B"], "email": ""})
+    assert filters_key({"delivery_times_max": 1, "delivery_unit": "settimane"}) == \
+        filters_key({"delivery_times_max": 7, "delivery_unit": "giorni"})
+    assert filters_key({"quality_min": 3}) != filters_key({"quality_min": 4})
+
+
+def test_store_writes_invalidate_cached_results():
+    cache = QueryCache()
+    store = SQLiteSupplierStore()
+    store.add({"name": "A"})
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return store.ids()
+
+    filters = {"name": "a"}
+    assert cache.get_or_compute(cache.key(store, filters), compute) == [1]
+    assert cache.get_or_compute(cache.key(store, {"name": "A"}), compute) == [1]
+    assert len(calls) == 1
+    # Stessi filtri in un'altra modalità o su un altro archivio: risultati distinti
+    assert cache.key(store, filters, "fuzzy") != cache.key(store, filters)
+    assert cache.key(SQLiteSupplierStore(), filters) != cache.key(store, filters)
+
+    store.add({"name": "AB"})
+    assert cache.get_or_compute(cache.key(store, filters), compute) == [1, 2]
+    assert len(calls) == 2
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = QueryCache(max_entries=2)
+    for key in ("a", "b"):
+        cache.get_or_compute(key, lambda: key)
+    cache.get_or_compute("a", lambda: "nuovo")
+    cache.get_or_compute("c", lambda: "c")
+    assert cache.get_or_compute("a", lambda: "nuovo") == "a"
+    assert cache.get_or_compute("b", lambda: "nuovo") == "nuovo"
+    stats = cache.stats()
+    assert stats["evictions"] == 2
+    assert stats["entries"] == 2
+    assert stats["hit_ratio"] == 2 / 6
@@ -0,0 +1,37 @@
+import math
+
+from synthetic import run_operations
+from toolkit import range_index
+from toolkit.range_index import SortedRangeIndex
+from toolkit.units import supplier_delivery_days
+
+
+def test_sorted_range_index_matches_linear_scan(monkeypatch):
+    monkeypatch.setattr(range_index, "PENDING_LIMIT", 8)
+    index = SortedRangeIndex(supplier_delivery_days)
+
+    def check(suppliers, rng):
+        low = rng.choice([None, rng.randint(0, 60)])
+        high = rng.choice([None, rng.randint(0, 200)])
+        expected = set()
+        for supplier_id, supplier in suppliers.items():
+            days = supplier_delivery_days(supplier)
+            if math.isnan(days):
+                continue
+            if (low is None or days >= low) and (high is None or days <= high):
+                expected.add(supplier_id)
+        assert index.range_ids(low, high) == expected
+        assert len(index) == sum(not math.isnan(supplier_delivery_days(s)) for s in suppliers.values())
+
+    run_operations(index, check)
+
+
+def test_sorted_range_index_update_keeps_single_entry():
+    index = SortedRangeIndex(lambda supplier: supplier["value"])
+    index.add(1, {"value": 5})
+    index.add(1, {"value": 9})
+    index.add(1, {"value": 5})
+    assert index.range_ids(0, 10) == {1}
+    assert index.range_ids(8, 10) == set()
+    index.remove(1, {"value": 5})
+    assert index.range_ids() == set()
@@ -0,0 +1,48 @@
+from toolkit.reports import ReportRenderer, install_template, supplier_fingerprint
+
+
+def make_renderer(tmp_path, source="<h1>{{ name }}</h1>", **options):
+    template_dir = tmp_path / "templates"
+    template_dir.mkdir(exist_ok=True)
+    install_template(str(template_dir / "report.html"), source)
+    return ReportRenderer(str(template_dir), "report.html", str(tmp_path / "cache"), **options)
+
+
+def test_install_template_writes_only_changes(tmp_path):
+    path = str(tmp_path / "report.html")
+    assert install_template(path, "a")
+    assert not install_template(path, "a")
+    assert install_template(path, "b")
+
+
+def test_fingerprint_ignores_key_order():
+    assert supplier_fingerprint({"a": 1, "b": 2}) == supplier_fingerprint({"b": 2, "a": 1})
+    assert supplier_fingerprint({"a": 1}) != supplier_fingerprint({"a": 2})
+
+
+def test_render_is_cached_per_supplier_version(tmp_path):
+    renderer = make_renderer(tmp_path)
+    assert renderer.render({"name": "A"}, 1) == "<h1>A</h1>"
+    assert renderer.render({"name": "A"}, 1) == "<h1>A</h1>"
+    assert (renderer.hits, renderer.misses) == (1, 1)
+    # Un record modificato o un altro fornitore con lo stesso contenuto vengono renderizzati di nuovo
+    assert renderer.render({"name": "B"}, 1) == "<h1>B</h1>"
+    renderer.render({"name": "A"}, 2)
+    assert renderer.misses == 3
+
+
+def test_oldest_reports_are_evicted(tmp_path):
+    renderer = make_renderer(tmp_path, max_entries=2)
+    for supplier_id in range(3):
+        renderer.render({"name": str(supplier_id)}, supplier_id)
+    renderer.render({"name": "0"}, 0)
+    assert renderer.misses == 4
+
+
+def test_reset_picks_up_a_changed_template(tmp_path):
+    renderer = make_renderer(tmp_path)
+    renderer.render({"name": "A"}, 1)
+    install_template(str(tmp_path / "templates" / "report.html"), "<p>{{ name }}</p>")
+    assert renderer.render({"name": "A"}, 1) == "<h1>A</h1>"
+    renderer.reset()
+    assert renderer.render({"name": "A"}, 1) == "<p>A</p>"
@@ -0,0 +1,39 @@
+import pyarrow as pa
+
+from toolkit.results import page_count, page_ids, results_page, table_page, with_scores
+from toolkit.store import SQLiteSupplierStore
+
+
+def test_page_count_and_ids():
+    assert page_count(0, 25) == 1
+    assert page_count(51, 25) == 3
+    ids = list(range(60))
+    assert page_ids(ids, 3, 25) == list(range(50, 60))
+    assert page_ids(ids, 4, 25) == []
+
+
+def test_results_page_reads_only_the_page():
+    store = SQLiteSupplierStore()
+    ids = [store.add({"name": f"F{i}", "quality": i, "category": ["Solare", "Clima"], "notes": "x" * 1000})
+           for i in range(5)]
+    table = results_page(store, ids[::-1], 2, 2)
+    assert table.column("id").to_pylist() == [ids[2], ids[1]]
+    assert table.column("name").to_pylist() == ["F2", "F1"]
+    assert table.column("category").to_pylist() == ["Solare, Clima"] * 2
+    assert table.schema.field("quality").type == pa.int64()
+    assert "notes" not in table.column_names
+
+
+def test_mixed_types_fall_back_to_text():
+    store = SQLiteSupplierStore()
+    ids = [store.add({"name": "A", "quality": 3}), store.add({"name": "B", "quality": "buona"})]
+    table = results_page(store, ids, 1, 25)
+    assert table.column("quality").to_pylist() == ["3", "buona"]
+
+
+def test_scores_and_table_page():
+    table = pa.table({"id": [1, 2, 3], "category": [["a", "b"], [], ["c"]]})
+    assert with_scores(table, {1: 0.5, 3: 0.25}).column("similarity").to_pylist() == [0.5, None, 0.25]
+    page = table_page(table, 1, 2)
+    assert page.column("id").to_pylist() == [1, 2]
+    assert page.column("category").to_pylist() == ["a, b", ""]
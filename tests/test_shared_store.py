@@ -0,0 +1,54 @@
+import threading
+import time
+
+from toolkit.shared_store import SharedStores
+from toolkit.store import SQLiteSupplierStore
+
+
+def test_file_is_loaded_once_and_shared(tmp_path):
+    calls = []
+
+    def loader(file_path):
+        calls.append(file_path)
+        time.sleep(0.05)
+        return [{"name": "A"}, {"name": "B"}]
+
+    stores = SharedStores(SQLiteSupplierStore)
+    path = str(tmp_path / "fornitori.json")
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(stores.get(path, loader))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert all(store is results[0] for store in results)
+    # Lo stesso file indicato con un percorso relativo diverso usa lo stesso archivio
+    assert stores.get(str(tmp_path / "." / "fornitori.json"), loader) is results[0]
+    assert stores.loaded(path)
+
+
+def test_writes_are_visible_to_every_session(tmp_path):
+    stores = SharedStores(SQLiteSupplierStore)
+    path = str(tmp_path / "fornitori.json")
+    first = stores.get(path, lambda file_path: [{"name": "A"}])
+    version = first.version
+    stores.get(path, lambda file_path: []).add({"name": "B"})
+    assert [supplier["name"] for supplier in first.all()] == ["A", "B"]
+    assert first.version > version
+
+    assert stores.replace(path, [{"name": "C"}]) is first
+    assert first.all() == [{"name": "C"}]
+
+
+def test_discarded_file_is_reloaded(tmp_path):
+    stores = SharedStores(SQLiteSupplierStore)
+    path = str(tmp_path / "fornitori.json")
+    old = stores.get(path, lambda file_path: [{"name": "A"}])
+    stores.discard(path)
+    assert not stores.loaded(path)
+    new = stores.get(path, lambda file_path: [{"name": "Nuovo"}])
+    assert new is not old
+    assert new.all() == [{"name": "Nuovo"}]
+    # Chi stava ancora leggendo il vecchio archivio non viene interrotto
+    assert old.all() == [{"name": "A"}]
@@ -0,0 +1,82 @@
+import json
+import os
+import time
+
+from toolkit.parquet_snapshots import write_parquet
+from toolkit.snapshot_catalog import SnapshotCatalog, count_records
+
+
+def write_json(path, count):
+    path.write_text(json.dumps([{"name": str(i)} for i in range(count)]), encoding="utf-8")
+    return str(path)
+
+
+def wait_until(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.02)
+
+
+def records(catalog):
+    return {entry["name"]: entry["records"] for entry in catalog.entries()}
+
+
+def test_count_records(tmp_path):
+    assert count_records(write_json(tmp_path / "a.json", 3)) == 3
+    write_parquet([{"name": "A"}, {"name": "B"}], str(tmp_path / "b.parquet"))
+    assert count_records(str(tmp_path / "b.parquet")) == 2
+    (tmp_path / "rotto.json").write_text("[{", encoding="utf-8")
+    assert count_records(str(tmp_path / "rotto.json")) is None
+
+
+def test_catalog_lists_snapshots_and_counts_in_background(tmp_path):
+    write_json(tmp_path / "a.json", 3)
+    write_parquet([{"name": "A"}], str(tmp_path / "b.parquet"))
+    (tmp_path / "note.txt").write_text("x", encoding="utf-8")
+    catalog = SnapshotCatalog(str(tmp_path))
+    try:
+        assert catalog.names() == ["a.json", "b.parquet"]
+        wait_until(lambda: records(catalog) == {"a.json": 3, "b.parquet": 1})
+    finally:
+        catalog.stop()
+
+
+def test_refresh_notifies_only_changed_files(tmp_path):
+    path = write_json(tmp_path / "a.json", 1)
+    catalog = SnapshotCatalog(str(tmp_path))
+    changed = []
+    catalog.subscribe(changed.append)
+    try:
+        catalog.refresh(path)
+        assert changed == []
+        write_json(tmp_path / "a.json", 4)
+        version = catalog.version
+        catalog.refresh(path)
+        assert changed == [path]
+        assert catalog.version > version
+        wait_until(lambda: records(catalog) == {"a.json": 4})
+
+        os.remove(path)
+        catalog.refresh(path)
+        assert changed == [path, path]
+        assert catalog.names() == []
+        # File di altre cartelle o di altro tipo vengono ignorati
+        catalog.refresh(str(tmp_path / "altro.txt"))
+        catalog.refresh(os.path.join(os.path.dirname(str(tmp_path)), "x.json"))
+        assert changed == [path, path]
+    finally:
+        catalog.stop()
+
+
+def test_watcher_picks_up_new_files(tmp_path):
+    catalog = SnapshotCatalog(str(tmp_path))
+    changed = []
+    catalog.subscribe(changed.append)
+    catalog.start()
+    try:
+        path = write_json(tmp_path / "nuovo.json", 2)
+        wait_until(lambda: path in changed)
+        assert catalog.names() == ["nuovo.json"]
+    finally:
+        catalog.stop()
@@ -0,0 +1,51 @@
+import json
+
+from toolkit.journal import SupplierJournal
+from toolkit.snapshot_diff import diff_snapshots, merge_snapshots
+
+
+def write_snapshot(path, suppliers):
+    SupplierJournal(str(path)).write_snapshot(suppliers)
+    return str(path)
+
+
+def test_diff_reports_added_removed_and_changed(tmp_path):
+    base = write_snapshot(tmp_path / "a.json", [
+        {"name": "Rossi", "email": "r@x.it", "quality": 3},
+        {"name": "Bianchi", "email": "b@x.it"},
+        {"name": "Rossi", "email": "r@x.it", "quality": 1},
+    ])
+    other = write_snapshot(tmp_path / "b.json", [
+        {"name": " ROSSI ", "email": "R@x.it", "quality": 3},
+        {"name": "Rossi", "email": "r@x.it", "quality": 2},
+        {"name": "Verdi", "email": "v@x.it"},
+    ])
+    diff = diff_snapshots(base, other)
+    assert diff["added"] == [{"name": "Verdi", "email": "v@x.it"}]
+    assert diff["removed"] == [{"name": "Bianchi", "email": "b@x.it"}]
+    # I fornitori omonimi vengono confrontati nell'ordine in cui compaiono
+    assert [(change["occurrence"], change["fields"]) for change in diff["changed"]] == [
+        (1, {"email": ["r@x.it", "R@x.it"], "name": ["Rossi", " ROSSI "]}),
+        (2, {"quality": [1, 2]}),
+    ]
+    assert diff["unchanged"] == 0
+
+
+def test_diff_includes_journal_appends(tmp_path):
+    base = write_snapshot(tmp_path / "a.json", [{"name": "A"}])
+    other = write_snapshot(tmp_path / "b.json", [{"name": "A"}])
+    SupplierJournal(other).append_add({"name": "B"})
+    diff = diff_snapshots(base, other)
+    assert diff["added"] == [{"name": "B"}]
+    assert diff["unchanged"] == 1
+
+
+def test_merge_applies_selected_changes(tmp_path):
+    target = write_snapshot(tmp_path / "target.json", [{"name": "A", "quality": 1}, {"name": "B"}])
+    source = write_snapshot(tmp_path / "source.json", [{"name": "A", "quality": 5}, {"name": "C"}])
+    assert merge_snapshots(target, source) == {"added": 1, "changed": 1, "removed": 0}
+    with open(target, encoding="utf-8") as f:
+        assert json.load(f) == [{"name": "A", "quality": 5}, {"name": "B"}, {"name": "C"}]
+
+    assert merge_snapshots(target, source, apply=("removed",)) == {"added": 0, "changed": 0, "removed": 1}
+    assert SupplierJournal(target).load() == [{"name": "A", "quality": 5}, {"name": "C"}]
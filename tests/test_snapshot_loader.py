@@ -0,0 +1,65 @@
+import json
+import random
+from io import BytesIO
+
+import pytest
+
+from toolkit import snapshot_loader
+from toolkit.snapshot_loader import _iter_stdlib, iter_suppliers, load_snapshot
+
+from synthetic import make_supplier
+
+
+def decode(text, chunk_size=7):
+    return list(_iter_stdlib(BytesIO(text.encode("utf-8")), chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64, 1 << 20])
+def test_stdlib_decoder_matches_json_load(chunk_size):
+    rng = random.Random(3)
+    records = [make_supplier(rng) for _ in range(20)] + [12345, "città", None, [1, 2.5], {}]
+    text = "\ufeff[\n  " + ",\n  ".join(json.dumps(record, ensure_ascii=False) for record in records) + "\n]\n"
+    assert decode(text, chunk_size) == json.loads(text.lstrip("\ufeff"))
+
+
+@pytest.mark.parametrize("text", ["[", '[{"name": "A"}', '[{"name": "A"},', '[{"name": "A"}, {"na', "[,,]",
+                                  "[1,,2]", "[1,]", "[1 2]", "[,1]"])
+def test_stdlib_decoder_rejects_malformed_arrays(text):
+    with pytest.raises(json.JSONDecodeError):
+        decode(text, chunk_size=2)
+
+
+def test_stdlib_decoder_requires_an_array():
+    with pytest.raises(ValueError):
+        decode("")
+    with pytest.raises(ValueError):
+        decode('{"name": "A"}')
+    assert decode(" [ ] ") == []
+
+
+@pytest.mark.parametrize("use_ijson", [False, True])
+def test_iter_suppliers_fields_limit_and_progress(tmp_path, monkeypatch, use_ijson):
+    if not use_ijson:
+        monkeypatch.setattr(snapshot_loader, "ijson", None)
+    elif snapshot_loader.ijson is None:
+        pytest.skip("ijson non installato")
+    path = tmp_path / "fornitori.json"
+    path.write_text(json.dumps([{"name": f"F{i}", "quality": i, "notes": "x"} for i in range(5)]), encoding="utf-8")
+    progress = []
+    records = list(iter_suppliers(str(path), fields=["name", "quality"], limit=3, chunk_size=16,
+                                  progress=lambda done, total, count: progress.append(count)))
+    assert records == [{"name": "F0", "quality": 0}, {"name": "F1", "quality": 1}, {"name": "F2", "quality": 2}]
+    assert progress == [1, 2, 3]
+    assert len(load_snapshot(str(path))) == 5
+
+
+@pytest.mark.parametrize("use_ijson", [False, True])
+def test_iter_suppliers_raises_decode_error_on_truncated_file(tmp_path, monkeypatch, use_ijson):
+    if not use_ijson:
+        monkeypatch.setattr(snapshot_loader, "ijson", None)
+    elif snapshot_loader.ijson is None:
+        pytest.skip("ijson non installato")
+    path = tmp_path / "fornitori.json"
+    path.write_text('[{"name": "A"}, {"name": "B"', encoding="utf-8")
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_suppliers(str(path)))
@@ -0,0 +1,72 @@
+import json
+import sqlite3
+
+from toolkit.store import SQLiteSupplierStore
+
+# Schema dei database creati prima della colonna numerica dei tempi di consegna
+OLD_SCHEMA = """
+CREATE TABLE suppliers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT,
+    email TEXT,
+    quality INTEGER,
+    reliability INTEGER,
+    price_money REAL,
+    price_stars INTEGER,
+    delivery_times TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE supplier_categories (
+    supplier_id INTEGER NOT NULL REFERENCES suppliers(id) ON DELETE CASCADE,
+    category TEXT NOT NULL
+);
+CREATE INDEX idx_suppliers_name ON suppliers(name COLLATE NOCASE);
+CREATE INDEX idx_suppliers_delivery_times ON suppliers(delivery_times);
+"""
+
+
+def test_add_update_and_project():
+    store = SQLiteSupplierStore()
+    first = store.add({"name": "A", "email": "a@x.it", "quality": 3, "notes": "lunghe note"})
+    second = store.add({"name": "B", "quality": 1})
+    store.update(first, {"name": "A2", "email": "a@x.it", "quality": 4})
+    assert store.get(first)["name"] == "A2"
+    assert store.get_many([second, 999, first]) == [{"name": "B", "quality": 1},
+                                                    {"name": "A2", "email": "a@x.it", "quality": 4}]
+    assert store.project([second, first], ["name", "email"]) == [
+        {"name": "B", "email": None, "id": second},
+        {"name": "A2", "email": "a@x.it", "id": first},
+    ]
+    assert store.ids() == [first, second]
+    assert store.count() == 2
+
+
+def test_replace_all_returns_new_ids():
+    store = SQLiteSupplierStore()
+    store.add({"name": "Vecchio"})
+    ids = store.replace_all([{"name": "A"}, {"name": "B"}])
+    assert [store.get(supplier_id)["name"] for supplier_id in ids] == ["A", "B"]
+    assert store.all() == [{"name": "A"}, {"name": "B"}]
+
+
+def test_database_without_delivery_days_is_migrated(tmp_path):
+    path = str(tmp_path / "fornitori.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(OLD_SCHEMA)
+    for supplier in ({"name": "A", "delivery_times": "2 settimane"}, {"name": "B", "delivery_times": "da concordare"}):
+        conn.execute("INSERT INTO suppliers (name, delivery_times, data) VALUES (?, ?, ?)",
+                     (supplier["name"], supplier["delivery_times"], json.dumps(supplier)))
+    conn.commit()
+    conn.close()
+
+    store = SQLiteSupplierStore(path)
+    rows = store._conn.execute("SELECT name, delivery_days FROM suppliers ORDER BY id").fetchall()
+    assert rows == [("A", 14.0), ("B", None)]
+    indexes = {row[0] for row in store._conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert not any(name.startswith("idx_suppliers_") for name in indexes)
+    # Le nuove scritture riempiono la colonna numerica
+    supplier_id = store.add({"name": "C", "delivery_times": "3 giorni"})
+    assert store._conn.execute("SELECT delivery_days FROM suppliers WHERE id = ?", (supplier_id,)).fetchone() == (3.0,)
+    store.close()
+    # Una seconda apertura non ripete la migrazione
+    assert SQLiteSupplierStore(path).count() == 3
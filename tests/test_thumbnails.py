@@ -0,0 +1,47 @@
+import os
+
+from PIL import Image
+
+from toolkit.thumbnails import THUMBNAIL_SIZE, ThumbnailPipeline, is_fresh, make_thumbnail, thumbnail_path
+
+
+def make_image(path, size=(1200, 800)):
+    Image.new("RGB", size, (200, 120, 40)).save(path)
+    return str(path)
+
+
+def test_make_thumbnail_fits_the_box_and_is_reused(tmp_path):
+    media_path = make_image(tmp_path / "foto.jpg")
+    thumbnails_dir = str(tmp_path / "thumbs")
+    thumb_path = make_thumbnail(media_path, thumbnails_dir)
+    assert thumb_path == thumbnail_path(media_path, thumbnails_dir)
+    with Image.open(thumb_path) as thumbnail:
+        assert thumbnail.width <= THUMBNAIL_SIZE[0] and thumbnail.height <= THUMBNAIL_SIZE[1]
+    assert is_fresh(media_path, thumb_path)
+    mtime = os.path.getmtime(thumb_path)
+    assert make_thumbnail(media_path, thumbnails_dir) == thumb_path
+    assert os.path.getmtime(thumb_path) == mtime
+
+
+def test_unreadable_image_has_no_thumbnail(tmp_path):
+    media_path = tmp_path / "rotta.png"
+    media_path.write_bytes(b"non un'immagine")
+    assert ThumbnailPipeline(str(tmp_path / "thumbs")).get(str(media_path)) is None
+
+
+def test_broken_pool_is_replaced(tmp_path):
+    media_path = make_image(tmp_path / "foto.png")
+    pipeline = ThumbnailPipeline(str(tmp_path / "thumbs"), max_workers=1)
+    try:
+        # Un processo del pool termina durante la generazione
+        broken = pipeline._pool()
+        pipeline._pending[media_path] = broken.submit(os._exit, 1)
+        assert pipeline.get(media_path) is None
+        assert pipeline._executor is None
+
+        futures = pipeline.submit([media_path])
+        assert pipeline._executor is not broken
+        assert futures[0].result(timeout=60) == thumbnail_path(media_path, pipeline.thumbnails_dir)
+        assert pipeline.get(media_path) == futures[0].result()
+    finally:
+        pipeline.shutdown()
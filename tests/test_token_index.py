@@ -0,0 +1,47 @@
+import pytest
+
+from synthetic import CATEGORIES, WORDS, run_operations
+from toolkit import token_index
+from toolkit.token_index import TokenIndex, matches_text, supplier_tokens, tokenize
+
+
+# Ricerca lineare equivalente a TokenIndex.search
+def linear_token_search(suppliers, query, categories, substring):
+    result = []
+    for supplier_id, supplier in suppliers.items():
+        tokens = supplier_tokens(supplier)
+        if substring:
+            found = all(any(part in token for token in tokens) for part in tokenize(query))
+        else:
+            found = all(any(token.startswith(part) for token in tokens) for part in tokenize(query))
+        if not (found and matches_text(supplier, query)):
+            continue
+        if categories and not set(categories) & set(supplier.get("category") or []):
+            continue
+        result.append(supplier_id)
+    return sorted(result)
+
+
+@pytest.mark.parametrize("substring", [False, True])
+def test_token_index_matches_linear_scan(monkeypatch, substring):
+    # Limite basso per esercitare anche il merge dei token nuovi nella lista ordinata
+    monkeypatch.setattr(token_index, "PENDING_LIMIT", 5)
+    index = TokenIndex()
+
+    def check(suppliers, rng):
+        query = rng.choice(["", rng.choice(WORDS), rng.choice(WORDS)[:2], rng.choice(WORDS)[1:4], "ss", "@",
+                            f"{rng.choice(WORDS)}.", "example"])
+        categories = rng.sample(CATEGORIES, rng.randint(0, 2))
+        assert index.search(query, categories, substring=substring) == \
+            linear_token_search(suppliers, query, categories, substring)
+        assert len(index) == len(suppliers)
+
+    run_operations(index, check)
+
+
+def test_token_index_clear():
+    index = TokenIndex()
+    index.add(1, {"name": "Solare Rossi", "email": "info@rossi.it"})
+    index.clear()
+    assert index.search("rossi") == []
+    assert index.fragment_ids("oss") == set()
@@ -0,0 +1,39 @@
+import math
+
+import pytest
+
+from synthetic import WORDS, run_operations
+from toolkit.trigram_index import FUZZY_FIELDS, TrigramIndex, trigrams
+
+
+# Somiglianze attese per TrigramIndex.search(limit=None): quota dei trigrammi della query nel campo migliore
+def linear_trigram_scores(suppliers, query, threshold, fields):
+    query_grams = trigrams(query)
+    min_overlap = max(math.ceil(threshold * len(query_grams)), 1)
+    scores = {}
+    for supplier_id, supplier in suppliers.items():
+        for field in fields:
+            grams = trigrams(supplier.get(field) or "")
+            overlap = len(query_grams & grams)
+            if grams and overlap >= min_overlap:
+                scores[supplier_id] = max(scores.get(supplier_id, 0), round(overlap / len(query_grams), 3))
+    return scores
+
+
+@pytest.mark.parametrize("threshold", [0.3, 0.6, 1.0])
+def test_trigram_index_matches_linear_scan(threshold):
+    index = TrigramIndex()
+
+    def check(suppliers, rng):
+        query = rng.choice([rng.choice(WORDS), " ".join(rng.sample(WORDS, 2)), "solre", "bianki", "lce"])
+        fields = rng.choice([None, ["name"], ["email", "website"]])
+        expected = linear_trigram_scores(suppliers, query, threshold, fields or FUZZY_FIELDS)
+        results = index.search(query, limit=None, threshold=threshold, fields=fields)
+        assert dict(results) == expected
+        assert [score for _, score in results] == sorted(expected.values(), reverse=True)
+        # Con un limite i primi risultati hanno le somiglianze più alte
+        limited = index.search(query, limit=5, threshold=threshold, fields=fields)
+        assert [score for _, score in limited] == sorted(expected.values(), reverse=True)[:5]
+        assert len(index) == len(suppliers)
+
+    run_operations(index, check, steps=200)
@@ -0,0 +1,54 @@
+import hashlib
+import os
+from io import BytesIO
+
+import pytest
+
+from toolkit.blobs import BlobStore
+from toolkit.uploads import store_upload
+
+
+# Oggetto con la stessa interfaccia dei file caricati di Streamlit
+class Upload(BytesIO):
+    def __init__(self, name, content):
+        super().__init__(content)
+        self.name = name
+        self.size = len(content)
+
+
+class FailingUpload(Upload):
+    def read(self, size=-1):
+        if self.tell():
+            raise OSError("connessione interrotta")
+        return super().read(size)
+
+
+def test_store_upload_copies_in_chunks_and_hashes(tmp_path):
+    content = os.urandom(10000)
+    upload = Upload("foto.jpg", content)
+    upload.read(10)
+    stored = store_upload(upload, str(tmp_path / "media"), chunk_size=1024)
+    assert stored.path == str(tmp_path / "media" / "foto.jpg")
+    assert stored.sha256 == hashlib.sha256(content).hexdigest()
+    assert stored.size == len(content)
+    with open(stored.path, "rb") as f:
+        assert f.read() == content
+
+
+def test_interrupted_upload_leaves_no_file(tmp_path):
+    with pytest.raises(OSError):
+        store_upload(FailingUpload("video.mp4", os.urandom(5000)), str(tmp_path), chunk_size=1024)
+    assert os.listdir(tmp_path) == []
+
+
+def test_parallel_uploads_keep_order_and_share_content(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    uploads = [Upload("a.jpg", b"uno"), Upload("b.pdf", b"due"), Upload("c.jpg", b"uno"), Upload("d.txt", b"tre")]
+    paths = store.put_uploads(uploads, max_workers=3)
+    assert [os.path.splitext(path)[1] for path in paths] == [".jpg", ".pdf", ".jpg", ".txt"]
+    assert paths[0] == paths[2]
+    assert len(set(paths)) == 3
+    assert store.stats()["blobs"] == 3
+    assert os.listdir(tmp_path / "blobs" / "staging") == []
+    # L'indice scritto alla fine contiene tutti i blob
+    assert BlobStore(str(tmp_path / "blobs")).stats()["blobs"] == 3
@@ -0,0 +1,96 @@
+import os
+import time
+import zipfile
+from io import BytesIO
+
+from toolkit.zip_cache import ZipCache
+
+
+def make_files(directory, count, size=2000):
+    paths = []
+    for i in range(count):
+        path = directory / f"file{i}.bin"
+        path.write_bytes(os.urandom(size))
+        paths.append(str(path))
+    return paths
+
+
+def cached_archives(cache):
+    return sorted(entry.name for entry in os.scandir(cache.directory) if entry.name.endswith(".zip"))
+
+
+def test_hit_after_miss_returns_same_archive(tmp_path):
+    cache = ZipCache(str(tmp_path / "cache"))
+    paths = make_files(tmp_path, 2)
+    first = cache.read(paths)
+    second = cache.read(paths)
+    assert first == second
+    assert (cache.hits, cache.misses) == (1, 1)
+    with zipfile.ZipFile(BytesIO(first)) as archive:
+        assert sorted(archive.namelist()) == ["file0.bin", "file1.bin"]
+
+
+def test_changed_file_is_a_new_key(tmp_path):
+    cache = ZipCache(str(tmp_path / "cache"))
+    paths = make_files(tmp_path, 1)
+    key = cache.key(paths)
+    with open(paths[0], "ab") as f:
+        f.write(b"x")
+    assert cache.key(paths) != key
+
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    paths = make_files(tmp_path, 3)
+    cache = ZipCache(str(tmp_path / "cache"), max_bytes=10 ** 9)
+    first, second, third = [[path] for path in paths]
+    cache.read(first)
+    cache.read(second)
+    archive_size = os.path.getsize(cache.path_for(cache.key(first)))
+    # Il primo archivio viene usato di nuovo: il meno recente diventa il secondo
+    old = time.time() - 100
+    os.utime(cache.path_for(cache.key(second)), (old, old))
+    os.utime(cache.path_for(cache.key(first)), (old - 100, old - 100))
+    cache.read(first)
+
+    cache.max_bytes = 2 * archive_size + archive_size // 2
+    cache.read(third)
+    assert cached_archives(cache) == sorted(os.path.basename(cache.path_for(cache.key(files)))
+                                            for files in (first, third))
+    assert cache.evictions == 1
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_archive_larger_than_budget_is_still_returned(tmp_path):
+    cache = ZipCache(str(tmp_path / "cache"), max_bytes=100)
+    paths = make_files(tmp_path, 1, size=5000)
+    content = cache.read(paths)
+    with zipfile.ZipFile(BytesIO(content)) as archive:
+        assert archive.namelist() == ["file0.bin"]
+    assert cached_archives(cache) == []
+    assert cache.stats()["evictions"] == 1
+
+
+def test_interrupted_stream_leaves_no_partial_archive(tmp_path):
+    cache = ZipCache(str(tmp_path / "cache"))
+    paths = make_files(tmp_path, 2, size=200000)
+    blocks = cache.stream(paths, chunk_size=1024)
+    next(blocks)
+    blocks.close()
+    assert os.listdir(cache.directory) == []
+    assert cache.read(paths)
+
+
+def test_concurrent_misses_leave_one_valid_archive(tmp_path):
+    cache = ZipCache(str(tmp_path / "cache"))
+    paths = make_files(tmp_path, 3, size=100000)
+    first, second = cache.stream(paths, chunk_size=4096), cache.stream(paths, chunk_size=4096)
+    # Due download dello stesso insieme di file generati in parallelo
+    blocks_first, blocks_second = [next(first)], [next(second)]
+    blocks_first.extend(first)
+    blocks_second.extend(second)
+    assert b"".join(blocks_first) == b"".join(blocks_second)
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert len(cached_archives(cache)) == 1
+    assert [name for name in os.listdir(cache.directory) if name.endswith(".part")] == []
+    assert cache.read(paths) == b"".join(blocks_first)
+    assert cache.hits == 1
@@ -0,0 +1,29 @@
+import os
+import zipfile
+from io import BytesIO
+
+from toolkit.zipstream import iter_zip, zip_entries
+
+
+def test_zip_entries_renames_duplicates():
+    entries = zip_entries(["a/foto.jpg", "b/foto.jpg", ("c/x.pdf", "listino.pdf"), ("d/y.pdf", "listino.pdf")])
+    assert [arcname for _, arcname in entries] == ["foto.jpg", "foto (2).jpg", "listino.pdf", "listino (2).pdf"]
+
+
+def test_iter_zip_streams_a_valid_archive_in_blocks(tmp_path):
+    contents = {"uno.bin": os.urandom(50000), "due.txt": b"testo " * 1000}
+    paths = []
+    for name, content in contents.items():
+        (tmp_path / name).write_bytes(content)
+        paths.append(str(tmp_path / name))
+
+    blocks = list(iter_zip(paths, chunk_size=4096))
+    assert len(blocks) > 2
+    with zipfile.ZipFile(BytesIO(b"".join(blocks))) as archive:
+        assert archive.testzip() is None
+        assert {name: archive.read(name) for name in archive.namelist()} == contents
+
+
+def test_iter_zip_of_no_files_is_an_empty_archive():
+    with zipfile.ZipFile(BytesIO(b"".join(iter_zip([])))) as archive:
+        assert archive.namelist() == []
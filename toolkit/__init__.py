@@ -0,0 +1 @@
+# Moduli di supporto per la gestione dei fornitori (archiviazione, indici, report)
@@ -0,0 +1,128 @@
+import html
+import multiprocessing
+import os
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from jinja2 import Environment, FileSystemLoader
+
+from toolkit.zipstream import ChunkSink
+
+# Numero di report renderizzati da ciascun processo per ogni richiesta
+EXPORT_CHUNK_SIZE = 50
+
+_worker_template = None
+
+
+def _init_worker(template_dir, template_name):
+    global _worker_template
+    environment = Environment(loader=FileSystemLoader(template_dir), auto_reload=False)
+    _worker_template = environment.get_template(template_name)
+
+
+# Funzione eseguita nei processi del pool: renderizza un blocco di fornitori
+def render_chunk(chunk):
+    return [(supplier_id, _worker_template.render(supplier).encode("utf-8")) for supplier_id, supplier in chunk]
+
+
+# Nome del file di un report dentro l'archivio
+def report_file_name(supplier_id, supplier):
+    slug = re.sub(r"[^\w-]+", "_", str(supplier.get("name", "")), flags=re.UNICODE).strip("_")[:60]
+    return f"reports/{supplier_id:06d}_{slug or 'fornitore'}.html"
+
+
+# Pagina indice dell'archivio con il collegamento a ciascun report
+def render_index(rows):
+    lines = [
+        "<!DOCTYPE html>",
+        '<html lang="it"><head><meta charset="UTF-8"><title>Report Fornitori</title>',
+        "<style>body{font-family:Arial,sans-serif;margin:20px}table{border-collapse:collapse;width:100%}"
+        "th,td{border:1px solid #ddd;padding:6px;text-align:left}th{background:#f2f2f2}</style>",
+        "</head><body>",
+        f"<h1>Report Fornitori ({len(rows)})</h1>",
+        "<table><tr><th>ID</th><th>Nome</th><th>Email</th><th>Categorie</th></tr>",
+    ]
+    for supplier_id, supplier, file_name in rows:
+        lines.append(
+            f'<tr><td>{supplier_id}</td><td><a href="{html.escape(file_name)}">'
+            f'{html.escape(str(supplier.get("name", "")))}</a></td>'
+            f'<td>{html.escape(str(supplier.get("email", "")))}</td>'
+            f'<td>{html.escape(", ".join(supplier.get("category") or []))}</td></tr>'
+        )
+    lines.append("</table></body></html>")
+    return "\n".join(lines).encode("utf-8")
+
+
+def _chunks(items, chunk_size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# Renderizza i report in un pool di processi mantenendo l'ordine e un numero limitato di blocchi in corso
+# (processi avviati con "spawn", come per le miniature: niente fork del server Streamlit)
+def iter_rendered(items, template_dir, template_name, max_workers=None, chunk_size=EXPORT_CHUNK_SIZE):
+    chunks = _chunks(items, chunk_size)
+    if max_workers == 1:
+        _init_worker(template_dir, template_name)
+        for chunk in chunks:
+            yield from render_chunk(chunk)
+        return
+    workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(template_dir, template_name)) as executor:
+        window = 2 * workers
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(render_chunk, chunk))
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+# Funzione per generare in streaming lo zip con tutti i report e la pagina indice
+# items: coppie (id, fornitore); progress(fatti, totale) viene chiamata dopo ogni report
+def iter_report_zip(items, template_dir, template_name, max_workers=None, chunk_size=EXPORT_CHUNK_SIZE,
+                    progress=None):
+    items = list(items)
+    suppliers = dict(items)
+    total = len(items)
+    rows = []
+    sink = ChunkSink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        rendered = iter_rendered(items, template_dir, template_name, max_workers, chunk_size)
+        for done, (supplier_id, body) in enumerate(rendered, start=1):
+            file_name = report_file_name(supplier_id, suppliers[supplier_id])
+            zip_file.writestr(file_name, body)
+            rows.append((supplier_id, suppliers[supplier_id], file_name))
+            if progress is not None:
+                progress(done, total)
+            data = sink.drain()
+            if data:
+                yield data
+        zip_file.writestr("index.html", render_index(rows))
+    data = sink.drain()
+    if data:
+        yield data
+
+
+# Funzione per scrivere l'esportazione su file (tramite file temporaneo e rinomina atomica)
+def export_reports(items, target_path, template_dir, template_name, max_workers=None,
+                   chunk_size=EXPORT_CHUNK_SIZE, progress=None):
+    os.makedirs(os.path.dirname(target_path) or ".", exist_ok=True)
+    temp_path = f"{target_path}.part"
+    written = 0
+    with open(temp_path, "wb") as f:
+        for block in iter_report_zip(items, template_dir, template_name, max_workers, chunk_size, progress):
+            f.write(block)
+            written += len(block)
+    os.replace(temp_path, target_path)
+    return written
@@ -0,0 +1,307 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from toolkit.journal import get_journal
+from toolkit.uploads import UPLOAD_WORKERS, store_upload
+from toolkit.zip_cache import file_sha256
+
+# Nome del file indice (hash -> percorso e dimensione) nella cartella dei blob
+INDEX_FILE = "index.json"
+
+# Campi del fornitore che contengono percorsi di file
+FILE_FIELDS = ("media", "documents")
+
+# Un blob senza riferimenti viene conservato per questo tempo (secondi) dalla sua ultima modifica:
+# copre i file caricati da sessioni che non hanno ancora salvato i fornitori in un file
+COLLECT_GRACE_SECONDS = 7 * 24 * 3600
+
+
+def supplier_file_paths(supplier):
+    return [path for field in FILE_FIELDS for path in supplier.get(field) or []]
+
+
+# Riferimenti ai blob contenuti in un file fornitori (JSON con il suo journal, oppure Parquet)
+def snapshot_references(snapshot_path):
+    if snapshot_path.endswith(".parquet"):
+        # Import differito come per le altre letture Parquet
+        from toolkit.parquet_snapshots import read_parquet
+        return read_parquet(snapshot_path, fields=list(FILE_FIELDS)) if os.path.exists(snapshot_path) else []
+    return dict(get_journal(snapshot_path).iter_records()).values()
+
+
+# Archivio dei file indicizzato per contenuto (SHA-256) con conteggio dei riferimenti
+# Ogni contenuto è salvato una sola volta in <cartella>/<hash[:2]>/<hash><estensione>.
+# I riferimenti sono quelli dei file fornitori (snapshot) che puntano a ciascun blob: vengono ricalcolati
+# per file ad ogni scrittura (sync_snapshot), così modifiche e rimozioni li rilasciano e collect()
+# elimina i blob non più usati da nessun file
+class BlobStore:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, INDEX_FILE)
+        self._lock = threading.RLock()
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            index = {}
+        # I conteggi salvati dalle versioni precedenti dell'indice non vengono più usati
+        self._index = {sha256: {"path": entry["path"], "size": entry["size"]} for sha256, entry in index.items()}
+        self._dirty = False
+        self._refs = Counter()
+        self._snapshot_refs = {}
+        self._tracking = None
+
+    def _save_index(self):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".index-", suffix=".part")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, ensure_ascii=False)
+        os.replace(temp_path, self._index_path)
+        self._dirty = False
+
+    # Salva l'indice se ci sono blob nuovi: le operazioni su più file lo scrivono una volta sola
+    def flush(self):
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def blob_path(self, sha256, extension=""):
+        return os.path.join(self.directory, sha256[:2], f"{sha256}{extension.lower()}")
+
+    def is_blob(self, file_path):
+        return os.path.realpath(file_path).startswith(os.path.realpath(self.directory) + os.sep)
+
+    # Registra un file già scritto e con hash noto: se il contenuto esiste già il file viene scartato
+    # Con save=False l'indice viene scritto solo da flush()
+    def adopt(self, file_path, sha256, size, extension="", move=True, save=True):
+        with self._lock:
+            entry = self._index.get(sha256)
+            if entry is not None and os.path.exists(entry["path"]):
+                if move:
+                    os.remove(file_path)
+                # Contenuto di nuovo in uso: riparte il periodo di grazia prima di collect()
+                os.utime(entry["path"])
+            else:
+                target = self.blob_path(sha256, extension)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                if move:
+                    os.replace(file_path, target)
+                else:
+                    shutil.copy2(file_path, target)
+                    os.utime(target)
+                entry = self._index[sha256] = {"path": target, "size": size}
+                self._dirty = True
+                if save:
+                    self._save_index()
+            return entry["path"]
+
+    # Funzione per salvare un file caricato nell'archivio; restituisce il percorso del blob
+    def put_upload(self, uploaded_file, save=True):
+        staging_dir = os.path.join(self.directory, "staging")
+        stored = store_upload(uploaded_file, staging_dir, file_name=f"{threading.get_ident()}-{id(uploaded_file)}")
+        extension = os.path.splitext(uploaded_file.name)[1]
+        return self.adopt(stored.path, stored.sha256, stored.size, extension, save=save)
+
+    # Funzione per salvare in parallelo più file caricati; i percorsi seguono l'ordine di ingresso
+    def put_uploads(self, uploaded_files, max_workers=UPLOAD_WORKERS):
+        uploaded_files = list(uploaded_files)
+        if len(uploaded_files) <= 1:
+            return [self.put_upload(uploaded_file) for uploaded_file in uploaded_files]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(uploaded_files)),
+                                thread_name_prefix="upload") as executor:
+            paths = list(executor.map(partial(self.put_upload, save=False), uploaded_files))
+        self.flush()
+        return paths
+
+    # Funzione per aggiungere all'archivio un file esistente (copiandolo) e restituire il percorso del blob
+    def put_file(self, file_path, save=True):
+        sha256 = file_sha256(file_path)
+        return self.adopt(file_path, sha256, os.path.getsize(file_path), os.path.splitext(file_path)[1],
+                          move=False, save=save)
+
+    def sha256_of(self, blob_path):
+        return os.path.basename(blob_path).split(".")[0]
+
+    def _count(self, suppliers):
+        counts = Counter()
+        for supplier in suppliers:
+            for path in supplier_file_paths(supplier):
+                if self.is_blob(path):
+                    counts[self.sha256_of(path)] += 1
+        return counts
+
+    def _replace_refs(self, snapshot_path, counts):
+        previous = self._snapshot_refs.get(snapshot_path, Counter())
+        self._refs.update(counts)
+        self._refs.subtract(previous)
+        released = sum(1 for sha256 in previous if self._refs[sha256] <= 0)
+        self._refs = +self._refs
+        if counts:
+            self._snapshot_refs[snapshot_path] = counts
+        else:
+            self._snapshot_refs.pop(snapshot_path, None)
+        return released
+
+    # Ricalcola i riferimenti di un file fornitori appena scritto (suppliers vuoto se il file è stato rimosso);
+    # restituisce il numero di blob rimasti senza riferimenti
+    def sync_snapshot(self, snapshot_path, suppliers):
+        counts = self._count(suppliers)
+        with self._lock:
+            return self._replace_refs(os.path.abspath(snapshot_path), counts)
+
+    # Ricalcola i riferimenti rileggendo il file (es. dopo una modifica esterna o un'unione)
+    def resync_snapshot(self, snapshot_path):
+        return self.sync_snapshot(snapshot_path, snapshot_references(snapshot_path) if os.path.exists(snapshot_path)
+                                  else [])
+
+    # Riferimenti di un fornitore accodato al journal di un file
+    def retain(self, snapshot_path, supplier):
+        counts = self._count([supplier])
+        if counts:
+            with self._lock:
+                self._refs.update(counts)
+                self._snapshot_refs.setdefault(os.path.abspath(snapshot_path), Counter()).update(counts)
+
+    # Conteggio iniziale dei riferimenti dei file esistenti, in background; i file già sincronizzati
+    # nel frattempo da sync_snapshot hanno conteggi più recenti e vengono saltati
+    def track_snapshots(self, snapshot_paths):
+        def scan():
+            for snapshot_path in snapshot_paths:
+                key = os.path.abspath(snapshot_path)
+                try:
+                    counts = self._count(snapshot_references(snapshot_path))
+                except (OSError, ValueError):
+                    continue
+                with self._lock:
+                    if key not in self._snapshot_refs:
+                        self._replace_refs(key, counts)
+
+        self._tracking = threading.Thread(target=scan, name="blob-references", daemon=True)
+        self._tracking.start()
+        return self._tracking
+
+    # Elimina i blob senza riferimenti più vecchi del periodo di grazia; restituisce i byte liberati
+    def collect(self, grace_seconds=COLLECT_GRACE_SECONDS):
+        if self._tracking is not None:
+            self._tracking.join()
+        removed = 0
+        deadline = time.time() - grace_seconds
+        with self._lock:
+            for sha256, entry in list(self._index.items()):
+                if self._refs[sha256] > 0:
+                    continue
+                try:
+                    if os.path.getmtime(entry["path"]) > deadline:
+                        continue
+                    os.remove(entry["path"])
+                except FileNotFoundError:
+                    pass
+                removed += entry["size"]
+                del self._index[sha256]
+                self._dirty = True
+            self.flush()
+        return removed
+
+    # Byte referenziati dai fornitori rispetto a quelli realmente occupati su disco
+    def stats(self):
+        with self._lock:
+            stored = sum(entry["size"] for entry in self._index.values())
+            referenced = sum(entry["size"] * self._refs[sha256] for sha256, entry in self._index.items())
+            return {
+                "blobs": len(self._index),
+                "references": sum(self._refs[sha256] for sha256 in self._index),
+                "stored_bytes": stored,
+                "referenced_bytes": referenced,
+                "saved_bytes": max(referenced - stored, 0),
+            }
+
+
+# Nomi originali dei file di un campo del fornitore, nello stesso ordine dei percorsi:
+# "file_names" contiene una lista per campo (lo stesso contenuto può avere nomi diversi);
+# i fornitori salvati con il vecchio formato (percorso -> nome) restano leggibili
+def original_names(supplier, field):
+    paths = supplier.get(field) or []
+    file_names = supplier.get("file_names") or {}
+    names = file_names.get(field)
+    if isinstance(names, list) and len(names) == len(paths):
+        return names
+    return [file_names.get(path) if isinstance(file_names.get(path), str) else os.path.basename(path)
+            for path in paths]
+
+
+# Funzione per portare media e documenti di un fornitore nell'archivio a blob
+# I percorsi vengono sostituiti con quelli dei blob e il nome originale finisce in "file_names"
+# migrated_paths evita di ricalcolare l'hash dei file già migrati (percorso originale -> blob)
+def migrate_supplier(supplier, blob_store, migrated_paths=None):
+    migrated_paths = {} if migrated_paths is None else migrated_paths
+    file_names = {}
+    migrated = 0
+    for field in FILE_FIELDS:
+        paths = []
+        file_names[field] = original_names(supplier, field)
+        for file_path in supplier.get(field) or []:
+            if blob_store.is_blob(file_path) or not os.path.isfile(file_path):
+                paths.append(file_path)
+                continue
+            if file_path not in migrated_paths:
+                migrated_paths[file_path] = blob_store.put_file(file_path, save=False)
+            paths.append(migrated_paths[file_path])
+            migrated += 1
+        if field in supplier:
+            supplier[field] = paths
+    if migrated:
+        supplier["file_names"] = file_names
+    return migrated
+
+
+# Funzione per migrare un insieme di file fornitori (JSON o Parquet) ed eventualmente l'elenco in memoria,
+# rimuovendo gli originali se richiesto; restituisce il resoconto con i byte risparmiati.
+# Un originale ancora usato da un fornitore di other_suppliers (es. gli archivi delle altre sessioni) viene
+# conservato. L'indice dei blob viene scritto una sola volta alla fine
+def migrate_snapshots(snapshot_paths, blob_store, remove_originals=False, suppliers=None, other_suppliers=()):
+    originals = set()
+    migrated_paths = {}
+    report = {"snapshots": 0, "files": 0}
+
+    def migrate_all(records):
+        for supplier in records:
+            originals.update(path for path in supplier_file_paths(supplier)
+                             if not blob_store.is_blob(path) and os.path.isfile(path))
+            report["files"] += migrate_supplier(supplier, blob_store, migrated_paths)
+
+    try:
+        if suppliers is not None:
+            migrate_all(suppliers)
+        for snapshot_path in snapshot_paths:
+            if snapshot_path.endswith(".parquet"):
+                # Import differito come per le altre letture Parquet
+                from toolkit.parquet_snapshots import read_parquet, write_parquet
+                records = read_parquet(snapshot_path)
+                migrate_all(records)
+                write_parquet(records, snapshot_path)
+            else:
+                # Lettura e scrittura passano dal journal, così le aggiunte non ancora compattate vengono migrate
+                journal = get_journal(snapshot_path)
+                records = journal.load()
+                migrate_all(records)
+                journal.write_snapshot(records)
+            blob_store.sync_snapshot(snapshot_path, records)
+            report["snapshots"] += 1
+    finally:
+        blob_store.flush()
+    removed = 0
+    if remove_originals:
+        still_used = {path for supplier in other_suppliers for path in supplier_file_paths(supplier)}
+        for file_path in originals - still_used:
+            os.remove(file_path)
+            removed += 1
+    report["removed_originals"] = removed
+    report.update(blob_store.stats())
+    return report
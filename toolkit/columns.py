@@ -0,0 +1,195 @@
+import numpy as np
+
+from toolkit.ranking import RANKING_CRITERIA, normalized, top_k
+from toolkit.units import supplier_delivery_days, supplier_price_base
+
+# Colonne numeriche mantenute in array NumPy accanto ai record
+# (prezzo nella valuta di riferimento e tempi di consegna in giorni)
+NUMERIC_COLUMNS = ["quality", "price_money", "price_base", "price_stars", "reliability", "delivery_days"]
+
+# Campi testuali filtrati per sottostringa nella ricerca avanzata
+TEXT_COLUMNS = ["name", "address", "phone", "email", "website"]
+
+# Filtri di intervallo: chiave del filtro normalizzato -> (colonna, confronto)
+RANGE_FILTERS = [
+    ("quality_min", "quality", ">="),
+    ("quality_max", "quality", "<="),
+    ("price_base_min", "price_base", ">="),
+    ("price_base_max", "price_base", "<="),
+    ("reliability_min", "reliability", ">="),
+    ("reliability_max", "reliability", "<="),
+    ("delivery_days_min", "delivery_days", ">="),
+    ("delivery_days_max", "delivery_days", "<="),
+]
+
+
+# Valore numerico di un campo; NaN se mancante o non numerico (escluso da ogni confronto)
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def numeric_row(supplier):
+    return {
+        "quality": _number(supplier.get("quality")),
+        "price_money": _number(supplier.get("price_money")),
+        "price_base": supplier_price_base(supplier),
+        "price_stars": _number(supplier.get("price_stars")),
+        "reliability": _number(supplier.get("reliability")),
+        "delivery_days": supplier_delivery_days(supplier),
+    }
+
+
+# Indice colonnare: array NumPy a capacità crescente, una riga per fornitore
+# Le righe rimosse restano marcate come non valide e vengono compattate quando sono troppe
+class ColumnIndex:
+    def __init__(self, capacity=1024):
+        self._initial_capacity = capacity
+        self.clear()
+
+    def clear(self):
+        capacity = self._initial_capacity
+        self._size = 0
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._numeric = {column: np.full(capacity, np.nan) for column in NUMERIC_COLUMNS}
+        self._categories = np.zeros(capacity, dtype=np.int64)
+        self._texts = {column: np.empty(capacity, dtype=object) for column in TEXT_COLUMNS}
+        self._category_bits = {}
+        self._positions = {}
+
+    def __len__(self):
+        return len(self._positions)
+
+    def _grow(self):
+        capacity = len(self._ids) * 2
+
+        def resized(array, fill):
+            grown = np.full(capacity, fill, dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            return grown
+
+        self._ids = resized(self._ids, 0)
+        self._alive = resized(self._alive, False)
+        self._numeric = {column: resized(array, np.nan) for column, array in self._numeric.items()}
+        self._categories = resized(self._categories, 0)
+        self._texts = {column: resized(array, None) for column, array in self._texts.items()}
+
+    def _compact(self):
+        keep = np.flatnonzero(self._alive[:self._size])
+        size = len(keep)
+        self._ids[:size] = self._ids[keep]
+        self._alive[:size] = True
+        self._alive[size:] = False
+        for array in self._numeric.values():
+            array[:size] = array[keep]
+        self._categories[:size] = self._categories[keep]
+        for array in self._texts.values():
+            array[:size] = array[keep]
+        self._size = size
+        self._positions = {int(supplier_id): position for position, supplier_id in enumerate(self._ids[:size])}
+
+    def _category_mask(self, categories):
+        bits = 0
+        for category in categories:
+            if category not in self._category_bits:
+                # Una maschera a 63 bit basta per l'elenco fisso di categorie dell'applicazione
+                if len(self._category_bits) >= 63:
+                    raise ValueError("Troppe categorie distinte per l'indice colonnare")
+                self._category_bits[category] = 1 << len(self._category_bits)
+            bits |= self._category_bits[category]
+        return bits
+
+    def add(self, supplier_id, supplier):
+        if self._size == len(self._ids):
+            if len(self._positions) < self._size // 2:
+                self._compact()
+            else:
+                self._grow()
+        position = self._size
+        self._ids[position] = supplier_id
+        self._alive[position] = True
+        for column, value in numeric_row(supplier).items():
+            self._numeric[column][position] = value
+        self._categories[position] = self._category_mask(supplier.get("category") or [])
+        for column in TEXT_COLUMNS:
+            self._texts[column][position] = str(supplier.get(column, "")).lower()
+        self._positions[supplier_id] = position
+        self._size += 1
+
+    def remove(self, supplier_id, supplier):
+        position = self._positions.pop(supplier_id, None)
+        if position is not None:
+            self._alive[position] = False
+
+    # Maschera booleana dei filtri numerici e di categoria, combinati in un unico passaggio
+    # (su tutte le righe o solo sulle posizioni indicate)
+    def mask(self, filters, positions=None):
+        rows = slice(0, self._size) if positions is None else positions
+        mask = self._alive[rows].copy()
+        for key, column, operator in RANGE_FILTERS:
+            value = filters.get(key)
+            if not value:
+                continue
+            values = self._numeric[column][rows]
+            mask &= values >= value if operator == ">=" else values <= value
+        if filters.get("category"):
+            wanted = 0
+            for category in filters["category"]:
+                wanted |= self._category_bits.get(category, 0)
+            mask &= (self._categories[rows] & wanted) != 0
+        return mask
+
+    # Id dei fornitori che soddisfano i filtri normalizzati, in ordine di id
+    # candidate_ids limita la valutazione ai fornitori già selezionati da un altro indice
+    def filter_ids(self, filters, candidate_ids=None):
+        if candidate_ids is None:
+            positions = np.flatnonzero(self.mask(filters))
+        else:
+            positions = np.fromiter((self._positions[supplier_id] for supplier_id in candidate_ids
+                                     if supplier_id in self._positions), dtype=np.int64)
+            positions = positions[self.mask(filters, positions)]
+        # I filtri per sottostringa vengono valutati solo sulle righe sopravvissute ai filtri numerici
+        for column in TEXT_COLUMNS:
+            query = filters.get(column)
+            if not query or not len(positions):
+                continue
+            query = query.lower()
+            texts = self._texts[column][positions]
+            keep = np.fromiter((query in text for text in texts), dtype=bool, count=len(positions))
+            positions = positions[keep]
+        return np.sort(self._ids[positions]).tolist()
+
+    # Classifica ponderata: punteggio medio dei criteri (valori normalizzati sull'intero catalogo,
+    # così che restino confrontabili anche dopo un filtro) calcolato in un unico passaggio vettoriale.
+    # Restituisce i primi k id in ordine di punteggio e i punteggi per id
+    def rank(self, weights, k, candidate_ids=None):
+        total_weight = sum(weights.get(column, 0) for column in RANKING_CRITERIA)
+        # Senza righe rimosse si lavora direttamente su viste degli array, senza copie
+        if len(self._positions) == self._size:
+            alive = slice(0, self._size)
+        else:
+            alive = np.flatnonzero(self._alive[:self._size])
+        if candidate_ids is None:
+            positions = alive
+        else:
+            positions = np.fromiter((self._positions[supplier_id] for supplier_id in candidate_ids
+                                     if supplier_id in self._positions), dtype=np.int64)
+        ids = self._ids[positions]
+        if not len(ids) or k <= 0:
+            return [], {}
+        scores = np.zeros(len(ids))
+        for column, higher_is_better in RANKING_CRITERIA.items():
+            weight = weights.get(column, 0)
+            if not weight:
+                continue
+            values = self._numeric[column][alive]
+            low, high = (np.nanmin(values), np.nanmax(values)) if not np.isnan(values).all() else (np.nan, np.nan)
+            scores += weight * normalized(self._numeric[column][positions], low, high, higher_is_better)
+        if total_weight:
+            scores /= total_weight
+        best = top_k(scores, ids, k)
+        return ids[best].tolist(), {int(supplier_id): round(float(score), 3)
+                                    for supplier_id, score in zip(ids[best], scores[best])}
@@ -0,0 +1,380 @@
+import hashlib
+import hmac
+import json
+import mimetypes
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from toolkit.zipstream import CHUNK_SIZE, iter_zip
+
+# Durata di validità dei link di download (secondi)
+TOKEN_TTL = 3600
+
+# Numero di pagine HTML (report) tenute in memoria per essere servite tramite URL
+HTML_CACHE_ENTRIES = 256
+
+# Indirizzi locali: per gli altri il server è raggiungibile dall'esterno e serve un base_url esplicito
+LOOPBACK_HOSTS = {"127.0.0.1", "localhost", "::1"}
+
+mimetypes.add_type("video/quicktime", ".mov")
+mimetypes.add_type("image/webp", ".webp")
+
+
+# Archivi zip registrati dalle sessioni e prodotti solo quando il browser li richiede
+class DownloadRegistry:
+    def __init__(self, ttl=TOKEN_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    # Lo stesso insieme di file ottiene lo stesso link finché non scade, anche tra un rerun e l'altro
+    def register(self, file_paths, file_name):
+        key = (tuple(file_paths), file_name)
+        with self._lock:
+            self._purge()
+            token = self._tokens.get(key)
+            if token is None:
+                token = secrets.token_urlsafe(24)
+                self._tokens[key] = token
+            self._entries[token] = (list(file_paths), file_name, time.time() + self.ttl)
+        return token
+
+    def lookup(self, token):
+        with self._lock:
+            self._purge()
+            entry = self._entries.get(token)
+        return entry[:2] if entry else None
+
+    def _purge(self):
+        now = time.time()
+        for token in [token for token, entry in self._entries.items() if entry[2] < now]:
+            file_paths, file_name, _ = self._entries.pop(token)
+            self._tokens.pop((tuple(file_paths), file_name), None)
+
+
+# Cartelle servite staticamente; gli URL sono firmati con una chiave del processo
+# così che solo i link generati dall'applicazione autenticata siano validi
+class StaticRoots:
+    def __init__(self, roots, secret=None):
+        self.roots = {name: os.path.realpath(path) for name, path in roots.items()}
+        self.secret = secret or secrets.token_bytes(32)
+
+    def _signature(self, root, relative_path):
+        message = f"{root}/{relative_path}".encode("utf-8")
+        return hmac.new(self.secret, message, hashlib.sha256).hexdigest()[:32]
+
+    # Percorso URL di un file (None se il file non appartiene a nessuna cartella servita)
+    def url_path(self, file_path):
+        real_path = os.path.realpath(file_path)
+        for root, directory in self.roots.items():
+            if real_path.startswith(directory + os.sep):
+                relative_path = os.path.relpath(real_path, directory).replace(os.sep, "/")
+                return f"files/{self._signature(root, relative_path)}/{root}/{quote(relative_path)}"
+        return None
+
+    def resolve(self, signature, root, relative_path):
+        directory = self.roots.get(root)
+        if directory is None or not hmac.compare_digest(signature, self._signature(root, relative_path)):
+            return None
+        real_path = os.path.realpath(os.path.join(directory, relative_path))
+        if not real_path.startswith(directory + os.sep) or not os.path.isfile(real_path):
+            return None
+        return real_path
+
+
+# Pagine HTML generate (report) servite per URL invece che come data URI, indicizzate per contenuto;
+# come per i file statici l'URL contiene la firma della chiave, così una pagina si apre solo dal link generato
+class HtmlRegistry:
+    def __init__(self, max_entries=HTML_CACHE_ENTRIES, secret=None):
+        self.max_entries = max_entries
+        self.secret = secret or secrets.token_bytes(32)
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def signature(self, key):
+        return hmac.new(self.secret, f"html/{key}".encode("utf-8"), hashlib.sha256).hexdigest()[:32]
+
+    def url_path(self, html):
+        key = self.register(html)
+        return f"html/{self.signature(key)}/{key}"
+
+    def register(self, html):
+        body = html.encode("utf-8")
+        key = hashlib.sha256(body).hexdigest()[:32]
+        with self._lock:
+            self._pages[key] = body
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+        return key
+
+    def lookup(self, key, signature=None):
+        if signature is not None and not hmac.compare_digest(signature, self.signature(key)):
+            return None
+        with self._lock:
+            return self._pages.get(key)
+
+
+# Funzione per interpretare un header Range a intervallo singolo (estremi inclusi)
+# Restituisce None se l'header manca o non è gestito, False se l'intervallo non è soddisfacibile
+def parse_range(header, size):
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start, _, end = header[len("bytes="):].strip().partition("-")
+    try:
+        if not start:
+            length = int(end)
+            if length <= 0:
+                return False
+            return max(size - length, 0), size - 1
+        start = int(start)
+        end = int(end) if end else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+# Gestore HTTP: /zip/<token> restituisce l'archivio con transfer-encoding chunked,
+# /files/<firma>/<cartella>/<file> i media e i documenti (con Range e cache HTTP),
+# /html/<firma>/<chiave> i report generati, /zip-cache/stats i contatori della cache degli archivi
+# e /metrics le metriche dell'applicazione nel formato di Prometheus; queste ultime due richiedono
+# il token di accesso (header "Authorization: Bearer <token>" oppure parametro ?token=<token>)
+class DownloadHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    registry = None
+    cache = None
+    static_roots = None
+    html_registry = None
+    metrics = None
+    access_token = None
+
+    def do_GET(self):
+        self._dispatch(head_only=False)
+
+    def do_HEAD(self):
+        self._dispatch(head_only=True)
+
+    def _authorized(self):
+        if not self.access_token:
+            return False
+        authorization = self.headers.get("Authorization") or ""
+        if authorization.startswith("Bearer "):
+            token = authorization[len("Bearer "):].strip()
+        else:
+            token = parse_qs(urlsplit(self.path).query).get("token", [""])[0]
+        return hmac.compare_digest(token.encode("utf-8"), self.access_token.encode("utf-8"))
+
+    def _dispatch(self, head_only):
+        parts = self.path.split("?")[0].strip("/").split("/")
+        if len(parts) == 2 and parts[0] == "zip" and not head_only:
+            return self._send_zip(parts[1])
+        if len(parts) >= 4 and parts[0] == "files" and self.static_roots is not None:
+            file_path = self.static_roots.resolve(parts[1], parts[2], unquote("/".join(parts[3:])))
+            if file_path is None:
+                return self.send_error(404)
+            return self._send_file(file_path, head_only)
+        if len(parts) == 3 and parts[0] == "html" and self.html_registry is not None:
+            return self._send_html(parts[1], parts[2], head_only)
+        if parts in (["zip-cache", "stats"], ["metrics"]) and not self._authorized():
+            return self.send_error(401)
+        if parts == ["zip-cache", "stats"] and self.cache is not None:
+            return self._send_json(self.cache.stats())
+        if parts == ["metrics"] and self.metrics is not None:
+            return self._send_metrics(head_only)
+        self.send_error(404)
+
+    def _not_modified(self, etag, last_modified):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since and last_modified is not None:
+            try:
+                return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _send_file(self, file_path, head_only):
+        stat = os.stat(file_path)
+        size = stat.st_size
+        etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+        if self._not_modified(etag, stat.st_mtime):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        byte_range = parse_range(self.headers.get("Range"), size)
+        if_range = self.headers.get("If-Range")
+        if byte_range and if_range and if_range.strip() != etag:
+            byte_range = None
+        if byte_range is False:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        start, end = byte_range or (0, size - 1)
+        length = max(end - start + 1, 0)
+        self.send_response(206 if byte_range else 200)
+        self.send_header("Content-Type", mimetypes.guess_type(file_path)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(length))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(stat.st_mtime, usegmt=True))
+        self.send_header("Cache-Control", "private, max-age=3600")
+        if byte_range:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        if head_only:
+            return
+        try:
+            with open(file_path, "rb") as f:
+                f.seek(start)
+                remaining = length
+                while remaining > 0:
+                    block = f.read(min(CHUNK_SIZE, remaining))
+                    if not block:
+                        break
+                    self.wfile.write(block)
+                    remaining -= len(block)
+        except (BrokenPipeError, ConnectionResetError):
+            # Il browser interrompe spesso la richiesta di un video quando si sposta nella riproduzione
+            self.close_connection = True
+
+    def _send_html(self, signature, key, head_only):
+        body = self.html_registry.lookup(key, signature)
+        if body is None:
+            return self.send_error(404)
+        etag = f'"{key}"'
+        if self._not_modified(etag, None):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "private, max-age=3600")
+        self.end_headers()
+        if not head_only:
+            self.wfile.write(body)
+
+    def _send_json(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_metrics(self, head_only):
+        body = self.metrics.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        if not head_only:
+            self.wfile.write(body)
+
+    def _send_zip(self, token):
+        entry = self.registry.lookup(token)
+        if entry is None:
+            return self.send_error(404, "Link di download scaduto o non valido")
+        file_paths, file_name = entry
+        self.send_response(200)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(file_name)}")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        blocks = self.cache.stream(file_paths) if self.cache is not None else iter_zip(file_paths)
+        try:
+            for block in blocks:
+                self.wfile.write(f"{len(block):X}\r\n".encode("ascii") + block + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Download interrotto dal browser
+            self.close_connection = True
+        finally:
+            blocks.close()
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Server di download e file statici affiancato a Streamlit, in esecuzione su un thread separato.
+# Di default ascolta solo in locale; per esporlo su un altro indirizzo va indicato il base_url pubblico.
+# token protegge le statistiche e le metriche (se manca ne viene generato uno per il processo)
+class DownloadServer:
+    def __init__(self, host="127.0.0.1", port=8502, base_url=None, cache=None, roots=None, metrics=None,
+                 token=None):
+        if base_url is None and host not in LOOPBACK_HOSTS:
+            raise ValueError(f"Il server di download su {host} richiede un base_url (download_base_url)")
+        self.registry = DownloadRegistry()
+        self.cache = cache
+        self.static_roots = StaticRoots(roots or {})
+        self.html_registry = HtmlRegistry(secret=self.static_roots.secret)
+        self.token = token or secrets.token_urlsafe(24)
+        handler = type("BoundDownloadHandler", (DownloadHandler,), {
+            "registry": self.registry,
+            "cache": cache,
+            "static_roots": self.static_roots,
+            "html_registry": self.html_registry,
+            "metrics": metrics,
+            "access_token": self.token,
+        })
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        url_host = f"[{host}]" if ":" in host else host
+        self.base_url = (base_url or f"http://{url_host}:{self.httpd.server_address[1]}").rstrip("/")
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="download-server", daemon=True)
+        self.thread.start()
+
+    def zip_url(self, file_paths, file_name):
+        token = self.registry.register(file_paths, file_name)
+        return f"{self.base_url}/zip/{token}"
+
+    # URL di un media o documento servito staticamente (None se fuori dalle cartelle servite)
+    def file_url(self, file_path):
+        url_path = self.static_roots.url_path(file_path)
+        return f"{self.base_url}/{url_path}" if url_path else None
+
+    def html_url(self, html):
+        return f"{self.base_url}/{self.html_registry.url_path(html)}"
+
+    # URL delle metriche con il token di accesso (per Prometheus è preferibile l'header Authorization)
+    def metrics_url(self):
+        return f"{self.base_url}/metrics?token={quote(self.token)}"
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+# Funzione per avviare (una sola volta per processo) il server di download; None se la porta non è disponibile
+def ensure_download_server(host="127.0.0.1", port=8502, base_url=None, cache=None, roots=None, metrics=None,
+                           token=None):
+    global _server
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = DownloadServer(host, port, base_url, cache, roots, metrics, token)
+            except OSError:
+                # Porta occupata: si ricade sul download in memoria senza ritentare ad ogni rerun
+                _server = False
+        return _server or None
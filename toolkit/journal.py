@@ -0,0 +1,252 @@
+import json
+import os
+import threading
+
+from toolkit.snapshot_loader import iter_suppliers
+
+# Numero di operazioni nel journal oltre il quale parte la compattazione in background
+COMPACT_THRESHOLD = 1000
+
+JOURNAL_SUFFIX = ".journal"
+COMPACTING_SUFFIX = ".journal.compacting"
+
+
+# Firma (dimensione, mtime) di uno snapshot, None se il file non esiste
+def snapshot_signature(snapshot_path):
+    try:
+        stat = os.stat(snapshot_path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+# Intestazione e operazioni di un journal; l'intestazione elenca le firme degli snapshot
+# su cui le operazioni (indicizzate per posizione) possono essere applicate
+def _read_journal(journal_path):
+    header = None
+    operations = []
+    try:
+        with open(journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    operation = json.loads(line)
+                except json.JSONDecodeError:
+                    # Ultima riga troncata da un'interruzione: le operazioni precedenti restano valide
+                    break
+                if operation.get("op") == "snapshot":
+                    header = operation
+                else:
+                    operations.append(operation)
+    except FileNotFoundError:
+        pass
+    return header, operations
+
+
+# Un journal senza intestazione (scritto dalle versioni precedenti) vale per lo snapshot presente
+def _matches(header, signature):
+    return header is None or signature in header["snapshots"]
+
+
+def _read_operations(journal_path, signature):
+    header, operations = _read_journal(journal_path)
+    return operations if _matches(header, signature) else []
+
+
+# Journal append-only (JSON Lines) accanto a un file fornitori: ogni aggiunta o modifica è una riga,
+# la compattazione riporta tutto nello snapshot. Le chiavi sono le posizioni dei fornitori nello snapshot:
+# la prima riga riporta la firma dello snapshot, e un journal rimasto da uno snapshot riscritto
+# dall'esterno viene scartato invece di essere riapplicato al nuovo contenuto.
+class SupplierJournal:
+    def __init__(self, snapshot_path, compact_threshold=COMPACT_THRESHOLD):
+        self.snapshot_path = snapshot_path
+        self.journal_path = snapshot_path + JOURNAL_SUFFIX
+        self.compacting_path = snapshot_path + COMPACTING_SUFFIX
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock()
+        self._compaction = None
+        self._pending_operations = None
+        self._next_key = None
+        # Dimensione e mtime dell'ultimo snapshot scritto da questo processo
+        self._written = None
+
+    # Snapshot più journal (compreso quello di una compattazione interrotta), nell'ordine di scrittura
+    # Lo snapshot viene decodificato in streaming; progress riceve (byte letti, byte totali, record)
+    def load(self, progress=None):
+        with self._lock:
+            self._discard_stale()
+            records = dict(self.iter_records(progress))
+            self._next_key = max(records, default=-1) + 1
+            self._pending_operations = len(_read_journal(self.journal_path)[1])
+            return [records[key] for key in sorted(records)]
+
+    def _discard_stale(self):
+        signature = snapshot_signature(self.snapshot_path)
+        for path in (self.compacting_path, self.journal_path):
+            if os.path.exists(path) and not _matches(_read_journal(path)[0], signature):
+                os.remove(path)
+
+    # Coppie (chiave, fornitore) in ordine di scrittura, senza tenere in memoria l'intero file:
+    # una chiave ripetuta più avanti sostituisce la precedente
+    def iter_records(self, progress=None):
+        signature = snapshot_signature(self.snapshot_path)
+        if signature is not None:
+            yield from enumerate(iter_suppliers(self.snapshot_path, progress=progress))
+        for operation in (_read_operations(self.compacting_path, signature)
+                          + _read_operations(self.journal_path, signature)):
+            yield operation["key"], operation["supplier"]
+
+    def _ensure_loaded(self):
+        if self._next_key is None:
+            self.load()
+
+    def _append(self, operation):
+        line = json.dumps(operation, ensure_ascii=False, separators=(",", ":")) + "\n"
+        if not os.path.exists(self.journal_path):
+            line = self._header([snapshot_signature(self.snapshot_path)]) + line
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self._pending_operations += 1
+        if self._pending_operations >= self.compact_threshold:
+            self.compact(background=True)
+
+    # Aggiunge un fornitore in coda; restituisce la sua chiave nel file
+    def append_add(self, supplier):
+        with self._lock:
+            self._ensure_loaded()
+            key = self._next_key
+            self._next_key += 1
+            self._append({"op": "add", "key": key, "supplier": supplier})
+            return key
+
+    def append_update(self, key, supplier):
+        with self._lock:
+            self._ensure_loaded()
+            self._append({"op": "update", "key": key, "supplier": supplier})
+
+    # Riscrive lo snapshot completo (tramite file temporaneo) e azzera il journal;
+    # suppliers può essere un generatore, i record vengono scritti uno alla volta
+    def write_snapshot(self, suppliers):
+        self.wait()
+        with self._lock:
+            count = self._write_snapshot_file(suppliers)
+            for path in (self.journal_path, self.compacting_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._next_key = count
+            self._pending_operations = 0
+
+    def _header(self, signatures):
+        return json.dumps({"op": "snapshot", "snapshots": signatures}, separators=(",", ":")) + "\n"
+
+    # Aggiunge una firma all'intestazione del journal corrente (riscritto tramite file temporaneo)
+    def _extend_header(self, signature):
+        header, operations = _read_journal(self.journal_path)
+        if header is None:
+            return
+        temp_path = f"{self.journal_path}.part"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self._header(header["snapshots"] + [signature]))
+            for operation in operations:
+                f.write(json.dumps(operation, ensure_ascii=False, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.journal_path)
+
+    def _write_snapshot_file(self, suppliers, before_replace=None):
+        temp_path = f"{self.snapshot_path}.part"
+        count = 0
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write("[")
+            for supplier in suppliers:
+                if count:
+                    f.write(",")
+                f.write(json.dumps(supplier, ensure_ascii=False, separators=(",", ":")))
+                count += 1
+            f.write("]")
+            f.flush()
+            os.fsync(f.fileno())
+        # La rinomina conserva dimensione e mtime: la firma è nota prima che il watcher veda il file
+        stat = os.stat(temp_path)
+        self._written = (stat.st_size, stat.st_mtime_ns)
+        if before_replace is not None:
+            before_replace([stat.st_size, stat.st_mtime_ns])
+        os.replace(temp_path, self.snapshot_path)
+        return count
+
+    # Riscrive lo snapshot passando i record correnti (letti in streaming dopo la compattazione) a transform,
+    # che restituisce i record da scrivere; le aggiunte concorrenti attendono la fine della riscrittura
+    def rewrite(self, transform):
+        self.wait()
+        with self._lock:
+            self.compact()
+            records = iter_suppliers(self.snapshot_path) if os.path.exists(self.snapshot_path) else iter(())
+            self.write_snapshot(transform(records))
+
+    # True se lo snapshot sul disco è l'ultimo scritto da questo processo (e quindi già noto in memoria)
+    def is_own_write(self):
+        try:
+            stat = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            return False
+        return self._written == (stat.st_size, stat.st_mtime_ns)
+
+    # Dimentica lo stato letto dal file dopo una modifica esterna: verrà riletto al prossimo accesso
+    def reset(self):
+        with self._lock:
+            self._next_key = None
+            self._pending_operations = None
+
+    # Compattazione: il journal corrente viene messo da parte (le nuove scritture vanno in uno nuovo)
+    # e fuso nello snapshot; in background non blocca le aggiunte successive
+    def compact(self, background=False):
+        with self._lock:
+            if self._compaction is not None and self._compaction.is_alive():
+                return self._compaction
+            if not os.path.exists(self.journal_path) and not os.path.exists(self.compacting_path):
+                return None
+            if os.path.exists(self.compacting_path):
+                # Viene ripresa una compattazione interrotta: il journal corrente resta in attesa
+                self._pending_operations = len(_read_journal(self.journal_path)[1])
+            else:
+                os.replace(self.journal_path, self.compacting_path)
+                self._pending_operations = 0
+            if not background:
+                self._fold()
+                return None
+            self._compaction = threading.Thread(target=self._fold, name="journal-compaction", daemon=True)
+            self._compaction.start()
+            return self._compaction
+
+    def _fold(self):
+        signature = snapshot_signature(self.snapshot_path)
+        suppliers = list(iter_suppliers(self.snapshot_path)) if signature is not None else []
+        records = dict(enumerate(suppliers))
+        for operation in _read_operations(self.compacting_path, signature):
+            records[operation["key"]] = operation["supplier"]
+        with self._lock:
+            # Le aggiunte arrivate durante la compattazione valgono anche sul nuovo snapshot (le chiavi proseguono):
+            # la sua firma entra nell'intestazione del journal prima che il file venga sostituito
+            self._write_snapshot_file([records[key] for key in sorted(records)], before_replace=self._extend_header)
+            os.remove(self.compacting_path)
+
+    # Attende la fine di un'eventuale compattazione in corso
+    def wait(self):
+        compaction = self._compaction
+        if compaction is not None:
+            compaction.join()
+
+
+_journals = {}
+_journals_lock = threading.Lock()
+
+
+# Funzione per ottenere il journal (unico per processo) associato a un file fornitori
+def get_journal(snapshot_path):
+    key = os.path.abspath(snapshot_path)
+    with _journals_lock:
+        journal = _journals.get(key)
+        if journal is None:
+            journal = _journals[key] = SupplierJournal(snapshot_path)
+        return journal
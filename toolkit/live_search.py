@@ -0,0 +1,66 @@
+from toolkit.token_index import TokenIndex, matches_text
+
+# Caratteri minimi per cercare nel testo: un solo carattere è contenuto in quasi tutti i fornitori
+# e ogni tasto ricalcolerebbe un risultato grande quanto il catalogo
+MIN_QUERY_LENGTH = 2
+
+
+# Testo effettivamente cercato: più corto del minimo viene ignorato (restano le sole categorie)
+def effective_query(query):
+    return query if len(query.strip()) >= MIN_QUERY_LENGTH else ""
+
+
+# True se ogni fornitore trovato con la nuova ricerca era già tra i risultati della precedente:
+# il testo contiene quello precedente (es. un carattere in più) e le categorie sono più restrittive.
+# Le categorie sono in OR: aggiungerle a un filtro vuoto restringe, aggiungerne altre allarga.
+# Senza testo precedente i risultati sono (quasi) l'intero catalogo: conviene ripartire dall'indice
+def refines(previous_query, previous_categories, query, categories):
+    if not previous_query.strip() or previous_query.lower() not in query.lower():
+        return False
+    if not previous_categories:
+        return True
+    return bool(categories) and set(categories) <= set(previous_categories)
+
+
+def matches(supplier, query, categories):
+    if not matches_text(supplier, query):
+        return False
+    return not categories or any(category in (supplier.get("category") or []) for category in categories)
+
+
+# Ricerca istantanea sull'elenco dei fornitori della sessione (id = posizione nell'elenco):
+# se la nuova ricerca affina la precedente vengono filtrati solo i risultati precedenti,
+# altrimenti si riparte dalle sottostringhe dei token dell'indice: il costo di un tasto non cresce con il catalogo
+class LiveSearch:
+    def __init__(self):
+        self.index = TokenIndex()
+        self.version = 0
+        self._last = None
+
+    def add(self, supplier_id, supplier):
+        self.index.add(supplier_id, supplier)
+        self.version += 1
+
+    # Elenco sostituito (es. caricamento di un file): indice ricostruito da zero
+    def reset(self, suppliers):
+        self.index.clear()
+        for supplier_id, supplier in enumerate(suppliers):
+            self.index.add(supplier_id, supplier)
+        self.version += 1
+
+    # True se la ricerca (testo, categorie) è la stessa dell'ultima eseguita sull'elenco attuale
+    def is_current(self, query, categories):
+        return self._last is not None and self._last[:3] == (self.version, query, tuple(categories))
+
+    def search(self, suppliers, query, categories):
+        query = effective_query(query)
+        categories = tuple(categories)
+        if self.is_current(query, categories):
+            return self._last[3]
+        last = self._last
+        if last is not None and last[0] == self.version and refines(last[1], last[2], query, categories):
+            ids = [supplier_id for supplier_id in last[3] if matches(suppliers[supplier_id], query, categories)]
+        else:
+            ids = self.index.search(query, categories, substring=True)
+        self._last = (self.version, query, categories, ids)
+        return ids
@@ -0,0 +1,161 @@
+import bisect
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Limiti superiori (secondi) dei bucket degli istogrammi di latenza
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+# Intervallo minimo (secondi) tra due scritture del file di testo per Prometheus
+TEXTFILE_INTERVAL = 15
+
+METRIC_PREFIX = "suppliers"
+
+_thread = threading.local()
+
+
+# Istogramma cumulativo alla Prometheus: conteggi per bucket, somma e numero di osservazioni
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    # Coppie (limite, conteggio cumulativo) comprese quella finale +Inf
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + [math.inf], self.counts):
+            total += count
+            yield bound, total
+
+
+# Tratto misurato di un rerun: durata e byte elaborati (letti, scritti o codificati)
+class Span:
+    def __init__(self, name, bytes_processed=0):
+        self.name = name
+        self.seconds = 0.0
+        self.bytes = bytes_processed
+
+
+# Misure di un'esecuzione dello script: i tratti nell'ordine in cui sono terminati
+class RerunTrace:
+    def __init__(self, page, started=None):
+        self.page = page
+        self.started = time.perf_counter() if started is None else started
+        self.seconds = None
+        self.spans = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels):
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+# Metriche del processo: istogrammi di latenza per pagina e per tratto, byte elaborati per tratto.
+# Come il profilo di avvio, un'istanza dura quanto il processo ed è condivisa da tutte le sessioni
+class MetricsRegistry:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = list(buckets)
+        self._pages = {}
+        self._spans = {}
+        self._bytes = {}
+        self._lock = threading.Lock()
+        self._textfile_written = None
+
+    def _histogram(self, histograms, key):
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(self.buckets)
+        return histogram
+
+    def observe_span(self, name, seconds, bytes_processed=0):
+        with self._lock:
+            self._histogram(self._spans, name).observe(seconds)
+            self._bytes[name] = self._bytes.get(name, 0) + bytes_processed
+
+    def observe_page(self, page, seconds):
+        with self._lock:
+            self._histogram(self._pages, page).observe(seconds)
+
+    # Esposizione nel formato di testo di Prometheus (0.0.4)
+    def prometheus_text(self):
+        lines = []
+        with self._lock:
+            for metric, label, histograms, description in (
+                    ("page_duration_seconds", "page", self._pages, "Durata delle esecuzioni dello script per pagina"),
+                    ("span_duration_seconds", "span", self._spans, "Durata dei tratti misurati del codice")):
+                name = f"{METRIC_PREFIX}_{metric}"
+                lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+                for key in sorted(histograms):
+                    histogram = histograms[key]
+                    for bound, count in histogram.cumulative():
+                        le = "+Inf" if bound == math.inf else repr(bound)
+                        lines.append(f"{name}_bucket{{{_labels(**{label: key, 'le': le})}}} {count}")
+                    lines.append(f"{name}_sum{{{_labels(**{label: key})}}} {histogram.sum!r}")
+                    lines.append(f"{name}_count{{{_labels(**{label: key})}}} {histogram.count}")
+            name = f"{METRIC_PREFIX}_span_bytes_total"
+            lines += [f"# HELP {name} Byte elaborati dai tratti misurati", f"# TYPE {name} counter"]
+            for key in sorted(self._bytes):
+                lines.append(f"{name}{{{_labels(span=key)}}} {self._bytes[key]}")
+        return "\n".join(lines) + "\n"
+
+    # File di testo per il textfile collector di node_exporter (scrittura atomica),
+    # aggiornato al massimo una volta ogni interval secondi
+    def write_textfile(self, file_path, interval=TEXTFILE_INTERVAL):
+        now = time.monotonic()
+        with self._lock:
+            if self._textfile_written is not None and now - self._textfile_written < interval:
+                return False
+            self._textfile_written = now
+        temp_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(temp_path, file_path)
+        return True
+
+
+METRICS = MetricsRegistry()
+
+
+# Inizio delle misure di un'esecuzione dello script (Streamlit esegue ogni rerun in un thread);
+# started permette di includere la parte di script eseguita prima di conoscere la pagina
+def start_trace(page, started=None):
+    _thread.trace = RerunTrace(page, started)
+    return _thread.trace
+
+
+# Fine dell'esecuzione: la durata va nell'istogramma della pagina; restituisce le misure del rerun
+def finish_trace():
+    trace = getattr(_thread, "trace", None)
+    if trace is None:
+        return None
+    _thread.trace = None
+    trace.seconds = time.perf_counter() - trace.started
+    METRICS.observe_page(trace.page, trace.seconds)
+    return trace
+
+
+# Misura un tratto di codice; i byte elaborati si indicano subito o impostando span.bytes nel blocco
+@contextmanager
+def span(name, bytes_processed=0):
+    measured = Span(name, bytes_processed)
+    start = time.perf_counter()
+    try:
+        yield measured
+    finally:
+        measured.seconds = time.perf_counter() - start
+        METRICS.observe_span(name, measured.seconds, measured.bytes)
+        trace = getattr(_thread, "trace", None)
+        if trace is not None:
+            trace.spans.append(measured)
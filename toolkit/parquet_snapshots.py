@@ -0,0 +1,141 @@
+import json
+import math
+import os
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from toolkit.columns import RANGE_FILTERS, TEXT_COLUMNS, numeric_row
+from toolkit.journal import get_journal
+from toolkit.search import normalize_filters
+
+PARQUET_SUFFIX = ".parquet"
+
+# Righe per row group: abbastanza piccoli perché le statistiche min/max escludano parti del file
+ROW_GROUP_SIZE = 10_000
+
+# Schema degli snapshot Parquet: colonne tipizzate per filtri e riepilogo, record completo in JSON
+# (come nel database) e posizione del fornitore nel file
+SCHEMA = pa.schema(
+    [("row", pa.int64())]
+    + [(column, pa.string()) for column in TEXT_COLUMNS + ["currency", "delivery_times"]]
+    + [(column, pa.float64()) for column in numeric_row({})]
+    + [("category", pa.list_(pa.string())), ("data", pa.string())]
+)
+
+# Colonne lette per le pagine di risultati di una ricerca su uno snapshot archiviato
+SUMMARY_COLUMNS = ["row", "name", "email", "phone", "category", "quality", "price_money", "currency",
+                   "price_stars", "reliability", "delivery_times"]
+
+
+def _batch(rows, start):
+    columns = {name: [] for name in SCHEMA.names}
+    for offset, supplier in enumerate(rows):
+        columns["row"].append(start + offset)
+        for column in TEXT_COLUMNS:
+            # Stesso testo confrontato dall'indice colonnare
+            columns[column].append(str(supplier.get(column, "")))
+        for column in ("currency", "delivery_times"):
+            value = supplier.get(column)
+            columns[column].append(None if value is None else str(value))
+        for column, value in numeric_row(supplier).items():
+            columns[column].append(None if math.isnan(value) else value)
+        columns["category"].append([str(category) for category in supplier.get("category") or []])
+        columns["data"].append(json.dumps(supplier, ensure_ascii=False))
+    return pa.record_batch([pa.array(columns[name], type=SCHEMA.field(name).type) for name in SCHEMA.names],
+                           schema=SCHEMA)
+
+
+# Funzione per salvare i fornitori in Parquet (un row group alla volta, tramite file temporaneo)
+def write_parquet(suppliers, file_path, row_group_size=ROW_GROUP_SIZE):
+    temp_path = f"{file_path}.part"
+    count = 0
+    with pq.ParquetWriter(temp_path, SCHEMA, compression="zstd", write_statistics=True) as writer:
+        rows = []
+        for supplier in suppliers:
+            rows.append(supplier)
+            if len(rows) == row_group_size:
+                writer.write_batch(_batch(rows, count), row_group_size=row_group_size)
+                count += len(rows)
+                rows = []
+        if rows or not count:
+            writer.write_batch(_batch(rows, count), row_group_size=row_group_size)
+            count += len(rows)
+    os.replace(temp_path, file_path)
+    return count
+
+
+# Funzione per convertire un file fornitori JSON (con il suo journal) nello stesso file in formato Parquet
+def convert_json_to_parquet(json_path, parquet_path=None):
+    parquet_path = parquet_path or os.path.splitext(json_path)[0] + PARQUET_SUFFIX
+    count = write_parquet(get_journal(json_path).load(), parquet_path)
+    return parquet_path, count
+
+
+def record_count(file_path):
+    return pq.ParquetFile(file_path).metadata.num_rows
+
+
+# Funzione per leggere i fornitori completi di uno snapshot Parquet, un row group alla volta
+# progress(row group letti, row group totali, record) come per il caricamento dei file JSON
+def read_parquet(file_path, fields=None, limit=None, progress=None):
+    parquet_file = pq.ParquetFile(file_path)
+    total = parquet_file.num_row_groups
+    suppliers = []
+    for group in range(total):
+        for data in parquet_file.read_row_group(group, columns=["data"]).column("data").to_pylist():
+            supplier = json.loads(data)
+            if fields is not None:
+                supplier = {field: supplier[field] for field in fields if field in supplier}
+            suppliers.append(supplier)
+            if limit is not None and len(suppliers) >= limit:
+                return suppliers
+        if progress is not None:
+            progress(group + 1, total, len(suppliers))
+    return suppliers
+
+
+# Espressione di filtro per la ricerca avanzata: gli intervalli numerici vengono confrontati
+# con le statistiche dei row group, i testi valutati durante la lettura
+def filter_expression(filters):
+    normalized = normalize_filters(filters)
+    expression = None
+    for key, column, operator in RANGE_FILTERS:
+        value = normalized.get(key)
+        if not value:
+            continue
+        condition = pc.field(column) >= value if operator == ">=" else pc.field(column) <= value
+        expression = condition if expression is None else expression & condition
+    for column in TEXT_COLUMNS:
+        query = normalized.get(column)
+        if query:
+            condition = pc.match_substring(pc.field(column), query, ignore_case=True)
+            expression = condition if expression is None else expression & condition
+    return expression
+
+
+# Funzione per interrogare uno snapshot archiviato con i filtri della ricerca avanzata:
+# vengono letti solo le colonne richieste e i row group compatibili con i filtri
+def query_parquet(file_path, filters, columns=SUMMARY_COLUMNS):
+    # pyarrow.dataset è il modulo più lento da importare: serve solo alle interrogazioni
+    import pyarrow.dataset as ds
+
+    table = ds.dataset(file_path, format="parquet").to_table(columns=columns, filter=filter_expression(filters))
+    categories = filters.get("category")
+    if categories and len(table):
+        # Almeno una delle categorie richieste nella lista del fornitore
+        matches = pc.is_in(pc.list_flatten(table["category"]), value_set=pa.array(categories, type=pa.string()))
+        parents = pc.filter(pc.list_parent_indices(table["category"]), matches)
+        table = table.take(pc.unique(parents).sort())
+    # La posizione nel file fa da id del fornitore nelle pagine di risultati
+    table = table.sort_by("row")
+    return table.rename_columns(["id" if name == "row" else name for name in table.column_names])
+
+
+# Funzione per leggere il record completo di un fornitore a partire dalla sua posizione nel file
+def read_parquet_row(file_path, row):
+    import pyarrow.dataset as ds
+
+    table = ds.dataset(file_path, format="parquet").to_table(columns=["data"], filter=pc.field("row") == row)
+    return json.loads(table["data"][0].as_py()) if len(table) else None
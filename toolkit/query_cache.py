@@ -0,0 +1,74 @@
+import threading
+from collections import OrderedDict
+
+from toolkit.search import normalize_filters
+
+# Numero di ricerche tenute in memoria
+DEFAULT_MAX_ENTRIES = 256
+
+# Filtri del modulo già tradotti nelle chiavi canoniche da normalize_filters
+_RAW_FILTERS = {"price_min", "price_max", "price_currency", "delivery_times_min", "delivery_times_max",
+                "delivery_unit"}
+
+
+# Chiave canonica dei filtri: solo i valori normalizzati, testi in minuscolo e categorie senza ordine,
+# così che la stessa ricerca espressa in modo diverso (es. 1 settimana o 7 giorni) trovi lo stesso risultato
+def filters_key(filters):
+    items = []
+    for key, value in normalize_filters(filters).items():
+        if key in _RAW_FILTERS or not value:
+            continue
+        if isinstance(value, str):
+            value = value.lower()
+        elif isinstance(value, (list, tuple, set)):
+            value = tuple(sorted(value))
+        items.append((key, value))
+    return tuple(sorted(items))
+
+
+# Cache LRU dei risultati delle ricerche: la chiave comprende l'archivio interrogato e la sua versione,
+# che avanza ad ogni scrittura, quindi un risultato non può mai riferirsi a un catalogo diverso
+class QueryCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, store, filters, mode="exact"):
+        return store.uid, store.version, mode, filters_key(filters)
+
+    # Risultato in cache oppure calcolato con compute() e memorizzato
+    # count=False per gli usi interni, che non devono alterare il rapporto di riutilizzo mostrato all'utente
+    def get_or_compute(self, key, compute, count=True):
+        with self._lock:
+            if key in self._entries:
+                self.hits += count
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += count
+        result = compute()
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / requests if requests else 0.0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
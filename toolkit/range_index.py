@@ -0,0 +1,71 @@
+import math
+from bisect import bisect_left, bisect_right
+
+# Numero di inserimenti (o di rimozioni) tenuti fuori dalla lista ordinata prima di un merge
+PENDING_LIMIT = 4096
+
+
+# Indice ordinato su un valore numerico del fornitore: intervalli min/max in O(log n + k)
+# Gli inserimenti finiscono in un buffer e le rimozioni in un insieme di voci (valore, id) da scartare
+# in lettura, fusi nella lista al bisogno: aggiornare un fornitore non richiede di riordinare la lista
+class SortedRangeIndex:
+    def __init__(self, key):
+        self.key = key
+        self.clear()
+
+    def clear(self):
+        self._keys = []
+        self._ids = []
+        self._pending = []
+        self._removed = set()
+        self._values = {}
+
+    def __len__(self):
+        return len(self._values)
+
+    def add(self, supplier_id, supplier):
+        if supplier_id in self._values:
+            self.remove(supplier_id, supplier)
+        value = self.key(supplier)
+        if value is None or math.isnan(value):
+            return
+        self._values[supplier_id] = value
+        entry = (value, supplier_id)
+        if entry in self._removed:
+            # Stesso valore di una voce rimossa e non ancora fusa: basta ripristinarla
+            self._removed.discard(entry)
+            return
+        self._pending.append(entry)
+        if len(self._pending) > PENDING_LIMIT:
+            self._merge()
+
+    def remove(self, supplier_id, supplier):
+        value = self._values.pop(supplier_id, None)
+        if value is not None:
+            self._removed.add((value, supplier_id))
+            if len(self._removed) > PENDING_LIMIT:
+                self._merge()
+
+    def _merge(self):
+        entries = [entry for entry in zip(self._keys, self._ids) if entry not in self._removed]
+        entries.extend(entry for entry in self._pending if entry not in self._removed)
+        entries.sort()
+        self._keys = [value for value, _ in entries]
+        self._ids = [supplier_id for _, supplier_id in entries]
+        self._pending = []
+        self._removed = set()
+
+    # Id dei fornitori con valore compreso tra low e high (estremi inclusi, None = illimitato)
+    def range_ids(self, low=None, high=None):
+        start = 0 if low is None else bisect_left(self._keys, low)
+        stop = len(self._keys) if high is None else bisect_right(self._keys, high)
+        if self._removed:
+            result = {entry[1] for entry in zip(self._keys[start:stop], self._ids[start:stop])
+                      if entry not in self._removed}
+        else:
+            result = set(self._ids[start:stop])
+        for value, supplier_id in self._pending:
+            if (low is None or value >= low) and (high is None or value <= high) \
+                    and (value, supplier_id) not in self._removed:
+                result.add(supplier_id)
+        return result
@@ -0,0 +1,42 @@
+import numpy as np
+
+# Criteri della classifica: colonna numerica -> True se un valore più alto è migliore
+# (qualità, prezzo e affidabilità sono valutazioni da 1 a 5 stelle, la consegna è in giorni)
+RANKING_CRITERIA = {
+    "quality": True,
+    "price_stars": True,
+    "reliability": True,
+    "delivery_days": False,
+}
+
+DEFAULT_TOP_K = 50
+
+
+# Valori riportati tra 0 (peggiore) e 1 (migliore) rispetto all'intervallo osservato nel catalogo;
+# un valore mancante vale 0, una colonna costante vale 1 per tutti
+def normalized(values, low, high, higher_is_better):
+    if np.isnan(low):
+        return np.zeros(len(values))
+    if high > low:
+        scaled = (values - low) / (high - low)
+    else:
+        scaled = np.ones(len(values))
+    if not higher_is_better:
+        scaled = 1.0 - scaled
+    return np.nan_to_num(scaled, nan=0.0)
+
+
+# Posizioni dei k punteggi più alti in ordine decrescente: selezione parziale con np.partition
+# (O(n)) e ordinamento dei soli k selezionati; a parità di punteggio vince l'id più basso
+def top_k(scores, ids, k):
+    if k < len(scores):
+        threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+        above = np.flatnonzero(scores > threshold)
+        ties = np.flatnonzero(scores == threshold)
+        needed = k - len(above)
+        if needed < len(ties):
+            ties = ties[np.argpartition(ids[ties], needed - 1)[:needed]]
+        selected = np.concatenate([above, ties])
+    else:
+        selected = np.arange(len(scores))
+    return selected[np.lexsort((ids[selected], -scores[selected]))]
@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+# Numero di report renderizzati tenuti in memoria
+RENDER_CACHE_ENTRIES = 512
+
+
+# Funzione per scrivere il template su disco solo se il contenuto è cambiato
+def install_template(template_path, template_source):
+    try:
+        with open(template_path, encoding='utf-8') as f:
+            if f.read() == template_source:
+                return False
+    except FileNotFoundError:
+        pass
+    with open(template_path, 'w', encoding='utf-8') as f:
+        f.write(template_source)
+    return True
+
+
+# Impronta del contenuto di un fornitore: cambia ad ogni modifica del record
+def supplier_fingerprint(supplier):
+    payload = json.dumps(supplier, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+# Renderer dei report: template compilato una volta per processo (con cache del bytecode su disco)
+# e HTML memorizzato per fornitore e versione del record
+class ReportRenderer:
+    def __init__(self, template_dir, template_name, bytecode_dir=None, max_entries=RENDER_CACHE_ENTRIES):
+        if bytecode_dir:
+            os.makedirs(bytecode_dir, exist_ok=True)
+        self.environment = Environment(
+            loader=FileSystemLoader(template_dir),
+            bytecode_cache=FileSystemBytecodeCache(bytecode_dir) if bytecode_dir else None,
+            auto_reload=False,
+        )
+        self.template_name = template_name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._template = None
+        self._rendered = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def template(self):
+        if self._template is None:
+            self._template = self.environment.get_template(self.template_name)
+        return self._template
+
+    def render(self, supplier, supplier_id=None):
+        key = (supplier_id, supplier_fingerprint(supplier))
+        with self._lock:
+            html = self._rendered.get(key)
+            if html is not None:
+                self.hits += 1
+                self._rendered.move_to_end(key)
+                return html
+            self.misses += 1
+        html = self.template.render(supplier)
+        with self._lock:
+            self._rendered[key] = html
+            while len(self._rendered) > self.max_entries:
+                self._rendered.popitem(last=False)
+        return html
+
+    # Da chiamare se il template su disco cambia: ricompila e svuota i report memorizzati
+    def reset(self):
+        with self._lock:
+            self.environment.cache.clear()
+            self._template = None
+            self._rendered.clear()
@@ -0,0 +1,70 @@
+import math
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Colonne di riepilogo mostrate nelle pagine di risultati, con il tipo Arrow di ciascuna
+SUMMARY_COLUMNS = {
+    "name": pa.string(),
+    "email": pa.string(),
+    "phone": pa.string(),
+    "category": pa.string(),
+    "quality": pa.int64(),
+    "price_money": pa.float64(),
+    "currency": pa.string(),
+    "price_stars": pa.int64(),
+    "reliability": pa.int64(),
+    "delivery_times": pa.string(),
+}
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+def page_count(total, page_size):
+    return max(math.ceil(total / page_size), 1)
+
+
+# Id della pagina richiesta (numerata da 1)
+def page_ids(supplier_ids, page, page_size):
+    start = (page - 1) * page_size
+    return supplier_ids[start:start + page_size]
+
+
+def _column(values, arrow_type):
+    try:
+        return pa.array(values, type=arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError):
+        # Valori inseriti a mano con un tipo diverso (es. qualità salvata come testo)
+        return pa.array([None if value is None else str(value) for value in values], type=pa.string())
+
+
+# Tabella Arrow costruita direttamente dalle righe proiettate (store.project), senza passare da pandas
+def summary_table(rows, columns=SUMMARY_COLUMNS):
+    arrays = {"id": pa.array([row["id"] for row in rows], type=pa.int64())}
+    for field, arrow_type in columns.items():
+        values = [row.get(field) for row in rows]
+        if field == "category":
+            values = [", ".join(value) if isinstance(value, list) else value for value in values]
+        arrays[field] = _column(values, arrow_type)
+    return pa.table(arrays)
+
+
+# Pagina di risultati: solo i campi di riepilogo dei fornitori della pagina vengono letti dall'archivio
+def results_page(store, supplier_ids, page, page_size):
+    ids = page_ids(supplier_ids, page, page_size)
+    return summary_table(store.project(ids, list(SUMMARY_COLUMNS)))
+
+
+# Colonna con il punteggio di ogni fornitore (somiglianza alla query nella ricerca fuzzy)
+def with_scores(table, scores, column="similarity"):
+    return table.append_column(column, pa.array([scores.get(supplier_id) for supplier_id in
+                                                 table.column("id").to_pylist()], type=pa.float64()))
+
+
+# Pagina di una tabella di risultati già calcolata (es. interrogazione di uno snapshot Parquet)
+def table_page(table, page, page_size):
+    table = table.slice((page - 1) * page_size, page_size)
+    if "category" in table.column_names and pa.types.is_list(table.schema.field("category").type):
+        position = table.column_names.index("category")
+        table = table.set_column(position, "category", pc.binary_join(table["category"], ", "))
+    return table
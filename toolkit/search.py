@@ -0,0 +1,69 @@
+import heapq
+
+from toolkit.metrics import span
+from toolkit.ranking import DEFAULT_TOP_K
+from toolkit.trigram_index import DEFAULT_LIMIT, FUZZY_FIELDS
+from toolkit.units import DELIVERY_UNIT_DAYS, to_base_currency
+
+
+# Funzione per tradurre i filtri del modulo di ricerca avanzata in valori canonici
+# (prezzi nella valuta di riferimento, tempi di consegna in giorni); un limite a 0 resta disattivato
+def normalize_filters(filters):
+    normalized = dict(filters)
+    currency = filters.get("price_currency")
+    unit_days = DELIVERY_UNIT_DAYS.get(filters.get("delivery_unit") or "giorni", 1)
+    for bound in ("min", "max"):
+        price = filters.get(f"price_{bound}")
+        normalized[f"price_base_{bound}"] = to_base_currency(price, currency) if price else None
+        delivery = filters.get(f"delivery_times_{bound}")
+        normalized[f"delivery_days_{bound}"] = delivery * unit_days if delivery else None
+    return normalized
+
+
+# Indici ordinati usati per restringere i candidati prima delle maschere colonnari
+RANGE_INDEXES = ["price_base", "delivery_days"]
+
+
+# Funzione per calcolare gli id dei fornitori che soddisfano i filtri della ricerca avanzata
+def advanced_filter_ids(store, filters):
+    normalized = normalize_filters(filters)
+    candidates = None
+    with store.lock:
+        for name in RANGE_INDEXES:
+            low, high = normalized[f"{name}_min"], normalized[f"{name}_max"]
+            index = store.index(name)
+            if index is None or (low is None and high is None):
+                continue
+            with span(f"advanced_search.{name}"):
+                ids = index.range_ids(low, high)
+                candidates = ids if candidates is None else candidates & ids
+        with span("advanced_search.columns"):
+            return store.index("columns").filter_ids(normalized, candidates)
+
+
+# Ricerca avanzata con tolleranza agli errori di battitura: i filtri non testuali restringono i candidati,
+# i campi di testo indicizzati per trigrammi ordinano per somiglianza (media sui campi compilati).
+# Restituisce gli id in ordine di somiglianza e le somiglianze per id
+def fuzzy_filter_ids(store, filters, limit=DEFAULT_LIMIT):
+    fuzzy_fields = [field for field in FUZZY_FIELDS if filters.get(field)]
+    exact_filters = dict(filters, **{field: "" for field in fuzzy_fields})
+    candidate_ids = set(advanced_filter_ids(store, exact_filters))
+    if not fuzzy_fields:
+        return sorted(candidate_ids), {}
+    scores = None
+    with store.lock, span("advanced_search.trigrams"):
+        index = store.index("trigrams")
+        for field in fuzzy_fields:
+            ranked = dict(index.search(filters[field], limit=None, fields=[field], candidate_ids=candidate_ids))
+            scores = ranked if scores is None else {supplier_id: scores[supplier_id] + score
+                                                    for supplier_id, score in ranked.items() if supplier_id in scores}
+    scores = {supplier_id: round(score / len(fuzzy_fields), 3) for supplier_id, score in scores.items()}
+    ids = heapq.nsmallest(limit, scores, key=lambda supplier_id: (-scores[supplier_id], supplier_id))
+    return ids, {supplier_id: scores[supplier_id] for supplier_id in ids}
+
+
+# Classifica ponderata dei fornitori: sull'intero catalogo oppure solo sui candidati indicati
+# (es. i risultati di advanced_filter_ids). Restituisce gli id in ordine di punteggio e i punteggi per id
+def ranked_ids(store, weights, k=DEFAULT_TOP_K, candidate_ids=None):
+    with store.lock, span("advanced_search.ranking"):
+        return store.index("columns").rank(weights, k, candidate_ids)
@@ -0,0 +1,55 @@
+import os
+import threading
+
+
+# Archivi fornitori condivisi da tutte le sessioni del processo, uno per file sorgente: il file viene
+# letto una sola volta e ogni scrittura incrementa la versione dell'archivio, così le altre sessioni
+# associate allo stesso file vedono subito i nuovi fornitori senza rileggerlo
+class SharedStores:
+    def __init__(self, store_factory):
+        self.store_factory = store_factory
+        self._stores = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(file_path):
+        return os.path.abspath(file_path)
+
+    # Archivio del file, caricato con loader(file_path) solo alla prima richiesta nel processo;
+    # richieste concorrenti sullo stesso file attendono lo stesso caricamento
+    def get(self, file_path, loader):
+        key = self._key(file_path)
+        with self._lock:
+            store = self._stores.get(key)
+            if store is not None:
+                return store
+            loading = self._loading.setdefault(key, threading.Lock())
+        with loading:
+            store = self._stores.get(key)
+            if store is None:
+                store = self.store_factory()
+                store.replace_all(loader(file_path))
+                with self._lock:
+                    self._stores[key] = store
+        return store
+
+    # Dopo una riscrittura completa del file il contenuto condiviso viene sostituito per tutti
+    def replace(self, file_path, suppliers):
+        key = self._key(file_path)
+        with self._lock:
+            store = self._stores.get(key)
+            if store is None:
+                store = self._stores[key] = self.store_factory()
+        store.replace_all(suppliers)
+        return store
+
+    def loaded(self, file_path):
+        return self._key(file_path) in self._stores
+
+    # Il file è cambiato sul disco: l'archivio verrà ricostruito alla prossima richiesta
+    # (non viene chiuso, altre sessioni potrebbero starlo ancora leggendo)
+    def discard(self, file_path):
+        key = self._key(file_path)
+        with self._lock:
+            self._stores.pop(key, None)
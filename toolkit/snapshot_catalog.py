@@ -0,0 +1,119 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+from watchdog.observers.polling import PollingObserver
+
+from toolkit.parquet_snapshots import PARQUET_SUFFIX, record_count
+from toolkit.snapshot_loader import iter_suppliers
+
+SNAPSHOT_SUFFIXES = (".json", PARQUET_SUFFIX)
+
+
+# Funzione per contare i fornitori di uno snapshot (None se il file non è valido): i file JSON
+# vengono letti in streaming, per i Parquet basta il numero di righe nei metadati
+def count_records(file_path):
+    try:
+        if file_path.endswith(PARQUET_SUFFIX):
+            return record_count(file_path)
+        return sum(1 for _ in iter_suppliers(file_path, fields=[]))
+    except (OSError, ValueError):
+        return None
+
+
+# Inoltra al catalogo gli eventi del file system che riguardano gli snapshot
+class _SnapshotEventHandler(FileSystemEventHandler):
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path:
+                self.catalog.refresh(os.fsdecode(path))
+
+
+# Catalogo degli snapshot (file *.json e *.parquet) di una cartella, aggiornato dagli eventi del file system:
+# la cartella viene letta una sola volta all'avvio e i listener vengono avvisati solo per i file cambiati
+class SnapshotCatalog:
+    def __init__(self, directory):
+        self.directory = os.path.abspath(directory)
+        self.version = 0
+        self._entries = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        # I conteggi dei record richiedono la lettura del file: vengono calcolati in background
+        self._counter = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot-count")
+        self._observer = None
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(SNAPSHOT_SUFFIXES):
+                self._update(entry.path, entry.stat())
+
+    # listener(file_path) viene chiamato dal thread del watcher quando uno snapshot cambia o viene rimosso
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def start(self):
+        try:
+            observer = Observer()
+            observer.schedule(_SnapshotEventHandler(self), self.directory, recursive=False)
+            observer.start()
+        except OSError:
+            # Limite di inotify raggiunto o file system non supportato: si ricade sul polling
+            observer = PollingObserver()
+            observer.schedule(_SnapshotEventHandler(self), self.directory, recursive=False)
+            observer.start()
+        self._observer = observer
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        self._counter.shutdown(wait=False)
+
+    def _update(self, file_path, stat):
+        name = os.path.basename(file_path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            previous = self._entries.get(name)
+            if previous is not None and previous["signature"] == signature:
+                return False
+            self._entries[name] = {"name": name, "size": stat.st_size, "mtime": stat.st_mtime,
+                                   "records": None, "signature": signature}
+            self.version += 1
+        self._counter.submit(self._count, file_path, signature)
+        return True
+
+    def _count(self, file_path, signature):
+        records = count_records(file_path)
+        with self._lock:
+            entry = self._entries.get(os.path.basename(file_path))
+            if entry is not None and entry["signature"] == signature:
+                entry["records"] = records
+                self.version += 1
+
+    # Aggiorna la voce di un file dopo un evento; i listener ricevono il percorso solo se il file è cambiato
+    def refresh(self, file_path):
+        if os.path.dirname(os.path.abspath(file_path)) != self.directory or not file_path.endswith(SNAPSHOT_SUFFIXES):
+            return
+        try:
+            changed = self._update(file_path, os.stat(file_path))
+        except FileNotFoundError:
+            with self._lock:
+                changed = self._entries.pop(os.path.basename(file_path), None) is not None
+                self.version += changed
+        if changed:
+            for listener in self._listeners:
+                listener(os.path.join(self.directory, os.path.basename(file_path)))
+
+    def names(self):
+        with self._lock:
+            return sorted(self._entries)
+
+    def entries(self):
+        with self._lock:
+            return [{key: value for key, value in self._entries[name].items() if key != "signature"}
+                    for name in sorted(self._entries)]
@@ -0,0 +1,91 @@
+from toolkit.journal import get_journal
+from toolkit.reports import supplier_fingerprint
+
+
+# Identità stabile di un fornitore: nome ed email normalizzati; i fornitori omonimi
+# vengono distinti dall'ordine in cui compaiono nel file
+def supplier_identity(supplier, occurrences):
+    base = (str(supplier.get("name") or "").strip().lower(), str(supplier.get("email") or "").strip().lower())
+    occurrences[base] = occurrences.get(base, 0) + 1
+    return base + (occurrences[base],)
+
+
+# Tabella identità -> (chiave nel file, impronta del contenuto), costruita leggendo il file in streaming
+def hash_table(file_path):
+    fingerprints = {}
+    bases = {}
+    for key, supplier in get_journal(file_path).iter_records():
+        fingerprints[key] = supplier_fingerprint(supplier)
+        bases[key] = {"name": supplier.get("name"), "email": supplier.get("email")}
+    occurrences = {}
+    return {supplier_identity(bases[key], occurrences): (key, fingerprints[key]) for key in sorted(fingerprints)}
+
+
+# Funzione per rileggere dal file solo i record con le chiavi indicate
+def collect_records(file_path, keys):
+    keys = set(keys)
+    records = {}
+    for key, supplier in get_journal(file_path).iter_records():
+        if key in keys:
+            records[key] = supplier
+    return records
+
+
+# Confronto tra le tabelle di due file: identità aggiunte, rimosse e modificate (tempo lineare)
+def compare_tables(table_a, table_b):
+    added = [identity for identity in table_b if identity not in table_a]
+    removed = [identity for identity in table_a if identity not in table_b]
+    changed = [identity for identity, (_, fingerprint) in table_b.items()
+               if identity in table_a and table_a[identity][1] != fingerprint]
+    return added, removed, changed
+
+
+def changed_fields(before, after):
+    return {field: [before.get(field), after.get(field)]
+            for field in sorted(set(before) | set(after)) if before.get(field) != after.get(field)}
+
+
+# Funzione per confrontare due file fornitori; in memoria restano le due tabelle delle impronte
+# e i soli record aggiunti, rimossi o modificati
+def diff_snapshots(path_a, path_b):
+    table_a, table_b = hash_table(path_a), hash_table(path_b)
+    added, removed, changed = compare_tables(table_a, table_b)
+    records_a = collect_records(path_a, [table_a[identity][0] for identity in removed + changed])
+    records_b = collect_records(path_b, [table_b[identity][0] for identity in added + changed])
+    return {
+        "added": [records_b[table_b[identity][0]] for identity in added],
+        "removed": [records_a[table_a[identity][0]] for identity in removed],
+        "changed": [{
+            "name": records_b[table_b[identity][0]].get("name"),
+            "occurrence": identity[2],
+            "before": records_a[table_a[identity][0]],
+            "after": records_b[table_b[identity][0]],
+            "fields": changed_fields(records_a[table_a[identity][0]], records_b[table_b[identity][0]]),
+        } for identity in changed],
+        "unchanged": len(table_b) - len(added) - len(changed),
+    }
+
+
+# Funzione per applicare al file target le differenze rispetto a source (source prevale sui record modificati);
+# apply sceglie quali modifiche applicare. Il target viene riscritto in streaming tramite il suo journal
+def merge_snapshots(target_path, source_path, apply=("added", "changed")):
+    table_target, table_source = hash_table(target_path), hash_table(source_path)
+    added, removed, changed = compare_tables(table_target, table_source)
+    added = added if "added" in apply else []
+    removed = set(removed if "removed" in apply else [])
+    changed = changed if "changed" in apply else []
+    source_records = collect_records(source_path, [table_source[identity][0] for identity in added + changed])
+    replacements = {identity: source_records[table_source[identity][0]] for identity in changed}
+
+    def merged(records):
+        occurrences = {}
+        for supplier in records:
+            identity = supplier_identity(supplier, occurrences)
+            if identity in removed:
+                continue
+            yield replacements.get(identity, supplier)
+        for identity in added:
+            yield source_records[table_source[identity][0]]
+
+    get_journal(target_path).rewrite(merged)
+    return {"added": len(added), "changed": len(changed), "removed": len(removed)}
@@ -0,0 +1,123 @@
+import codecs
+import json
+import os
+import re
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Dimensione dei blocchi letti dal file
+READ_CHUNK_SIZE = 1024 * 1024
+
+_WHITESPACE = re.compile(r"\s*")
+
+
+# File in lettura che conta i byte letti, per la barra di avanzamento
+class _CountingReader:
+    def __init__(self, f, on_read):
+        self._f = f
+        self._on_read = on_read
+
+    def read(self, size=-1):
+        data = self._f.read(size)
+        self._on_read(len(data))
+        return data
+
+
+# Decodifica incrementale di un array JSON con la libreria standard (un record alla volta)
+# Un file troncato o con elementi mancanti (es. "[1,,2]") solleva json.JSONDecodeError come json.load
+def _iter_stdlib(f, chunk_size):
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer, position = "", 0
+    started = eof = False
+    # Atteso dopo "[" un record o "]", dopo un record "," o "]", dopo "," un record
+    expected = "first"
+
+    while True:
+        position = _WHITESPACE.match(buffer, position).end()
+        if position >= len(buffer):
+            if eof:
+                break
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + text_decoder.decode(chunk, final=eof)
+            position = 0
+            continue
+        character = buffer[position]
+        if not started:
+            if character != "[":
+                raise ValueError("Il file fornitori deve contenere un array JSON")
+            started = True
+            position += 1
+        elif character == ",":
+            if expected != "separator":
+                raise json.JSONDecodeError("Elemento mancante nell'array", buffer, position)
+            expected = "record"
+            position += 1
+        elif character == "]":
+            if expected == "record":
+                raise json.JSONDecodeError("Virgola finale nell'array", buffer, position)
+            return
+        elif expected == "separator":
+            raise json.JSONDecodeError("Attesi ',' o ']'", buffer, position)
+        else:
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+                # Un numero alla fine del blocco potrebbe proseguire nel successivo
+                complete = eof or end < len(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if not complete:
+                # Record spezzato tra due blocchi: si legge il blocco successivo e si riprova
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[position:] + text_decoder.decode(chunk, final=eof)
+                position = 0
+                continue
+            yield record
+            position = end
+            expected = "separator"
+    if not started:
+        raise ValueError("File fornitori vuoto")
+    raise json.JSONDecodeError("Array non chiuso (file troncato)", buffer, position)
+
+
+# Gli errori di ijson non derivano da ValueError: vengono riportati come quelli della libreria standard
+def _iter_ijson(f):
+    try:
+        yield from ijson.items(f, "item", use_float=True)
+    except ijson.JSONError as error:
+        raise json.JSONDecodeError(str(error), "", 0) from error
+
+
+# Funzione per leggere in streaming i fornitori di un file JSON
+# fields: campi da conservare (None = tutti); limit: numero massimo di record;
+# progress(byte_letti, byte_totali, record): chiamata dopo ogni record
+def iter_suppliers(file_path, fields=None, limit=None, progress=None, chunk_size=READ_CHUNK_SIZE):
+    total_bytes = os.path.getsize(file_path)
+    bytes_read = 0
+
+    def on_read(count):
+        nonlocal bytes_read
+        bytes_read += count
+
+    with open(file_path, "rb") as raw:
+        reader = _CountingReader(raw, on_read)
+        records = _iter_ijson(reader) if ijson is not None else _iter_stdlib(reader, chunk_size)
+        for count, record in enumerate(records, start=1):
+            if fields is not None:
+                record = {field: record[field] for field in fields if field in record}
+            yield record
+            if progress is not None:
+                progress(bytes_read, total_bytes, count)
+            if limit is not None and count >= limit:
+                break
+
+
+def load_snapshot(file_path, fields=None, limit=None, progress=None):
+    return list(iter_suppliers(file_path, fields, limit, progress))
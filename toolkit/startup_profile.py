@@ -0,0 +1,61 @@
+import importlib
+import statistics
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Esecuzioni dello script tenute per le statistiche dei rerun
+RERUN_HISTORY = 200
+
+
+# Profilo di avvio del processo: durata a freddo di import e inizializzazioni, tempo fino al primo
+# disegno della pagina e costo fisso (preambolo dello script) di ogni rerun successivo.
+# Il modulo resta in sys.modules tra un rerun e l'altro, quindi un'istanza dura quanto il processo
+class StartupProfile:
+    def __init__(self):
+        self.process_started = time.perf_counter()
+        self.first_paint = None
+        self._steps = {}
+        self._reruns = deque(maxlen=RERUN_HISTORY)
+        self._lock = threading.Lock()
+
+    # Misura un passo dell'avvio: viene registrata solo la prima esecuzione (a freddo) di ogni passo
+    @contextmanager
+    def step(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._steps.setdefault(name, elapsed)
+
+    # Import differito di un modulo pesante, misurato la prima volta che serve
+    def import_module(self, name):
+        with self.step(f"import {name}"):
+            return importlib.import_module(name)
+
+    # Chiamata da ogni esecuzione dello script alla fine del preambolo comune a tutte le pagine;
+    # started è il perf_counter() registrato all'inizio dello script
+    def preamble_finished(self, started):
+        now = time.perf_counter()
+        with self._lock:
+            if self.first_paint is None:
+                self.first_paint = now - self.process_started
+            else:
+                self._reruns.append(now - started)
+
+    def report(self):
+        with self._lock:
+            reruns = list(self._reruns)
+            return {
+                "first_paint": self.first_paint,
+                "steps": list(self._steps.items()),
+                "reruns": len(reruns),
+                "rerun_median": statistics.median(reruns) if reruns else None,
+                "rerun_max": max(reruns) if reruns else None,
+            }
+
+
+PROFILE = StartupProfile()
@@ -0,0 +1,269 @@
+import itertools
+import json
+import math
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+
+from toolkit.units import supplier_delivery_days
+
+# Colonne scalari estratte da ogni fornitore (le ricerche usano gli indici in memoria collegati all'archivio)
+INDEXED_COLUMNS = ["name", "email", "quality", "reliability", "price_money", "price_stars", "delivery_days"]
+
+# Colonne calcolate da un fornitore invece che lette da un suo campo
+# (i tempi di consegna sono testo come "2 settimane": confrontati come testo "10 giorni" < "2 giorni")
+DERIVED_COLUMNS = {"delivery_days": supplier_delivery_days}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS suppliers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT,
+    email TEXT,
+    quality INTEGER,
+    reliability INTEGER,
+    price_money REAL,
+    price_stars INTEGER,
+    delivery_days REAL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS supplier_categories (
+    supplier_id INTEGER NOT NULL REFERENCES suppliers(id) ON DELETE CASCADE,
+    category TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_categories_supplier ON supplier_categories(supplier_id);
+"""
+
+# Indici SQLite delle versioni precedenti: nessuna query li usa più e rallenterebbero solo le scritture
+RETIRED_INDEXES = ["idx_suppliers_name", "idx_suppliers_email", "idx_suppliers_quality", "idx_suppliers_reliability",
+                   "idx_suppliers_price_money", "idx_suppliers_price_stars", "idx_suppliers_delivery_times",
+                   "idx_suppliers_delivery_days", "idx_categories_category"]
+
+
+# Identificativi univoci degli archivi del processo (a differenza di id() non vengono mai riutilizzati)
+_store_uids = itertools.count(1)
+
+
+# Interfaccia comune per i backend di archiviazione dei fornitori
+class SupplierStore(ABC):
+    # Indici in memoria aggiornati ad ogni scrittura (add/remove/clear)
+    def attach_index(self, name, index):
+        if not hasattr(self, "indexes"):
+            self.indexes = {}
+        index.clear()
+        for supplier_id, supplier in self.items():
+            index.add(supplier_id, supplier)
+        self.indexes[name] = index
+        return index
+
+    def index(self, name):
+        return getattr(self, "indexes", {}).get(name)
+
+    # Lock da tenere durante le letture degli indici quando l'archivio è condiviso tra più sessioni
+    @property
+    def lock(self):
+        if not hasattr(self, "_lock"):
+            self._lock = threading.RLock()
+        return self._lock
+
+    def _notify_add(self, supplier_id, supplier):
+        for index in getattr(self, "indexes", {}).values():
+            index.add(supplier_id, supplier)
+
+    def _notify_remove(self, supplier_id, supplier):
+        for index in getattr(self, "indexes", {}).values():
+            index.remove(supplier_id, supplier)
+
+    def _notify_clear(self):
+        for index in getattr(self, "indexes", {}).values():
+            index.clear()
+
+    @abstractmethod
+    def add(self, supplier):
+        pass
+
+    @abstractmethod
+    def update(self, supplier_id, supplier):
+        pass
+
+    @abstractmethod
+    def replace_all(self, suppliers):
+        pass
+
+    @abstractmethod
+    def get(self, supplier_id):
+        pass
+
+    def get_many(self, supplier_ids):
+        return [self.get(supplier_id) for supplier_id in supplier_ids]
+
+    # Solo i campi richiesti di ogni fornitore, nell'ordine degli id: {"id": ..., campo: valore}
+    def project(self, supplier_ids, fields):
+        rows = []
+        for supplier_id in supplier_ids:
+            supplier = self.get(supplier_id)
+            if supplier is not None:
+                rows.append(dict({field: supplier.get(field) for field in fields}, id=supplier_id))
+        return rows
+
+    @abstractmethod
+    def items(self):
+        pass
+
+    def ids(self):
+        return [supplier_id for supplier_id, _ in self.items()]
+
+    def all(self):
+        return [supplier for _, supplier in self.items()]
+
+    def count(self):
+        return len(self.ids())
+
+
+# Backend SQLite: chiave primaria stabile; filtri e ricerche passano dagli indici in memoria (attach_index)
+class SQLiteSupplierStore(SupplierStore):
+    def __init__(self, path=":memory:"):
+        self.path = path
+        # Streamlit esegue ogni rerun in un thread diverso: la connessione è condivisa e protetta da un lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._migrate_schema()
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.RLock()
+        self.uid = next(_store_uids)
+        self.version = 0
+        self._items_cache = None
+        self._items_version = -1
+
+    # Database creati con i tempi di consegna come testo: colonna numerica aggiunta e calcolata dai dati
+    def _migrate_schema(self):
+        with self._conn:
+            for name in RETIRED_INDEXES:
+                self._conn.execute(f"DROP INDEX IF EXISTS {name}")
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(suppliers)")}
+            if not columns or "delivery_days" in columns:
+                return
+            self._conn.execute("ALTER TABLE suppliers ADD COLUMN delivery_days REAL")
+            self._conn.executemany(
+                "UPDATE suppliers SET delivery_days = ? WHERE id = ?",
+                [(self._column_value(json.loads(data), "delivery_days"), supplier_id)
+                 for supplier_id, data in self._conn.execute("SELECT id, data FROM suppliers").fetchall()]
+            )
+
+    @staticmethod
+    def _column_value(supplier, column):
+        derive = DERIVED_COLUMNS.get(column)
+        if derive is None:
+            return supplier.get(column)
+        value = derive(supplier)
+        return None if value is None or math.isnan(value) else value
+
+    @classmethod
+    def _row_values(cls, supplier):
+        return [cls._column_value(supplier, column) for column in INDEXED_COLUMNS]
+
+    def _insert(self, supplier):
+        cursor = self._conn.execute(
+            f"INSERT INTO suppliers ({', '.join(INDEXED_COLUMNS)}, data) "
+            f"VALUES ({', '.join('?' for _ in INDEXED_COLUMNS)}, ?)",
+            self._row_values(supplier) + [json.dumps(supplier, ensure_ascii=False)]
+        )
+        supplier_id = cursor.lastrowid
+        self._insert_categories(supplier_id, supplier)
+        return supplier_id
+
+    def _insert_categories(self, supplier_id, supplier):
+        self._conn.executemany(
+            "INSERT INTO supplier_categories (supplier_id, category) VALUES (?, ?)",
+            [(supplier_id, category) for category in supplier.get("category") or []]
+        )
+
+    def _changed(self):
+        self.version += 1
+
+    def add(self, supplier):
+        with self._lock, self._conn:
+            supplier_id = self._insert(supplier)
+            self._changed()
+            self._notify_add(supplier_id, supplier)
+        return supplier_id
+
+    def update(self, supplier_id, supplier):
+        with self._lock, self._conn:
+            previous = self.get(supplier_id)
+            assignments = ", ".join(f"{column} = ?" for column in INDEXED_COLUMNS)
+            self._conn.execute(
+                f"UPDATE suppliers SET {assignments}, data = ? WHERE id = ?",
+                self._row_values(supplier) + [json.dumps(supplier, ensure_ascii=False), supplier_id]
+            )
+            self._conn.execute("DELETE FROM supplier_categories WHERE supplier_id = ?", (supplier_id,))
+            self._insert_categories(supplier_id, supplier)
+            self._changed()
+            if previous is not None:
+                self._notify_remove(supplier_id, previous)
+            self._notify_add(supplier_id, supplier)
+
+    def replace_all(self, suppliers):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM supplier_categories")
+            self._conn.execute("DELETE FROM suppliers")
+            ids = [self._insert(supplier) for supplier in suppliers]
+            self._changed()
+            self._notify_clear()
+            for supplier_id, supplier in zip(ids, suppliers):
+                self._notify_add(supplier_id, supplier)
+        return ids
+
+    def get(self, supplier_id):
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM suppliers WHERE id = ?", (supplier_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, supplier_ids):
+        # Le righe vengono lette a blocchi per restare sotto il limite di parametri di SQLite
+        supplier_ids = list(supplier_ids)
+        rows = {}
+        with self._lock:
+            for start in range(0, len(supplier_ids), 900):
+                chunk = supplier_ids[start:start + 900]
+                query = f"SELECT id, data FROM suppliers WHERE id IN ({', '.join('?' for _ in chunk)})"
+                rows.update(self._conn.execute(query, chunk).fetchall())
+        return [json.loads(rows[supplier_id]) for supplier_id in supplier_ids if supplier_id in rows]
+
+    def project(self, supplier_ids, fields):
+        # I campi vengono estratti dal JSON da SQLite: note, campi aggiuntivi e media non vengono decodificati
+        supplier_ids = list(supplier_ids)
+        extracts = ", ".join("json_quote(json_extract(data, ?))" for _ in fields)
+        paths = [f'$."{field}"' for field in fields]
+        chunk_size = 900 - len(fields)
+        rows = {}
+        with self._lock:
+            for start in range(0, len(supplier_ids), chunk_size):
+                chunk = supplier_ids[start:start + chunk_size]
+                query = f"SELECT id, {extracts} FROM suppliers WHERE id IN ({', '.join('?' for _ in chunk)})"
+                for row in self._conn.execute(query, paths + chunk):
+                    rows[row[0]] = row[1:]
+        return [dict(zip(fields, map(json.loads, rows[supplier_id])), id=supplier_id)
+                for supplier_id in supplier_ids if supplier_id in rows]
+
+    def items(self):
+        # Le righe decodificate vengono riutilizzate finché l'archivio non cambia
+        with self._lock:
+            if self._items_version != self.version:
+                rows = self._conn.execute("SELECT id, data FROM suppliers ORDER BY id").fetchall()
+                self._items_cache = [(supplier_id, json.loads(data)) for supplier_id, data in rows]
+                self._items_version = self.version
+            return self._items_cache
+
+    def ids(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT id FROM suppliers ORDER BY id")]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM suppliers").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,146 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image, ImageOps, features
+
+# Lato massimo delle miniature (doppio dei 150px della galleria per gli schermi ad alta densità)
+THUMBNAIL_SIZE = (300, 300)
+THUMBNAIL_QUALITY = 80
+
+# Estensioni delle immagini per cui vengono generate le miniature
+THUMBNAIL_EXTENSIONS = {"jpg", "jpeg", "png"}
+
+# WebP se supportato dalla build di Pillow, altrimenti JPEG
+THUMBNAIL_FORMAT = "WEBP" if features.check("webp") else "JPEG"
+THUMBNAIL_MIME = "image/webp" if THUMBNAIL_FORMAT == "WEBP" else "image/jpeg"
+
+
+def is_thumbnailable(media_path):
+    return media_path.rsplit(".", 1)[-1].lower() in THUMBNAIL_EXTENSIONS
+
+
+# Percorso della miniatura: hash del percorso del file originale più il nome leggibile
+def thumbnail_path(media_path, thumbnails_dir):
+    digest = hashlib.sha1(os.path.abspath(media_path).encode("utf-8")).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(media_path))[0]
+    extension = "webp" if THUMBNAIL_FORMAT == "WEBP" else "jpg"
+    return os.path.join(thumbnails_dir, f"{digest}_{stem}.{extension}")
+
+
+def is_fresh(media_path, thumb_path):
+    try:
+        return os.path.getmtime(thumb_path) >= os.path.getmtime(media_path)
+    except OSError:
+        return False
+
+
+# Funzione per generare una miniatura (eseguita nei processi del pool)
+def make_thumbnail(media_path, thumbnails_dir):
+    thumb_path = thumbnail_path(media_path, thumbnails_dir)
+    if is_fresh(media_path, thumb_path):
+        return thumb_path
+    os.makedirs(thumbnails_dir, exist_ok=True)
+    with Image.open(media_path) as image:
+        image.draft("RGB", THUMBNAIL_SIZE)
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(THUMBNAIL_SIZE)
+        if THUMBNAIL_FORMAT == "JPEG" or image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if THUMBNAIL_FORMAT == "WEBP" and "A" in image.getbands() else "RGB")
+        temp_path = f"{thumb_path}.{os.getpid()}.tmp"
+        image.save(temp_path, THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY)
+    os.replace(temp_path, thumb_path)
+    return thumb_path
+
+
+# Pipeline delle miniature: generazione in un pool di processi, in background rispetto alla pagina
+class ThumbnailPipeline:
+    def __init__(self, thumbnails_dir, max_workers=None):
+        self.thumbnails_dir = thumbnails_dir
+        self.max_workers = max_workers
+        self._executor = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    # I processi vengono avviati con "spawn": un fork copierebbe i thread e i lock del server Streamlit
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    # Un processo terminato (es. per memoria esaurita) rende inutilizzabile il pool: viene ricreato
+    # alla prossima richiesta e le generazioni in attesa vengono dimenticate
+    def _discard_pool(self, executor):
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+            self._pending.clear()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    # Accoda la generazione delle miniature mancanti o non aggiornate
+    def submit(self, media_paths):
+        futures = []
+        started = []
+        with self._lock:
+            for media_path in media_paths:
+                if not is_thumbnailable(media_path):
+                    continue
+                if is_fresh(media_path, thumbnail_path(media_path, self.thumbnails_dir)):
+                    continue
+                future = self._pending.get(media_path)
+                if future is None or future.done():
+                    try:
+                        future = self._pool().submit(make_thumbnail, media_path, self.thumbnails_dir)
+                    except BrokenProcessPool:
+                        self._executor.shutdown(wait=False, cancel_futures=True)
+                        self._executor = None
+                        self._pending.clear()
+                        future = self._pool().submit(make_thumbnail, media_path, self.thumbnails_dir)
+                    self._pending[media_path] = future
+                    started.append((media_path, future))
+                futures.append(future)
+        # Callback registrate fuori dal lock: se il future è già concluso vengono eseguite subito
+        # in questo thread e _forget deve poter prendere il lock
+        for media_path, future in started:
+            future.add_done_callback(lambda done, path=media_path: self._forget(path, done))
+        return futures
+
+    def _forget(self, media_path, future):
+        with self._lock:
+            if self._pending.get(media_path) is future:
+                del self._pending[media_path]
+
+    # Funzione per generare le miniature dei file già presenti in una cartella (e nelle sottocartelle)
+    def backfill(self, media_dir):
+        paths = [os.path.join(folder, file_name)
+                 for folder, _, file_names in os.walk(media_dir)
+                 for file_name in file_names if is_thumbnailable(file_name)]
+        return self.submit(paths)
+
+    # Percorso della miniatura pronta; se manca viene generata subito (None se l'immagine non è leggibile)
+    def get(self, media_path):
+        thumb_path = thumbnail_path(media_path, self.thumbnails_dir)
+        if is_fresh(media_path, thumb_path):
+            return thumb_path
+        with self._lock:
+            future = self._pending.get(media_path)
+            executor = self._executor
+        try:
+            if future is not None:
+                return future.result()
+            return make_thumbnail(media_path, self.thumbnails_dir)
+        except BrokenProcessPool:
+            # La galleria mostra l'immagine originale
+            self._discard_pool(executor)
+            return None
+        except (OSError, Image.DecompressionBombError):
+            return None
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,168 @@
+import re
+from bisect import bisect_left
+
+# Campi del fornitore indicizzati per la ricerca testuale
+TOKEN_FIELDS = ["name", "email"]
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Numero di token nuovi tenuti fuori dalla lista ordinata prima di un merge
+PENDING_LIMIT = 4096
+
+# Lunghezza massima delle sottostringhe dei token indicizzate per la ricerca di frammenti
+GRAM_SIZE = 3
+
+
+# Funzione per normalizzare un testo in token minuscoli
+def tokenize(text):
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+def supplier_tokens(supplier):
+    tokens = set()
+    for field in TOKEN_FIELDS:
+        tokens.update(tokenize(supplier.get(field, "")))
+    return tokens
+
+
+# Sottostringhe di un token lunghe da 1 a GRAM_SIZE caratteri
+def token_grams(token):
+    return {token[start:start + size] for size in range(1, GRAM_SIZE + 1) for start in range(len(token) - size + 1)}
+
+
+# Stesso criterio della ricerca lineare: sottostringa del nome o dell'email
+def matches_text(supplier, query):
+    query = query.lower()
+    return query in str(supplier.get("name", "")).lower() or query in str(supplier.get("email", "")).lower()
+
+
+# Indice invertito incrementale: token di nome/email e categorie -> id dei fornitori
+# La lista ordinata dei token permette la ricerca per prefisso con bisect; i token nuovi
+# restano in un piccolo buffer finché non vengono fusi nella lista in un colpo solo.
+# Le sottostringhe brevi dei token (fino a trigrammi) puntano ai token che le contengono,
+# così i frammenti a metà parola non richiedono di scorrere tutto il vocabolario
+class TokenIndex:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._postings = {}
+        self._sorted_tokens = []
+        self._pending_tokens = set()
+        self._grams = {}
+        self._categories = {}
+        self._texts = {}
+        self._ids = set()
+
+    def add(self, supplier_id, supplier):
+        tokens = supplier_tokens(supplier)
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                self._pending_tokens.add(token)
+                for gram in token_grams(token):
+                    self._grams.setdefault(gram, set()).add(token)
+            postings.add(supplier_id)
+        for category in supplier.get("category") or []:
+            self._categories.setdefault(category, set()).add(supplier_id)
+        # Testo minimo conservato per verificare i candidati senza rileggere l'archivio
+        self._texts[supplier_id] = {
+            "name": str(supplier.get("name", "")),
+            "email": str(supplier.get("email", "")),
+        }
+        self._ids.add(supplier_id)
+
+    def remove(self, supplier_id, supplier):
+        for token in supplier_tokens(supplier):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.discard(supplier_id)
+            if not postings:
+                # Il token resta nella lista ordinata e viene scartato al prossimo merge
+                del self._postings[token]
+                self._pending_tokens.discard(token)
+                for gram in token_grams(token):
+                    tokens = self._grams.get(gram)
+                    if tokens is not None:
+                        tokens.discard(token)
+                        if not tokens:
+                            del self._grams[gram]
+        for category in supplier.get("category") or []:
+            members = self._categories.get(category)
+            if members is not None:
+                members.discard(supplier_id)
+                if not members:
+                    del self._categories[category]
+        self._texts.pop(supplier_id, None)
+        self._ids.discard(supplier_id)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _merge_pending(self):
+        self._sorted_tokens = sorted(
+            {token for token in self._sorted_tokens if token in self._postings} | self._pending_tokens
+        )
+        self._pending_tokens = set()
+
+    # Id dei fornitori con almeno un token che inizia con il prefisso indicato
+    def prefix_ids(self, prefix):
+        if len(self._pending_tokens) > PENDING_LIMIT:
+            self._merge_pending()
+        result = set()
+        position = bisect_left(self._sorted_tokens, prefix)
+        while position < len(self._sorted_tokens) and self._sorted_tokens[position].startswith(prefix):
+            postings = self._postings.get(self._sorted_tokens[position])
+            if postings:
+                result |= postings
+            position += 1
+        for token in self._pending_tokens:
+            if token.startswith(prefix):
+                result |= self._postings[token]
+        return result
+
+    # Id dei fornitori con almeno un token che contiene il frammento (anche a metà parola):
+    # i token candidati sono quelli che contengono tutti i trigrammi del frammento
+    def fragment_ids(self, fragment):
+        if len(fragment) <= GRAM_SIZE:
+            tokens = self._grams.get(fragment, ())
+        else:
+            gram_sets = sorted((self._grams.get(fragment[start:start + GRAM_SIZE], set())
+                                for start in range(len(fragment) - GRAM_SIZE + 1)), key=len)
+            tokens = set(gram_sets[0]).intersection(*gram_sets[1:])
+        result = set()
+        for token in tokens:
+            if fragment in token:
+                result |= self._postings[token]
+        return result
+
+    def category_ids(self, categories):
+        result = set()
+        for category in categories:
+            result |= self._categories.get(category, set())
+        return result
+
+    # Ricerca: ogni token della query deve essere prefisso di un token del fornitore
+    # (con substring=True basta che ne sia una parte, come nel confronto lineare)
+    def search(self, query="", categories=None, substring=False):
+        query_tokens = tokenize(query)
+        if query_tokens:
+            lookup = self.fragment_ids if substring else self.prefix_ids
+            candidate_sets = sorted((lookup(token) for token in query_tokens), key=len)
+            candidates = set(candidate_sets[0])
+            for other in candidate_sets[1:]:
+                candidates &= other
+                if not candidates:
+                    break
+            candidates = {supplier_id for supplier_id in candidates
+                          if matches_text(self._texts[supplier_id], query)}
+        elif query:
+            # Query senza caratteri alfanumerici: si ricade sul confronto diretto
+            candidates = {supplier_id for supplier_id, text in self._texts.items() if matches_text(text, query)}
+        else:
+            candidates = set(self._ids)
+        if categories:
+            candidates &= self.category_ids(categories)
+        return sorted(candidates)
@@ -0,0 +1,131 @@
+import heapq
+import math
+import re
+from collections import Counter
+
+# Campi del fornitore indicizzati per la ricerca con tolleranza agli errori di battitura
+FUZZY_FIELDS = ["name", "address", "email", "website"]
+
+# Quota minima dei trigrammi della query che un campo deve contenere per essere un candidato
+DEFAULT_THRESHOLD = 0.3
+
+DEFAULT_LIMIT = 50
+
+# Soglie provate in sequenza per trovare i primi risultati con il minor numero di candidati
+THRESHOLD_STEPS = [1.0, 0.8, 0.6, 0.45]
+
+_WORD_RE = re.compile(r"\w+")
+
+
+# Trigrammi di caratteri di un testo; ogni parola viene estesa con spazi
+# (come in pg_trgm) così che anche parole brevi e iniziali di parola pesino
+def trigrams(text):
+    grams = set()
+    for word in _WORD_RE.findall(str(text).lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+# Ordinamento dei risultati: somiglianza, poi campo più corto, poi id
+def _rank(item):
+    supplier_id, (containment, jaccard) = item
+    return -containment, -jaccard, supplier_id
+
+
+# Indice di trigrammi incrementale: trigramma -> chiavi (id fornitore, campo)
+# La somiglianza è la quota dei trigrammi della query presenti nel campo (a parità, il campo più corto)
+class TrigramIndex:
+    def __init__(self, fields=FUZZY_FIELDS):
+        self.fields = list(fields)
+        self.clear()
+
+    def clear(self):
+        self._postings = {}
+        self._sizes = {}
+
+    # Chiave intera per la coppia (fornitore, campo), più leggera di una tupla nelle posting list
+    def _key(self, supplier_id, field_index):
+        return supplier_id * len(self.fields) + field_index
+
+    def add(self, supplier_id, supplier):
+        for field_index, field in enumerate(self.fields):
+            grams = trigrams(supplier.get(field) or "")
+            if not grams:
+                continue
+            key = self._key(supplier_id, field_index)
+            self._sizes[key] = len(grams)
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(key)
+
+    def remove(self, supplier_id, supplier):
+        for field_index, field in enumerate(self.fields):
+            key = self._key(supplier_id, field_index)
+            if self._sizes.pop(key, None) is None:
+                continue
+            for gram in trigrams(supplier.get(field) or ""):
+                postings = self._postings.get(gram)
+                if postings is not None:
+                    postings.discard(key)
+                    if not postings:
+                        del self._postings[gram]
+
+    def __len__(self):
+        return len({key // len(self.fields) for key in self._sizes})
+
+    # Fornitori più simili alla query: lista di (id, somiglianza) in ordine decrescente
+    # fields limita il confronto ad alcuni campi, candidate_ids ai fornitori già selezionati da altri filtri
+    def search(self, query, limit=DEFAULT_LIMIT, threshold=DEFAULT_THRESHOLD, fields=None, candidate_ids=None):
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+        field_indexes = {self.fields.index(field) for field in fields or self.fields}
+        if limit is None:
+            # Servono tutti i risultati sopra la soglia: un solo calcolo, senza passare dalle soglie più alte
+            best = self._scores(query_grams, threshold, field_indexes, candidate_ids)
+            ranked = sorted(best.items(), key=_rank)
+        else:
+            # Si parte da una soglia alta (pochi candidati) e la si abbassa solo se i risultati non bastano:
+            # i risultati sono ordinati prima di tutto per somiglianza, quindi i primi k non cambiano
+            for step in sorted({max(threshold, value) for value in THRESHOLD_STEPS} | {threshold}, reverse=True):
+                best = self._scores(query_grams, step, field_indexes, candidate_ids)
+                if len(best) >= limit:
+                    break
+            ranked = heapq.nsmallest(limit, best.items(), key=_rank)
+        return [(supplier_id, round(score[0], 3)) for supplier_id, score in ranked]
+
+    def _scores(self, query_grams, threshold, field_indexes, candidate_ids):
+        # Un candidato deve condividere almeno min_overlap trigrammi con la query, quindi
+        # compare per forza in una delle posting list dei trigrammi più rari (prefix filtering)
+        min_overlap = max(math.ceil(threshold * len(query_grams)), 1)
+        ordered = sorted(query_grams, key=lambda gram: len(self._postings.get(gram, ())))
+        split = len(ordered) - min_overlap + 1
+        if split == 1:
+            # Tutti i trigrammi richiesti: basta l'intersezione delle posting list
+            keys = set(self._postings.get(ordered[0], ()))
+            for gram in ordered[1:]:
+                keys &= self._postings.get(gram, set())
+            counts = dict.fromkeys(keys, min_overlap)
+        else:
+            counts = Counter()
+            for gram in ordered[:split]:
+                counts.update(self._postings.get(gram, ()))
+            for gram in ordered[split:]:
+                postings = self._postings.get(gram)
+                if postings:
+                    for key in counts:
+                        if key in postings:
+                            counts[key] += 1
+
+        best = {}
+        width = len(self.fields)
+        for key, overlap in counts.items():
+            supplier_id, field_index = divmod(key, width)
+            if overlap < min_overlap or field_index not in field_indexes:
+                continue
+            if candidate_ids is not None and supplier_id not in candidate_ids:
+                continue
+            score = (overlap / len(query_grams), overlap / (len(query_grams) + self._sizes[key] - overlap))
+            if score > best.get(supplier_id, (0, 0)):
+                best[supplier_id] = score
+        return best
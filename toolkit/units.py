@@ -0,0 +1,49 @@
+import math
+
+# Durata in giorni di ciascuna unità dei tempi di consegna
+DELIVERY_UNIT_DAYS = {
+    "giorno": 1, "giorni": 1,
+    "settimana": 7, "settimane": 7,
+    "mese": 30, "mesi": 30,
+    "anno": 365, "anni": 365,
+}
+
+# Valuta di riferimento e tabella locale dei cambi (unità di valuta di riferimento per unità di valuta)
+BASE_CURRENCY = "EUR"
+CURRENCY_RATES = {
+    "EUR": 1.0,
+    "USD": 0.92,
+    "GBP": 1.17,
+}
+
+
+# Funzione per convertire i tempi di consegna ("2 mesi") in un numero di giorni
+def delivery_days(delivery_times):
+    parts = str(delivery_times).split()
+    try:
+        value = float(int(parts[0]))
+    except (IndexError, ValueError):
+        return math.nan
+    if len(parts) == 1:
+        return value
+    unit_days = DELIVERY_UNIT_DAYS.get(parts[1].lower())
+    return value * unit_days if unit_days is not None else math.nan
+
+
+# Funzione per convertire un importo nella valuta di riferimento
+def to_base_currency(amount, currency=BASE_CURRENCY, rates=None):
+    rates = rates or CURRENCY_RATES
+    rate = rates.get(currency or BASE_CURRENCY)
+    try:
+        return float(amount) * rate if rate is not None else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+
+# Valori canonici letti da un record fornitore (usati dagli indici al momento della scrittura)
+def supplier_delivery_days(supplier):
+    return delivery_days(supplier.get("delivery_times"))
+
+
+def supplier_price_base(supplier):
+    return to_base_currency(supplier.get("price_money"), supplier.get("currency"))
@@ -0,0 +1,41 @@
+import hashlib
+import os
+import tempfile
+from collections import namedtuple
+
+# Dimensione dei blocchi copiati dal file caricato al disco
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Numero massimo di file scritti in parallelo per ogni invio del modulo
+UPLOAD_WORKERS = 4
+
+StoredUpload = namedtuple("StoredUpload", ["path", "sha256", "size"])
+
+
+# Funzione per copiare un file caricato su disco a blocchi, calcolandone lo SHA-256
+# Il file viene scritto in un temporaneo nella stessa cartella e rinominato solo a scrittura completata
+def store_upload(uploaded_file, folder_path, file_name=None, chunk_size=UPLOAD_CHUNK_SIZE):
+    os.makedirs(folder_path, exist_ok=True)
+    file_path = os.path.join(folder_path, file_name or uploaded_file.name)
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=folder_path, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as target:
+            uploaded_file.seek(0)
+            while True:
+                block = uploaded_file.read(chunk_size)
+                if not block:
+                    break
+                digest.update(block)
+                target.write(block)
+                size += len(block)
+            target.flush()
+            os.fsync(target.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return StoredUpload(file_path, digest.hexdigest(), size)
+
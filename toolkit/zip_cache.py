@@ -0,0 +1,141 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+from toolkit.metrics import span
+from toolkit.zipstream import CHUNK_SIZE, iter_zip, zip_entries
+
+# Spazio su disco predefinito per gli archivi in cache (2 GiB)
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+
+# Funzione per calcolare lo SHA-256 di un file leggendolo a blocchi
+def file_sha256(file_path, chunk_size=CHUNK_SIZE):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Cache su disco degli archivi zip, indicizzata dal contenuto esatto dei file
+# La data di modifica dei file in cache registra l'ultimo utilizzo per l'eliminazione LRU
+class ZipCache:
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._hashes = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    # Chiave dell'archivio: percorso, nome nello zip, dimensione, mtime e hash di ciascun file, nell'ordine dato
+    def key(self, file_paths):
+        digest = hashlib.sha256()
+        for file_path, arcname in zip_entries(file_paths):
+            stat = os.stat(file_path)
+            signature = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+            content_hash = self._hashes.get(signature)
+            if content_hash is None:
+                content_hash = self._hashes[signature] = file_sha256(file_path)
+            digest.update(f"{signature[0]}\0{arcname}\0{stat.st_size}\0{stat.st_mtime_ns}\0{content_hash}\n"
+                          .encode("utf-8"))
+        return digest.hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.directory, f"{key}.zip")
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    # Stream dell'archivio: dalla cache se presente, altrimenti generato e salvato mentre viene inviato.
+    # Misurato qui (tratto create_zip) così che valgano sia i download in pagina sia quelli del server
+    def stream(self, file_paths, chunk_size=CHUNK_SIZE):
+        with span("create_zip") as measured:
+            for block in self._stream(file_paths, chunk_size):
+                measured.bytes += len(block)
+                yield block
+
+    def _stream(self, file_paths, chunk_size):
+        key = self.key(file_paths)
+        cached_path = self.path_for(key)
+        try:
+            cached = open(cached_path, "rb")
+        except FileNotFoundError:
+            cached = None
+        if cached is not None:
+            with self._lock:
+                self.hits += 1
+            # Il file aperto resta leggibile anche se un'altra sessione lo elimina nel frattempo
+            with cached:
+                try:
+                    os.utime(cached_path)
+                except FileNotFoundError:
+                    pass
+                yield from iter(lambda: cached.read(chunk_size), b"")
+            return
+
+        with self._lock:
+            self.misses += 1
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        completed = False
+        try:
+            with os.fdopen(fd, "wb") as target:
+                for block in iter_zip(file_paths, chunk_size):
+                    target.write(block)
+                    yield block
+            completed = True
+        finally:
+            if completed:
+                with self._key_lock(key):
+                    os.replace(temp_path, cached_path)
+                self.evict()
+            else:
+                # Download interrotto: l'archivio parziale non entra in cache
+                os.remove(temp_path)
+
+    # Funzione per ottenere il contenuto di un archivio, dalla cache o generandolo: niente percorsi,
+    # che l'eliminazione LRU (anche dell'archivio appena creato, se da solo supera il budget) può invalidare
+    def read(self, file_paths):
+        return b"".join(self.stream(file_paths))
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".zip"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    # Elimina gli archivi usati meno di recente finché la cache non rientra nel budget
+    def evict(self):
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                total -= size
+                self.evictions += 1
+
+    def stats(self):
+        entries = self._entries()
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / requests if requests else 0.0,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,73 @@
+import io
+import os
+import zipfile
+
+# Dimensione dei blocchi letti dai file e restituiti dallo stream
+CHUNK_SIZE = 1024 * 1024
+
+
+# Destinazione non posizionabile che accumula i byte scritti da zipfile fino al prossimo prelievo
+class ChunkSink(io.RawIOBase):
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+# Funzione per normalizzare le voci dell'archivio in coppie (percorso, nome nello zip)
+# Ogni voce può essere un percorso o una coppia; i nomi ripetuti ricevono un suffisso numerico
+def zip_entries(items):
+    entries = []
+    used = set()
+    for item in items:
+        file_path, arcname = (item, None) if isinstance(item, str) else item
+        arcname = arcname or os.path.basename(file_path)
+        stem, extension = os.path.splitext(arcname)
+        candidate, counter = arcname, 2
+        while candidate in used:
+            candidate = f"{stem} ({counter}){extension}"
+            counter += 1
+        used.add(candidate)
+        entries.append((file_path, candidate))
+    return entries
+
+
+# Funzione per generare un archivio zip a blocchi, senza tenerlo interamente in memoria
+def iter_zip(file_paths, chunk_size=CHUNK_SIZE, compression=zipfile.ZIP_DEFLATED):
+    sink = ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression) as zip_file:
+        for file_path, arcname in zip_entries(file_paths):
+            zip_info = zipfile.ZipInfo.from_file(file_path, arcname)
+            zip_info.compress_type = compression
+            with open(file_path, "rb") as source, zip_file.open(zip_info, "w") as target:
+                while True:
+                    block = source.read(chunk_size)
+                    if not block:
+                        break
+                    target.write(block)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    # Directory centrale scritta alla chiusura dell'archivio
+    data = sink.drain()
+    if data:
+        yield data
+